@@ -1,6 +1,34 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
+
+
+def _invalidate_user(sender, instance, **kwargs):
+    from accounts.backends import invalidate_cached_user
+    invalidate_cached_user(instance.pk)
+
+
+def _sync_normalized_email(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    from accounts.models import NormalizedEmail
+    if raw or (update_fields is not None and 'email' not in update_fields):
+        return
+    NormalizedEmail.sync(instance, created=created)
+
+
+def _invalidate_profile(sender, instance, **kwargs):
+    from accounts.backends import invalidate_cached_user
+    invalidate_cached_user(instance.user_id)
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from accounts.models import UserProfile
+
+        post_save.connect(_invalidate_user, sender=User, dispatch_uid="accounts.user.save")
+        post_save.connect(_sync_normalized_email, sender=User, dispatch_uid="accounts.user.email")
+        post_delete.connect(_invalidate_user, sender=User, dispatch_uid="accounts.user.delete")
+        post_save.connect(_invalidate_profile, sender=UserProfile, dispatch_uid="accounts.profile.save")
+        post_delete.connect(_invalidate_profile, sender=UserProfile, dispatch_uid="accounts.profile.delete")
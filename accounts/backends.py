@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+
+UserModel = get_user_model()
+
+
+def user_cache_key(user_id):
+    return f"accounts:user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class ProfileModelBackend(ModelBackend):
+    """ModelBackend that loads ``User`` and ``UserProfile`` in one query.
+
+    The pair is kept in the cache for ``USER_CACHE_TIMEOUT`` seconds, so most
+    requests resolve ``request.user.userprofile`` (navbar, profile pages)
+    without touching the database. Saving or deleting either model drops the
+    cached copy (see ``AccountsConfig.ready``).
+
+    Plain ``ModelBackend`` is listed after this one so sessions logged in
+    under it still resolve. A failed login stops here rather than falling
+    through to it and hashing the same password a second time.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None:
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = UserModel._default_manager.select_related("userprofile").get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            cache.set(key, user, getattr(settings, "USER_CACHE_TIMEOUT", 60))
+        return user if self.user_can_authenticate(user) else None
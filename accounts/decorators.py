@@ -0,0 +1,21 @@
+from functools import wraps
+
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+
+
+def is_worker(user):
+    if user.is_staff:
+        return True
+    profile = getattr(user, "userprofile", None)  # None when the profile row is missing
+    return profile is not None and profile.role == "worker"
+
+
+def worker_required(view):
+    """Front-desk pages: logged in, and a worker (UserProfile.role) or staff."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_worker(request.user):
+            raise PermissionDenied
+        return view(request, *args, **kwargs)
+    return login_required(wrapper)
@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from accounts.models import NormalizedEmail, normalize_email
+
+
+class Command(BaseCommand):
+    help = "Create NormalizedEmail rows for users that don't have one yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, batch_size=1000, **options):
+        created = 0
+        duplicates = []
+        last_pk = 0
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_pk, normalized_email__isnull=True)
+                .order_by("pk")
+                .values_list("pk", "email")[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            wanted = {}
+            for pk, email in batch:
+                email = normalize_email(email)
+                if not email:
+                    continue
+                if email in wanted:
+                    duplicates.append((pk, email))
+                else:
+                    wanted[email] = pk
+            taken = set(
+                NormalizedEmail.objects.filter(email__in=list(wanted)).values_list("email", flat=True)
+            )
+            duplicates.extend((pk, email) for email, pk in wanted.items() if email in taken)
+
+            rows = [NormalizedEmail(user_id=pk, email=email) for email, pk in wanted.items() if email not in taken]
+            # ignore_conflicts covers signups that land while the backfill runs.
+            NormalizedEmail.objects.bulk_create(rows, ignore_conflicts=True)
+            created += len(rows)
+
+        self.stdout.write(f"Created {created} normalized email row(s).")
+        if duplicates:
+            self.stdout.write(self.style.WARNING(
+                f"{len(duplicates)} user(s) share an email with an earlier account and were skipped:"
+            ))
+            for pk, email in duplicates:
+                self.stdout.write(f"  user {pk}: {email}")
@@ -0,0 +1,55 @@
+import logging
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a credential-stuffing burst against /accounts/login/ and report "
+        "the CPU time spent with and without throttling."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--attempts", type=int, default=50)
+        parser.add_argument("--usernames", type=int, default=5, help="Distinct usernames attacked.")
+
+    def handle(self, *args, attempts=50, usernames=5, **options):
+        with transaction.atomic():
+            targets = [f"bench_target_{i}" for i in range(usernames)]
+            for name in targets:
+                User.objects.create_user(name, password="correct horse battery staple")
+
+            with override_settings(ALLOWED_HOSTS=["*"]):
+                for label, enabled in [("unthrottled", False), ("throttled", True)]:
+                    cache.clear()
+                    with override_settings(THROTTLE_ENABLED=enabled):
+                        self.report(label, self.attack(targets, attempts))
+
+            transaction.set_rollback(True)
+
+    def attack(self, targets, attempts):
+        # Every rejected attempt would otherwise log a "Too Many Requests" warning.
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+        client = Client()
+        statuses = {}
+        wall, cpu = time.perf_counter(), time.process_time()
+        for i in range(attempts):
+            response = client.post("/accounts/login/", {
+                "username": targets[i % len(targets)],
+                "password": f"guess-{i}",
+            }, REMOTE_ADDR="203.0.113.7")
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return time.perf_counter() - wall, time.process_time() - cpu, statuses
+
+    def report(self, label, result):
+        wall, cpu, statuses = result
+        rejected = statuses.get(429, 0)
+        self.stdout.write(
+            f"{label:<12} wall {wall:6.2f}s  cpu {cpu:6.2f}s  "
+            f"hashed {sum(statuses.values()) - rejected}  rejected {rejected}"
+        )
@@ -1,7 +1,11 @@
+import logging
+
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from datetime import date
 
+logger = logging.getLogger(__name__)
+
 class UserProfile(models.Model):
     ROLE_CHOICES = [
         ('customer', 'Customer'),
@@ -32,3 +36,51 @@ class UserProfile(models.Model):
         fields = [self.profile_image, self.dob, self.phone, self.address]
         filled = sum(1 for f in fields if f)
         return int((filled / len(fields)) * 100)
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+class NormalizedEmail(models.Model):
+    """Lower-cased copy of ``User.email`` with a unique index.
+
+    ``auth_user.email`` has neither, so looking users up by email scans the
+    table and two concurrent signups can both pass an ``exists()`` check.
+    Rows are kept in step with ``User`` by a post_save signal (see
+    ``AccountsConfig.ready``); ``manage.py backfill_normalized_emails`` fills
+    them in for existing users.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='normalized_email')
+    email = models.CharField(max_length=254, unique=True)
+
+    def __str__(self):
+        return self.email
+
+    @classmethod
+    def sync(cls, user, created=False):
+        """Keep ``user``'s row in step with ``user.email``.
+
+        A new user or a changed address that someone else already has raises
+        ``IntegrityError``; that is how signups and profile updates lose races.
+        Existing users without a row were skipped by the backfill because their
+        address was shared. Saving them for other reasons only logs the conflict.
+        """
+        email = normalize_email(user.email)
+        if not email:
+            cls.objects.filter(user=user).delete()
+            return
+        if created:
+            cls.objects.create(user=user, email=email)
+            return
+        row = cls.objects.filter(user=user).first()
+        if row is not None:
+            if row.email != email:
+                row.email = email
+                row.save(update_fields=['email'])
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(user=user, email=email)
+        except IntegrityError:
+            logger.warning("User %s shares the email %s with another account; left unindexed.", user.pk, email)
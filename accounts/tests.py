@@ -1,3 +1,288 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts import throttle
+from accounts.models import NormalizedEmail, UserProfile
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    THROTTLE_RATES={"login_ip": (3, 60), "login_username": (2, 300), "register_ip": (2, 3600)},
+)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user("alice", password="secret")
+
+    def test_sliding_window_weights_previous_window(self):
+        for _ in range(3):
+            self.assertEqual(throttle.hit("login_ip", "1.2.3.4", now=59.0), 0)
+        self.assertGreater(throttle.hit("login_ip", "1.2.3.4", now=59.5), 0)
+        # Halfway into the next window the previous 3 attempts count as 1.5.
+        self.assertEqual(throttle.hit("login_ip", "1.2.3.4", now=90.0), 0)
+        self.assertEqual(throttle.hit("login_ip", "1.2.3.4", now=90.0), 0)
+        self.assertGreater(throttle.hit("login_ip", "1.2.3.4", now=90.0), 0)
+
+    def test_rejects_before_hashing(self):
+        for _ in range(2):
+            self.client.post("/accounts/login/", {"username": "alice", "password": "wrong"})
+
+        with mock.patch("accounts.views.authenticate") as authenticate:
+            response = self.client.post("/accounts/login/", {"username": "ALICE", "password": "wrong"})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        authenticate.assert_not_called()
+        self.assertEqual(throttle.metrics()["login_username"], {"allowed": 2, "rejected": 1})
+
+    def test_ip_limit_spans_usernames(self):
+        for name in ["a", "b", "c"]:
+            self.client.post("/accounts/login/", {"username": name, "password": "x"})
+        response = self.client.post("/accounts/login/", {"username": "d", "password": "x"})
+        self.assertEqual(response.status_code, 429)
+
+    def test_client_ip_behind_trusted_proxies(self):
+        from django.test import RequestFactory
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="6.6.6.6, 1.2.3.4, 10.0.0.2")
+        self.assertEqual(throttle.client_ip(request), "10.0.0.1")  # not trusted by default
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            self.assertEqual(throttle.client_ip(request), "10.0.0.2")
+        with override_settings(TRUSTED_PROXY_COUNT=2):
+            self.assertEqual(throttle.client_ip(request), "1.2.3.4")
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_clients_behind_the_proxy_get_their_own_bucket(self):
+        for _ in range(3):
+            self.client.post("/accounts/login/", {"username": "x", "password": "x"},
+                             REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.2.3.4")
+        blocked = self.client.post("/accounts/login/", {"username": "y", "password": "x"},
+                                   REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.2.3.4")
+        other = self.client.post("/accounts/login/", {"username": "z", "password": "x"},
+                                 REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="5.6.7.8")
+        self.assertEqual(blocked.status_code, 429)
+        self.assertNotEqual(other.status_code, 429)
+
+    def test_register_is_throttled_per_ip(self):
+        for i in range(2):
+            self.client.post("/accounts/register/", {"username": f"u{i}", "email": f"u{i}@example.com",
+                                                     "password1": "pw", "password2": "pw"})
+        response = self.client.post("/accounts/register/", {"username": "u9", "email": "u9@example.com",
+                                                            "password1": "pw", "password2": "pw"})
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(User.objects.filter(username="u9").exists())
+
+    @override_settings(THROTTLE_ENABLED=False)
+    def test_can_be_disabled(self):
+        for _ in range(5):
+            response = self.client.post("/accounts/login/", {"username": "alice", "password": "wrong"})
+        self.assertEqual(response.status_code, 200)
+
+
+class CachedUserProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("alice", password="secret")
+        UserProfile.objects.create(user=self.user, phone="123")
+        self.client.force_login(self.user)
+
+    def test_profile_page_query_count(self):
+        # Session row + one joined User/UserProfile query.
+        with self.assertNumQueries(2):
+            response = self.client.get("/accounts/edit/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["user"].userprofile.phone, "123")
+
+        # Later requests get the pair from the cache.
+        with self.assertNumQueries(1):
+            self.client.get("/accounts/edit/")
+        with self.assertNumQueries(1):
+            self.client.get("/")
+
+    def test_profile_update_invalidates_cache(self):
+        self.client.get("/")
+        response = self.client.patch(
+            "/accounts/profile/", {"phone": "999", "address": "Here"}, content_type="application/json"
+        )
+        self.assertTrue(response.json()["success"])
+
+        response = self.client.get("/accounts/edit/")
+        self.assertEqual(response.context["user"].userprofile.phone, "999")
+
+    def test_sessions_from_the_plain_model_backend_stay_logged_in(self):
+        session = self.client.session
+        session["_auth_user_backend"] = "django.contrib.auth.backends.ModelBackend"
+        session.save()
+        response = self.client.get("/accounts/edit/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["user"], self.user)
+
+    def test_failed_login_hashes_the_password_once(self):
+        self.client.logout()
+        with mock.patch.object(User, "check_password", autospec=True, return_value=False) as check:
+            self.client.post("/accounts/login/", {"username": "alice", "password": "wrong"})
+        self.assertEqual(check.call_count, 1)
+
+    def test_password_change_logs_out_other_sessions(self):
+        other = self.client_class()
+        other.force_login(self.user)
+        other.get("/")
+
+        self.user.set_password("new-secret")
+        self.user.save()
+
+        response = other.get("/accounts/edit/")
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class UpdateProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("alice", email="alice@example.com", password="secret")
+        UserProfile.objects.create(user=self.user, phone="123")
+        User.objects.create_user("bob", email="bob@example.com")
+        self.client.force_login(self.user)
+
+    def patch(self, data):
+        return self.client.patch("/accounts/profile/", data, content_type="application/json")
+
+    def test_null_dob_clears_it(self):
+        UserProfile.objects.filter(user=self.user).update(dob="1990-05-01")
+        response = self.patch({"dob": None})
+        self.assertEqual(response.json()["updated"], ["dob"])
+        self.user.userprofile.refresh_from_db()
+        self.assertIsNone(self.user.userprofile.dob)
+
+    def test_rejects_non_string_values(self):
+        for data in ({"username": 5}, {"email": None}, {"email": ["a@b.c"]}, {"phone": 98},
+                     {"new_password1": 1, "new_password2": 1}):
+            response = self.patch(data)
+            self.assertEqual(response.status_code, 400, data)
+            self.assertEqual(set(response.json()["errors"]), set(data))
+        self.assertEqual(self.patch({"phone": None}).status_code, 200)
+
+    def test_updates_everything_in_one_request(self):
+        response = self.patch({
+            "username": "alice2", "email": "a2@example.com", "phone": "9800000000",
+            "address": "Kathmandu", "dob": "1990-05-01",
+            "old_password": "secret", "new_password1": "n3w", "new_password2": "n3w",
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["updated"],
+            ["address", "dob", "email", "password", "phone", "username"],
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.username, "alice2")
+        self.assertTrue(self.user.check_password("n3w"))
+        self.assertEqual(self.user.userprofile.address, "Kathmandu")
+        # The session survives the password change.
+        self.assertEqual(self.client.get("/accounts/edit/").status_code, 200)
+
+    def test_writes_only_changed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.patch({"username": "alice", "phone": "555"})
+        updates = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"phone"', updates[0])
+        self.assertNotIn('"address"', updates[0])
+
+    def test_uniqueness_is_one_query_and_nothing_is_saved_on_error(self):
+        self.client.get("/")  # load the request user into the cache first
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch({"username": "bob", "email": "bob@example.com", "phone": "777"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], {
+            "username": "Username already taken",
+            "email": "Email already registered",
+        })
+        selects = [q for q in queries.captured_queries if 'FROM "auth_user"' in q["sql"] and "SELECT" in q["sql"]]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(UserProfile.objects.get(user=self.user).phone, "123")
+
+    def test_wrong_current_password(self):
+        response = self.patch({"old_password": "nope", "new_password1": "x", "new_password2": "x"})
+        self.assertEqual(response.json()["errors"], {"password": "Incorrect current password"})
+
+    def test_photo_upload_uses_multipart_post(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media):
+            response = self.client.post("/accounts/profile/", {
+                "profile_image": SimpleUploadedFile("me.png", b"png-bytes", content_type="image/png"),
+            })
+        self.assertEqual(response.json()["updated"], ["profile_image"])
+        self.assertTrue(UserProfile.objects.get(user=self.user).profile_image)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"], THROTTLE_ENABLED=False)
+class NormalizedEmailTests(TestCase):
+    def register(self, username, email):
+        return self.client.post("/accounts/register/", {
+            "username": username, "email": email, "password1": "pw", "password2": "pw",
+        }).json()
+
+    def test_kept_in_step_with_user(self):
+        user = User.objects.create_user("alice", email=" Alice@Example.com ")
+        self.assertEqual(user.normalized_email.email, "alice@example.com")
+
+        user.email = "new@example.com"
+        user.save()
+        self.assertEqual(NormalizedEmail.objects.get(user=user).email, "new@example.com")
+
+        user.email = ""
+        user.save()
+        self.assertFalse(NormalizedEmail.objects.filter(user=user).exists())
+
+    def test_registration_is_case_insensitive(self):
+        self.assertTrue(self.register("alice", "alice@example.com")["success"])
+        self.assertEqual(self.register("bob", "ALICE@example.com")["error"], "Email already registered")
+
+    def test_constraint_settles_races(self):
+        User.objects.create_user("alice", email="alice@example.com")
+        # Pretend the probe missed the other signup.
+        with mock.patch("accounts.views.taken_fields", side_effect=[set(), {"email"}]):
+            result = self.register("bob", "alice@example.com")
+        self.assertEqual(result["error"], "Email already registered")
+        self.assertFalse(User.objects.filter(username="bob").exists())
+
+    def test_saving_a_user_the_backfill_skipped_does_not_fail(self):
+        User.objects.create_user("alice", email="alice@example.com")
+        User.objects.bulk_create([User(username="alice2", email="Alice@example.com")])
+        legacy = User.objects.get(username="alice2")
+
+        legacy.first_name = "Alice"
+        with self.assertLogs("accounts.models", "WARNING"):
+            legacy.save()
+        self.assertFalse(NormalizedEmail.objects.filter(user=legacy).exists())
+
+        # A user who has a row still can't move onto a taken address.
+        bob = User.objects.create_user("bob", email="bob@example.com")
+        bob.email = "ALICE@example.com"
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            bob.save()
+
+    def test_backfill(self):
+        for i, email in enumerate(["a@example.com", "A@example.com", "b@example.com", ""]):
+            User.objects.bulk_create([User(username=f"user{i}", email=email)])
+        out = io.StringIO()
+        call_command("backfill_normalized_emails", "--batch-size=2", stdout=out)
+
+        self.assertEqual(
+            sorted(NormalizedEmail.objects.values_list("email", flat=True)),
+            ["a@example.com", "b@example.com"],
+        )
+        self.assertIn("Created 2", out.getvalue())
+        self.assertIn("1 user(s) share an email", out.getvalue())
@@ -0,0 +1,143 @@
+"""
+Throttling for the password-hashing endpoints (login and registration).
+
+Every attempt is counted against a sliding window per client IP and per
+username before the view runs, so a credential-stuffing burst is rejected
+without paying for a PBKDF2 hash. Counters live in the default cache; use a
+shared backend (Redis/Memcached) when running more than one process.
+
+Limits are ``THROTTLE_RATES = {scope: (attempts, seconds)}`` in settings, where
+scope is ``"<name>_ip"`` or ``"<name>_username"``.
+
+Behind reverse proxies every request comes from the proxy's address. Set
+``TRUSTED_PROXY_COUNT`` to the number of proxies in front of the app and the
+client IP is read from ``X-Forwarded-For`` instead: the entry added by the
+outermost trusted proxy. Entries to its left are client-supplied and
+ignored. Leave it at 0 when clients can reach the app directly, or they
+could pick their own bucket.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+DEFAULT_RATES = {
+    "login_ip": (20, 60),
+    "login_username": (5, 300),
+    "register_ip": (10, 3600),
+}
+
+METRICS_KEY = "throttle:metrics:{scope}:{outcome}"
+
+
+def rates():
+    return getattr(settings, "THROTTLE_RATES", DEFAULT_RATES)
+
+
+def client_ip(request):
+    proxies = getattr(settings, "TRUSTED_PROXY_COUNT", 0)
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if hops:
+            return hops[-min(proxies, len(hops))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _key(scope, ident, window):
+    digest = hashlib.sha256(ident.encode("utf-8")).hexdigest()[:32]
+    return f"throttle:{scope}:{digest}:{window}"
+
+
+def _incr(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=timeout):
+            return 1
+        return cache.incr(key)
+
+
+def hit(scope, ident, now=None):
+    """Count one attempt; return ``0`` if allowed, else seconds until retry.
+
+    Uses the sliding-window approximation: the previous fixed window's count
+    is weighted by how much of it still overlaps the sliding window.
+    """
+    rate = rates().get(scope)
+    if not rate or not ident:
+        return 0
+    limit, period = rate
+    now = time.time() if now is None else now
+    window = int(now // period)
+    current_key, previous_key = _key(scope, ident, window), _key(scope, ident, window - 1)
+
+    counts = cache.get_many([current_key, previous_key])
+    elapsed = (now % period) / period
+    estimate = counts.get(previous_key, 0) * (1 - elapsed) + counts.get(current_key, 0)
+    if estimate >= limit:
+        return max(1, math.ceil(period - now % period))
+
+    _incr(current_key, timeout=period * 2)
+    return 0
+
+
+def record(scope, outcome):
+    _incr(METRICS_KEY.format(scope=scope, outcome=outcome), timeout=None)
+
+
+def metrics():
+    """``{scope: {"allowed": n, "rejected": n}}`` since the cache was last cleared."""
+    keys = {
+        (scope, outcome): METRICS_KEY.format(scope=scope, outcome=outcome)
+        for scope in rates()
+        for outcome in ("allowed", "rejected")
+    }
+    values = cache.get_many(list(keys.values()))
+    result = {}
+    for (scope, outcome), key in keys.items():
+        result.setdefault(scope, {})[outcome] = values.get(key, 0)
+    return result
+
+
+def check(request, name):
+    """Count a POST against the ``<name>_ip`` and ``<name>_username`` limits.
+
+    Returns seconds to wait, or ``0`` if the attempt may proceed.
+    """
+    checks = [
+        (f"{name}_ip", client_ip(request)),
+        (f"{name}_username", (request.POST.get("username") or "").strip().lower()),
+    ]
+    for scope, ident in checks:
+        if scope not in rates():
+            continue
+        retry_after = hit(scope, ident)
+        if retry_after:
+            record(scope, "rejected")
+            return retry_after
+        record(scope, "allowed")
+    return 0
+
+
+def throttled(name):
+    """Reject POSTs over the ``name`` limits with a 429 before the view runs."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == "POST" and getattr(settings, "THROTTLE_ENABLED", True):
+                retry_after = check(request, name)
+                if retry_after:
+                    response = JsonResponse(
+                        {"success": False, "error": "Too many attempts. Please try again later."},
+                        status=429,
+                    )
+                    response["Retry-After"] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
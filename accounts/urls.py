@@ -7,10 +7,7 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('login/', views.login_user, name='login'),
     path('edit/', views.edit_profile, name='edit_profile'),
-    path('update/username/', views.update_username, name='update_username'),
-    path('update/email/', views.update_email, name='update_email'),
-    path('update/photo/', views.update_photo, name='update_photo'),
-    path('update/password/', views.update_password, name='update_password'),
-    path('update/details/', views.update_details, name='update_details'),
+    path('profile/', views.update_profile, name='update_profile'),
+    path('throttle/metrics/', views.throttle_metrics, name='throttle_metrics'),
 
 ]
\ No newline at end of file
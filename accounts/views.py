@@ -1,17 +1,47 @@
 # accounts/views.py
-import os
-from django.conf import settings
+import json
 from django.contrib.auth.forms import UserCreationForm, User
 from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.contrib.auth import authenticate, login
-from .models import UserProfile
+from django.contrib.auth import authenticate, login, update_session_auth_hash
+from .models import NormalizedEmail, UserProfile, normalize_email
 from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.db.models import CharField, Value
+from django.utils.dateparse import parse_date
 from .forms import ProfileEditForm
+from .throttle import throttled
+from . import throttle
+
+
+def taken_fields(username=None, email=None, exclude_user=None):
+    """Return which of ``username``/``email`` already belong to another user.
+
+    Both are unique-index probes (``auth_user.username`` and
+    ``NormalizedEmail.email``), sent as one UNION query.
+    """
+    probes = []
+    if username is not None:
+        probes.append(User.objects.filter(username=username).annotate(
+            taken=Value('username', output_field=CharField())))
+    if email:
+        probes.append(NormalizedEmail.objects.filter(email=normalize_email(email)).annotate(
+            taken=Value('email', output_field=CharField())))
+    if not probes:
+        return set()
+    if exclude_user is not None:
+        probes = [
+            probe.exclude(pk=exclude_user.pk) if probe.model is User else probe.exclude(user=exclude_user)
+            for probe in probes
+        ]
+    probes = [probe.values_list('taken', flat=True) for probe in probes]
+    query = probes[0].union(*probes[1:], all=True) if len(probes) > 1 else probes[0]
+    return set(query)
 
 
 @csrf_exempt
+@throttled('register')
 def register(request):
     if request.method == 'POST':
         username = request.POST.get('username')
@@ -22,21 +52,29 @@ def register(request):
         if password1 != password2:
             return JsonResponse({'success': False, 'error': 'Passwords do not match'})
 
-        if User.objects.filter(username=username).exists():
+        taken = taken_fields(username=username, email=email)
+        if 'username' in taken:
             return JsonResponse({'success': False, 'error': 'Username already taken'})
-        
-        if User.objects.filter(email=email).exists():
+        if 'email' in taken:
             return JsonResponse({'success': False, 'error': 'Email already registered'})
 
-
-        user = User.objects.create_user(username=username, email=email, password=password1)
-        UserProfile.objects.create(user=user, role='customer')  
+        # A concurrent signup can still slip past the probe; the unique indexes
+        # on username and NormalizedEmail.email decide who wins.
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(username=username, email=email, password=password1)
+                UserProfile.objects.create(user=user, role='customer')
+        except IntegrityError:
+            if 'email' in taken_fields(email=email):
+                return JsonResponse({'success': False, 'error': 'Email already registered'})
+            return JsonResponse({'success': False, 'error': 'Username already taken'})
 
         return JsonResponse({'success': True})
     
 
 
 @csrf_exempt
+@throttled('login')
 def login_user(request):
     if request.method == 'POST':
         username = request.POST.get('username')
@@ -69,91 +107,136 @@ def edit_profile(request):
     return render(request, 'accounts/edit_profile.html', {'form': form})
 
 
-@csrf_exempt
-@login_required
-def update_username(request):
-    if request.method == 'POST':
-        new_username = request.POST.get('username')
-        if User.objects.filter(username=new_username).exclude(id=request.user.id).exists():
-            return JsonResponse({'success': False, 'error': 'Username already taken'})
-        request.user.username = new_username
-        request.user.save()
-        return JsonResponse({'success': True})
+PROFILE_DETAIL_FIELDS = ('phone', 'address')
+TEXT_FIELDS = ('username', 'email', 'old_password', 'new_password1', 'new_password2')
 
 
-@csrf_exempt
 @login_required
-def update_email(request):
-    if request.method == 'POST':
-        new_email = request.POST.get('email')
-        if User.objects.filter(email=new_email).exclude(id=request.user.id).exists():
-            return JsonResponse({'success': False, 'error': 'Email already registered'})
-        request.user.email = new_email
-        request.user.save()
-        return JsonResponse({'success': True})
-
-@csrf_exempt
-@login_required
-def update_photo(request):
-    if request.method == 'POST' and request.FILES.get('profile_image'):
-        profile = request.user.userprofile
-
-        # Delete old image if it exists and isn't the default
-        if profile.profile_image and profile.profile_image.name != 'images/default-avatar.png':
-            old_path = os.path.join(settings.MEDIA_ROOT, profile.profile_image.name)
-            if os.path.isfile(old_path):
-                os.remove(old_path)
-
-        # Save new image
-        profile.profile_image = request.FILES['profile_image']
-        profile.save()
-
-        return JsonResponse({'success': True})
-
-    return JsonResponse({'success': False, 'error': 'No image uploaded'})
-
-
-
-
-
-from django.contrib.auth import update_session_auth_hash
-
-@csrf_exempt
-@login_required
-def update_password(request):
-    if request.method == 'POST':
-        old = request.POST.get('old_password')
-        new1 = request.POST.get('new_password1')
-        new2 = request.POST.get('new_password2')
-
-        if not request.user.check_password(old):
-            return JsonResponse({'success': False, 'error': 'Incorrect current password'})
-
-        if new1 != new2:
-            return JsonResponse({'success': False, 'error': 'New passwords do not match'})
-
-        request.user.set_password(new1)
-        request.user.save()
-        update_session_auth_hash(request, request.user)
-        return JsonResponse({'success': True})
-    
+def update_profile(request):
+    """Update any mix of username, email, password, photo and details in one request.
+
+    Accepts a JSON PATCH, or a multipart POST when a new ``profile_image`` is
+    uploaded. Every changed field is validated before anything is written, the
+    username/email uniqueness checks share one query, and User and UserProfile
+    are saved in one transaction with only the changed columns.
+    """
+    if request.method == 'PATCH':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+        files = {}
+    elif request.method == 'POST':
+        data, files = request.POST.dict(), request.FILES
+    else:
+        return JsonResponse({'success': False, 'error': 'Invalid request'}, status=405)
+    if not isinstance(data, dict):
+        return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
+    # JSON values can be any type. Everything here is text; details and dob may also be null to clear them.
+    wrong_type = {}
+    for field in TEXT_FIELDS + PROFILE_DETAIL_FIELDS + ('dob',):
+        value = data.get(field, '')
+        if not isinstance(value, str) and (value is not None or field in TEXT_FIELDS):
+            wrong_type[field] = 'Must be a string'
+    if wrong_type:
+        return JsonResponse({
+            'success': False,
+            'error': next(iter(wrong_type.values())),
+            'errors': wrong_type,
+        }, status=400)
+
+    user = request.user
+    try:
+        profile = user.userprofile
+    except UserProfile.DoesNotExist:
+        profile = UserProfile(user=user)
+
+    errors = {}
+    user_changes, profile_changes = {}, {}
+
+    username = data.get('username')
+    if username is not None and username != user.username:
+        if not username.strip():
+            errors['username'] = 'Username cannot be empty'
+        else:
+            user_changes['username'] = username
+
+    email = data.get('email')
+    if email is not None and email != user.email:
+        user_changes['email'] = email
+
+    if user_changes:
+        taken = taken_fields(
+            username=user_changes.get('username'), email=user_changes.get('email'), exclude_user=user,
+        )
+        if 'username' in taken:
+            errors['username'] = 'Username already taken'
+        if 'email' in taken:
+            errors['email'] = 'Email already registered'
+
+    if 'dob' in data and data['dob'] is None:
+        if profile.dob is not None:
+            profile_changes['dob'] = None
+    elif data.get('dob'):
+        dob = parse_date(data['dob'])
+        if dob is None:
+            errors['dob'] = 'Invalid date of birth'
+        elif dob != profile.dob:
+            profile_changes['dob'] = dob
+    for field in PROFILE_DETAIL_FIELDS:
+        if field in data and (data[field] or '') != getattr(profile, field):
+            profile_changes[field] = data[field] or ''
+
+    if files.get('profile_image'):
+        profile_changes['profile_image'] = files['profile_image']
+
+    new_password = None
+    if data.get('new_password1') or data.get('new_password2'):
+        if data.get('new_password1') != data.get('new_password2'):
+            errors['password'] = 'New passwords do not match'
+        elif not errors:
+            # Checked last so a request that fails anyway never pays for the hash.
+            if user.check_password(data.get('old_password') or ''):
+                new_password = data['new_password1']
+            else:
+                errors['password'] = 'Incorrect current password'
+
+    if errors:
+        return JsonResponse({
+            'success': False,
+            'error': next(iter(errors.values())),
+            'errors': errors,
+        }, status=400)
+
+    try:
+        with transaction.atomic():
+            user_fields = list(user_changes)
+            for field, value in user_changes.items():
+                setattr(user, field, value)
+            if new_password is not None:
+                user.set_password(new_password)
+                user_fields.append('password')
+            if user_fields:
+                user.save(update_fields=user_fields)
+
+            for field, value in profile_changes.items():
+                setattr(profile, field, value)
+            if profile._state.adding:
+                profile.save()
+            elif profile_changes:
+                profile.save(update_fields=list(profile_changes))
+    except IntegrityError:
+        # Lost a race with another account claiming the same username/email.
+        return JsonResponse({'success': False, 'error': 'Username or email already taken'}, status=409)
+
+    if new_password is not None:
+        update_session_auth_hash(request, user)
+
+    return JsonResponse({'success': True, 'updated': sorted(user_fields + list(profile_changes))})
 
 
-@csrf_exempt
 @login_required
-def update_details(request):
-    if request.method == 'POST':
-        profile = request.user.userprofile
-        dob = request.POST.get('dob')
-        phone = request.POST.get('phone')
-        address = request.POST.get('address')
-
-        if dob:
-            profile.dob = dob
-        profile.phone = phone
-        profile.address = address
-        profile.save()
-
-        return JsonResponse({'success': True})
-
-    return JsonResponse({'success': False, 'error': 'Invalid request'})
+def throttle_metrics(request):
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Forbidden'}, status=403)
+    return JsonResponse({'success': True, 'metrics': throttle.metrics()})
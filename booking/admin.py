@@ -1,5 +1,14 @@
 from django.contrib import admin
-from .models import Room, Booking, RoomImage
+from django.db import transaction
+from django.utils import timezone
+
+from core import events, states
+from menu.models import ArchivedOrder
+from .models import (
+    LIVE_STATUSES, Room, Booking, BookingStatus, RoomImage, HousekeepingTask, WaitlistEntry, RateSuggestion,
+    ArchivedBooking,
+)
+from . import waitlist
 
 # Inline image uploader for Room
 class RoomImageInline(admin.TabularInline):
@@ -10,11 +19,11 @@ class RoomImageInline(admin.TabularInline):
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
     inlines = [RoomImageInline]
-    list_display = ["name", "price", "capacity","bedrooms", "bathrooms", "size", "security_level"]
+    list_display = ["name", "room_type", "price", "capacity","bedrooms", "bathrooms", "size", "security_level"]
     search_fields = ["name", "amenities"]
-    list_filter = ["capacity", "bedrooms", "bathrooms", "security_level"]
+    list_filter = ["room_type", "capacity", "bedrooms", "bathrooms", "security_level"]
     fields = [
-        "name", "price", "capacity", "bedrooms", "bathrooms",
+        "name", "room_type", "price", "capacity", "bedrooms", "bathrooms",
         "size", "security_level", "amenities", "image", "image_url", "description"
     ]
 
@@ -25,9 +34,104 @@ class BookingAdmin(admin.ModelAdmin):
     list_filter = ["status", "check_in", "room"]
     search_fields = ["guest_name", "room__name"]
     readonly_fields = ["total_price"]
-    actions = ["mark_as_checked_in"]
+    actions = ["mark_as_checked_in", "cancel_bookings"]
 
     def mark_as_checked_in(self, request, queryset):
-        updated = queryset.update(status="checked_in")
-        self.message_user(request, f"{updated} booking(s) marked as checked in.")
+        updated = self._set_status(request, queryset, BookingStatus.CHECKED_IN, "admin.mark_as_checked_in")
+        self.message_user(request, f"{len(updated)} booking(s) marked as checked in.")
     mark_as_checked_in.short_description = "✅ Mark selected bookings as checked in"
+
+    def cancel_bookings(self, request, queryset):
+        updated = self._set_status(request, queryset, BookingStatus.CANCELLED, "admin.cancel_bookings")
+        # update() skips the save signals, so hand the freed nights to the waitlist here.
+        freed = Booking.objects.filter(
+            id__in=[pk for pk, previous in updated if previous in LIVE_STATUSES]
+        ).values_list("room_id", "check_in", "check_out")
+        promoted = sum(len(waitlist.promote(*span)) for span in freed)
+        self.message_user(request, f"{len(updated)} booking(s) cancelled, {promoted} waitlisted guest(s) booked.")
+    cancel_bookings.short_description = "❌ Cancel selected bookings and promote the waitlist"
+
+    def _set_status(self, request, queryset, status, source):
+        # One UPDATE plus one bulk insert of events, in a transaction. Rows that
+        # may not move to `status` (core/states.py) are left alone.
+        with transaction.atomic():
+            rows = list(queryset.select_for_update().filter(
+                status__in=states.sources(Booking, status)
+            ).values_list("id", "status"))
+            now = timezone.now()
+            Booking.objects.filter(id__in=[pk for pk, _ in rows]).update(status=status, updated_at=now)
+            events.record_transitions("booking", rows, status, source=source, actor=request.user, when=now)
+        return rows
+
+
+class ArchivedOrderInline(admin.TabularInline):
+    model = ArchivedOrder
+    fields = ["item", "quantity", "status", "ordered_at"]
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    # Stays moved out of Booking by booking/archive.py; same search as the live list.
+    inlines = [ArchivedOrderInline]
+    list_display = ["id", "guest_name", "room", "check_in", "check_out", "status", "total_price", "archived_at"]
+    list_filter = ["status", "room"]
+    list_select_related = ["room"]
+    search_fields = ["guest_name", "room__name", "=id"]
+    date_hierarchy = "check_in"
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(HousekeepingTask)
+class HousekeepingTaskAdmin(admin.ModelAdmin):
+    list_display = ["room", "date", "priority", "vacated_at", "ready_by", "assigned_to", "scheduled_start", "status"]
+    list_filter = ["status", "date"]
+    list_select_related = ["room", "assigned_to"]
+    raw_id_fields = ["booking", "next_booking"]
+    ordering = ["date", "priority"]
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ["user", "room", "check_in", "check_out", "status", "created_at"]
+    list_filter = ["status"]
+    list_select_related = ["user", "room"]
+    search_fields = ["user__username", "room__name"]
+    raw_id_fields = ["booking"]
+
+
+@admin.register(RateSuggestion)
+class RateSuggestionAdmin(admin.ModelAdmin):
+    list_display = ["room_type", "date", "rooms", "on_books", "forecast_occupancy", "factor", "status", "reviewed_by"]
+    list_filter = ["status", "room_type"]
+    date_hierarchy = "date"
+    ordering = ["date", "room_type"]
+    readonly_fields = ["rooms", "on_books", "forecast_occupancy", "generated_at", "reviewed_by"]
+    actions = ["approve", "reject"]
+
+    def get_readonly_fields(self, request, obj=None):
+        # Approved rows are live on the channel feed; a factor is only edited while it awaits review.
+        if obj is not None and obj.status != "pending":
+            return self.readonly_fields + ["factor"]
+        return self.readonly_fields
+
+    def approve(self, request, queryset):
+        updated = queryset.update(status="approved", reviewed_by=request.user)
+        self.message_user(request, f"{updated} nightly rate(s) approved and published to the channel feed.")
+    approve.short_description = "✅ Approve selected rates"
+
+    def reject(self, request, queryset):
+        updated = queryset.update(status="rejected", reviewed_by=request.user)
+        self.message_user(request, f"{updated} nightly rate(s) rejected; rooms keep their base price.")
+    reject.short_description = "❌ Reject selected rates"
@@ -0,0 +1,105 @@
+"""
+Hot/cold archival of finished stays.
+
+``Booking`` and ``Order`` only grow, so years of completed stays share the
+tables and indexes that tonight's availability checks and the admin lists
+read. ``archive()`` is the batch job (``manage.py archive_bookings``). It
+moves completed bookings that checked out more than ``ARCHIVE_AFTER_DAYS``
+ago into ``ArchivedBooking``, and their orders into ``menu.ArchivedOrder``.
+Rows keep their ids, so the event log (core/events.py) and anything else
+holding an id can still find them.
+
+Foreign keys stay intact:
+
+- ``Order.booking`` cascades. Orders therefore move with their booking,
+  and ``ArchivedOrder.booking`` points at the archived copy. A booking
+  with an order that isn't delivered yet stays hot.
+- Reviews belong to a room and a guest, not to a booking, so they are not
+  touched.
+- Deleting the hot row does the usual cascades. The stay's housekeeping
+  task goes with it, and a waitlist entry that was promoted into it keeps
+  its status but loses the link (``SET_NULL``).
+
+The job works in chunks of ``ARCHIVE_CHUNK_SIZE`` bookings, each in its own
+transaction. A chunk locks its bookings and copies them and their orders
+with two ``bulk_create`` calls. It then deletes the orders, then the
+bookings. A failure rolls back only the chunk in progress, and a rerun
+carries on from there. Chunks walk the table by id (keyset), so each one
+starts where the last ended.
+
+Reading through: ``read_through(fields, **filters)`` returns matching rows
+from both tables as one ``UNION ALL`` query. The pricing job
+(booking/pricing.py) reads its history this way. The admin lists the
+archive read-only next to the live tables.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from booking.models import ArchivedBooking, Booking, BookingStatus
+from menu.models import ArchivedOrder, Order, OrderStatus
+
+BOOKING_FIELDS = [field.attname for field in Booking._meta.concrete_fields]
+ORDER_FIELDS = [field.attname for field in Order._meta.concrete_fields]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def cutoff(now=None):
+    """Stays that checked out before this are archived."""
+    return (now or timezone.now()) - timedelta(days=_setting("ARCHIVE_AFTER_DAYS", 365))
+
+
+def candidates(before):
+    """Completed bookings that checked out before ``before`` and have no open orders."""
+    open_orders = Order.objects.filter(booking=OuterRef("pk")).exclude(status=OrderStatus.DELIVERED)
+    return Booking.objects.filter(
+        status=BookingStatus.COMPLETED, check_out__lt=before,
+    ).exclude(Exists(open_orders))
+
+
+@transaction.atomic
+def archive_chunk(before, after_id, size, now):
+    """Move the next ``size`` candidates with ids above ``after_id``; returns ``(last id, bookings, orders)``."""
+    bookings = list(
+        candidates(before).filter(id__gt=after_id).order_by("id").select_for_update().values(*BOOKING_FIELDS)[:size]
+    )
+    if not bookings:
+        return None, 0, 0
+    ids = [row["id"] for row in bookings]
+    orders = list(Order.objects.filter(booking_id__in=ids).values(*ORDER_FIELDS))
+
+    ArchivedBooking.objects.bulk_create([ArchivedBooking(archived_at=now, **row) for row in bookings])
+    ArchivedOrder.objects.bulk_create([ArchivedOrder(archived_at=now, **row) for row in orders])
+    Order.objects.filter(id__in=[row["id"] for row in orders]).delete()
+    Booking.objects.filter(id__in=ids).delete()
+    return ids[-1], len(bookings), len(orders)
+
+
+def archive(before=None, chunk_size=None, max_chunks=None, now=None):
+    """Archive every candidate, one chunk per transaction; returns counts."""
+    now = now or timezone.now()
+    before = before or cutoff(now)
+    chunk_size = chunk_size or _setting("ARCHIVE_CHUNK_SIZE", 1000)
+    counts = {"bookings": 0, "orders": 0, "chunks": 0}
+    last_id = 0
+    while max_chunks is None or counts["chunks"] < max_chunks:
+        last_id, bookings, orders = archive_chunk(before, last_id, chunk_size, now)
+        if last_id is None:
+            break
+        counts["bookings"] += bookings
+        counts["orders"] += orders
+        counts["chunks"] += 1
+    return counts
+
+
+def read_through(fields, **filters):
+    """``values_list(*fields)`` of hot and archived bookings matching ``filters``, as one query."""
+    hot = Booking.objects.filter(**filters).values_list(*fields)
+    cold = ArchivedBooking.objects.filter(**filters).values_list(*fields)
+    return hot.union(cold, all=True)
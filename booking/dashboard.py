@@ -0,0 +1,73 @@
+"""
+Front-desk dashboard data.
+
+``snapshot()`` builds today's arrivals, departures, in-house guests and
+pending room-service orders, one indexed query per list (see the indexes on
+Booking and Order). ``changes()`` returns only the bookings and orders saved
+since a cursor, each with the lists it belongs in now (possibly none), so
+the page can move or drop rows instead of reloading. The cursor is stepped
+back by ``DELTA_OVERLAP`` so a row committed just after the previous poll
+began is not missed; re-sending a row is harmless.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from booking.models import IS_LIVE, LIVE_STATUSES, Booking, BookingStatus
+from menu.models import IS_OPEN, OPEN_ORDER_STATUSES, Order
+
+# Arrivals and orders read the partial indexes on Booking and Order (IS_LIVE, IS_OPEN)
+ARRIVAL_STATUSES = LIVE_STATUSES
+DEPARTURE_STATUSES = (BookingStatus.CHECKED_IN, BookingStatus.COMPLETED)
+PENDING_ORDER_STATUSES = OPEN_ORDER_STATUSES
+SECTIONS = ("arrivals", "departures", "in_house", "orders")
+DELTA_OVERLAP = timedelta(seconds=5)
+
+
+def day_bounds(now):
+    start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=1)
+
+
+def booking_sections(booking, start, end):
+    sections = []
+    if booking.status in ARRIVAL_STATUSES and start <= booking.check_in < end:
+        sections.append("arrivals")
+    if booking.status in DEPARTURE_STATUSES and start <= booking.check_out < end:
+        sections.append("departures")
+    if booking.status == BookingStatus.CHECKED_IN:
+        sections.append("in_house")
+    return sections
+
+
+def order_sections(order):
+    return ["orders"] if order.status in PENDING_ORDER_STATUSES else []
+
+
+def _orders():
+    return Order.objects.select_related("item", "booking__room", "user")
+
+
+def snapshot(now):
+    start, end = day_bounds(now)
+    bookings = Booking.objects.select_related("room")
+    return {
+        "arrivals": list(bookings.filter(
+            IS_LIVE, check_in__gte=start, check_in__lt=end,
+        ).order_by("check_in")),
+        "departures": list(bookings.filter(
+            status__in=DEPARTURE_STATUSES, check_out__gte=start, check_out__lt=end,
+        ).order_by("check_out")),
+        "in_house": list(bookings.filter(status=BookingStatus.CHECKED_IN).order_by("check_out")),
+        "orders": list(_orders().filter(IS_OPEN).order_by("ordered_at")),
+    }
+
+
+def changes(since, now):
+    """Yield ``(kind, obj, sections)`` for every booking/order saved since ``since``."""
+    start, end = day_bounds(now)
+    since = since - DELTA_OVERLAP
+    for booking in Booking.objects.select_related("room").filter(updated_at__gte=since).order_by("updated_at"):
+        yield "booking", booking, booking_sections(booking, start, end)
+    for order in _orders().filter(updated_at__gte=since).order_by("updated_at"):
+        yield "order", order, order_sections(order)
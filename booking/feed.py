@@ -0,0 +1,150 @@
+"""
+Availability and rate feed for channel managers.
+
+``lines(start, days)`` streams one row per room per night over the horizon:
+whether the room is free that night and its nightly rate (``Room.price``,
+times the approved ``RateSuggestion`` factor for its type, if any). This replaces
+polling ``check_availability`` once per room and date. Night ``D`` is taken
+when a confirmed or checked-in booking has a local check-in date on or
+before ``D`` and a check-out date after it; a same-day stay takes its
+check-in night.
+
+The rows come from a sweep-line. Rooms and the horizon's live bookings are
+read once each, both ordered by room, and merged as two streams. Each
+booking adds +1 on its first night and -1 after its last, and a running sum
+over the horizon marks the taken nights. That is three queries (rooms,
+bookings, approved rates) and O(rooms x days + bookings) work, whatever
+the number of rooms.
+
+Deltas: with ``since``, only rooms with a booking saved at or after
+``since`` are sent, each with its full horizon. Clients should pass back
+the ``X-Feed-Cursor`` header of the previous response. That cursor is
+stepped back by ``dashboard.DELTA_OVERLAP``, as on the front-desk
+dashboard. Deleted bookings and room price edits do not show up in deltas,
+so channel managers should still pull the full feed now and then (e.g.
+nightly).
+
+Under ASGI the view streams ``alines`` instead. Django would otherwise turn
+the sync generator into a list before sending the first byte. ``alines``
+pulls ``ASYNC_BATCH_ROOMS`` rooms per thread hop, so only that many are held
+in memory at a time.
+"""
+import csv
+import hmac
+import io
+from datetime import timedelta
+from itertools import islice
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from booking.dashboard import DELTA_OVERLAP
+from booking.housekeeping import day_bounds
+from booking.models import IS_LIVE, Booking, RateSuggestion, Room
+from core.db_router import PRIMARY
+
+FORMATS = ("jsonl", "csv")
+CSV_HEADER = ("room", "date", "available", "price")
+CENT = Decimal("0.01")
+ASYNC_BATCH_ROOMS = 20
+
+
+def token_ok(request):
+    """Machine clients authenticate with ``Authorization: Bearer <CHANNEL_FEED_TOKEN>``."""
+    token = getattr(settings, "CHANNEL_FEED_TOKEN", "")
+    header = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(header, f"Bearer {token}")
+
+
+def cursor(now):
+    return now - DELTA_OVERLAP
+
+
+def nights(room_bookings, start, days):
+    """Sweep one room's bookings into a taken/free flag per night of the horizon."""
+    delta = [0] * (days + 1)
+    for check_in, check_out in room_bookings:
+        first = (timezone.localdate(check_in) - start).days
+        last = max((timezone.localdate(check_out) - start).days, first + 1)
+        first, last = max(first, 0), min(last, days)
+        if first < last:
+            delta[first] += 1
+            delta[last] -= 1
+    taken, running = [], 0
+    for change in delta[:days]:
+        running += change
+        taken.append(running > 0)
+    return taken
+
+
+def approved_factors(start, days, using=PRIMARY):
+    """``{room_type: [rate factor per night]}`` from approved suggestions; 1 where none."""
+    factors = {}
+    for room_type, date, factor in RateSuggestion.objects.using(using).filter(
+        status="approved", date__gte=start, date__lt=start + timedelta(days=days),
+    ).values_list("room_type", "date", "factor"):
+        factors.setdefault(room_type, [None] * days)[(date - start).days] = factor
+    return factors
+
+
+def availability(start, days, since=None, using=PRIMARY):
+    """Yield ``(room_id, [rate per night], [taken per night])`` for each room, in id order."""
+    lo, hi = day_bounds(start)[0], day_bounds(start + timedelta(days=days))[0]
+    factors = approved_factors(start, days, using=using)
+    rooms = Room.objects.using(using).order_by("id").values_list("id", "price", "room_type")
+    bookings = Booking.objects.using(using).filter(IS_LIVE, check_in__lt=hi, check_out__gt=lo)
+    if since is not None:
+        changed = Booking.objects.using(using).filter(updated_at__gte=since).values("room_id")
+        rooms = rooms.filter(id__in=changed)
+        bookings = bookings.filter(room_id__in=changed)
+    bookings = bookings.order_by("room_id").values_list("room_id", "check_in", "check_out")
+
+    pending = bookings.iterator(chunk_size=2000)
+    current = next(pending, None)
+    for room_id, price, room_type in rooms.iterator(chunk_size=1000):
+        room_bookings = []
+        while current is not None and current[0] <= room_id:
+            if current[0] == room_id:
+                room_bookings.append(current[1:])
+            current = next(pending, None)
+        if room_type in factors:
+            rates = [price if f is None else (price * f).quantize(CENT) for f in factors[room_type]]
+        else:
+            rates = [price] * days
+        yield room_id, rates, nights(room_bookings, start, days)
+
+
+def lines(start, days, fmt="jsonl", since=None, using=PRIMARY):
+    """The feed as text chunks, one chunk per room."""
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    if fmt == "csv":
+        yield ",".join(CSV_HEADER) + "\r\n"
+    for room_id, rates, taken in availability(start, days, since=since, using=using):
+        if fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(
+                (room_id, date, "0" if busy else "1", rate) for date, rate, busy in zip(dates, rates, taken)
+            )
+            yield buffer.getvalue()
+        else:
+            # Every value is a number, an ISO date or a decimal string; formatting by hand
+            # is several times faster than json.dumps per row.
+            prefix = f'{{"room": {room_id}, "date": "'
+            yield "".join(
+                f'{prefix}{date}", "available": {"false" if busy else "true"}, "price": "{rate}"}}\n'
+                for date, rate, busy in zip(dates, rates, taken)
+            )
+
+
+async def alines(start, days, fmt="jsonl", since=None, using=PRIMARY):
+    """``lines`` as an async iterator. The queries stay in the request's thread-sensitive thread."""
+    chunks = lines(start, days, fmt=fmt, since=since, using=using)
+    take = sync_to_async(lambda: list(islice(chunks, ASYNC_BATCH_ROOMS)))
+    try:
+        while batch := await take():
+            for chunk in batch:
+                yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
@@ -0,0 +1,138 @@
+"""
+Housekeeping turnover queue.
+
+``build_queue(day)`` creates one ``HousekeepingTask`` for each booking that
+checks out on ``day``. A task's priority is the number of minutes until the
+room's next check-in, so the tightest turnovers come first. A room with no
+arrival within ``HOUSEKEEPING_LOOKAHEAD_DAYS`` gets the lowest priority.
+
+Departures and upcoming arrivals come from one query ordered by
+``(room, check_in)``, and a single pass pairs each departure with the room's
+next arrival. Pending tasks then go to workers (``UserProfile.role ==
+'worker'``) in priority order. Each task is given to whoever is free
+soonest; it starts when both the worker and the room are free and takes
+``HOUSEKEEPING_TASK_MINUTES``.
+
+Rerunning the build is safe. Tasks that are in progress or done keep their
+worker. Pending tasks whose booking no longer leaves that day are dropped.
+"""
+import heapq
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from booking.models import Booking, BookingStatus, HousekeepingTask
+
+BATCH_SIZE = 1000
+FIELDS = ["next_booking", "vacated_at", "ready_by", "priority", "assigned_to", "scheduled_start"]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def turnovers(day):
+    """Yield ``(departing, next_arrival or None)`` for every check-out on ``day``."""
+    start, end = day_bounds(day)
+    horizon = end + timedelta(days=_setting("HOUSEKEEPING_LOOKAHEAD_DAYS", 7))
+    bookings = (
+        Booking.objects.exclude(status=BookingStatus.CANCELLED)
+        .filter(Q(check_out__gte=start, check_out__lt=end) | Q(check_in__gte=start, check_in__lt=horizon))
+        .order_by("room_id", "check_in")
+        .only("id", "room_id", "check_in", "check_out", "status")
+    )
+    room_id, waiting = None, []
+    for booking in bookings.iterator(chunk_size=2000):
+        if booking.room_id != room_id:
+            yield from ((departing, None) for departing in waiting)
+            room_id, waiting = booking.room_id, []
+        still_waiting = []
+        for departing in waiting:
+            if booking.check_in >= departing.check_out:
+                yield departing, booking
+            else:
+                still_waiting.append(departing)
+        waiting = still_waiting
+        if start <= booking.check_out < end:
+            waiting.append(booking)
+    yield from ((departing, None) for departing in waiting)
+
+
+def workers():
+    return list(User.objects.filter(is_active=True, userprofile__role="worker").order_by("id"))
+
+
+def assign(tasks, staff, day):
+    """Hand pending tasks, in priority order, to whichever worker is free first."""
+    duration = timedelta(minutes=_setting("HOUSEKEEPING_TASK_MINUTES", 45))
+    shift_start = day_bounds(day)[0] + timedelta(hours=_setting("HOUSEKEEPING_SHIFT_START", 9))
+    free_at = {worker.pk: shift_start for worker in staff}
+    for task in tasks:
+        # Work already under way keeps its worker and holds their time.
+        if task.status != "pending" and task.assigned_to_id in free_at and task.scheduled_start:
+            free_at[task.assigned_to_id] = max(free_at[task.assigned_to_id], task.scheduled_start + duration)
+
+    pending = sorted((t for t in tasks if t.status == "pending"), key=lambda t: (t.priority, t.vacated_at))
+    if not staff:
+        for task in pending:
+            task.assigned_to, task.scheduled_start = None, None
+        return
+    heap = [(free_at[worker.pk], i, worker) for i, worker in enumerate(staff)]
+    heapq.heapify(heap)
+    for task in pending:
+        available, i, worker = heapq.heappop(heap)
+        task.assigned_to = worker
+        task.scheduled_start = max(available, task.vacated_at)
+        heapq.heappush(heap, (task.scheduled_start + duration, i, worker))
+
+
+@transaction.atomic
+def build_queue(day):
+    """Create or refresh ``day``'s turnover tasks and assign them; returns counts."""
+    lookahead = timedelta(days=_setting("HOUSEKEEPING_LOOKAHEAD_DAYS", 7))
+    existing = {task.booking_id: task for task in HousekeepingTask.objects.select_for_update().filter(date=day)}
+
+    tasks = []
+    for departing, arrival in turnovers(day):
+        task = existing.pop(departing.id, None) or HousekeepingTask(
+            booking_id=departing.id, room_id=departing.room_id, date=day,
+        )
+        gap = arrival.check_in - departing.check_out if arrival else lookahead
+        task.next_booking = arrival
+        task.vacated_at = departing.check_out
+        task.ready_by = arrival.check_in if arrival else None
+        task.priority = max(0, int(gap.total_seconds() // 60))
+        tasks.append(task)
+
+    assign(tasks, workers(), day)
+
+    created = [task for task in tasks if task.pk is None]
+    updated = [task for task in tasks if task.pk is not None]
+    HousekeepingTask.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    HousekeepingTask.objects.bulk_update(updated, FIELDS, batch_size=BATCH_SIZE)
+    # Leftovers: the booking was cancelled or now leaves another day.
+    removed, _ = HousekeepingTask.objects.filter(
+        pk__in=[task.pk for task in existing.values() if task.status == "pending"]
+    ).delete()
+
+    duration = timedelta(minutes=_setting("HOUSEKEEPING_TASK_MINUTES", 45))
+    return {
+        "tasks": len(tasks),
+        "created": len(created),
+        "updated": len(updated),
+        "removed": removed,
+        "unassigned": sum(1 for task in tasks if task.assigned_to_id is None),
+        "at_risk": sum(
+            1 for task in tasks
+            if task.ready_by and task.scheduled_start and task.scheduled_start + duration > task.ready_by
+        ),
+    }
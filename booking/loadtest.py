@@ -0,0 +1,292 @@
+"""
+Concurrent booking load generator.
+
+Virtual guests log in once, then sessions arrive as a Poisson process at a
+target rate and run on a bounded thread pool against a live HTTP server.
+Each session replays one of the guest flows (browse the room list, view a
+room, book, extend a stay, order food). Every request is timed per step,
+and after the run the database is checked for overlapping live bookings in
+the same room, which the booking views are supposed to prevent.
+"""
+import bisect
+import http.cookiejar
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connections
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from booking.models import IS_LIVE, LIVE_STATUSES, Booking
+DEFAULT_MIX = {"search": 30, "view": 25, "book": 25, "extend": 10, "order": 10}
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+HISTOGRAM_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+def parse_mix(value):
+    """``"search=30,book=25"`` -> ``{"search": 30, "book": 25}``."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown flow {name!r}; choose from {', '.join(DEFAULT_MIX)}.")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def double_bookings(since_id=0):
+    """Live bookings created after ``since_id`` that overlap another live booking of the same room."""
+    overlapping = Booking.objects.filter(
+        IS_LIVE,
+        room=OuterRef("room"),
+        check_in__lt=OuterRef("check_out"),
+        check_out__gt=OuterRef("check_in"),
+    ).exclude(id=OuterRef("id"))
+    return Booking.objects.filter(
+        IS_LIVE, id__gt=since_id,
+    ).filter(Exists(overlapping)).order_by("room_id", "check_in")
+
+
+class Stats:
+    """Thread-safe latency and outcome counters for one run."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.outcomes = {}
+        self.errors = {}
+        self.lags = []
+
+    def request(self, step, seconds, status):
+        with self.lock:
+            self.latencies.setdefault(step, []).append(seconds)
+            key = str(status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def outcome(self, name):
+        with self.lock:
+            self.outcomes[name] = self.outcomes.get(name, 0) + 1
+
+    def error(self, step, exc):
+        with self.lock:
+            key = f"{step}: {type(exc).__name__}"
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def lag(self, seconds):
+        with self.lock:
+            self.lags.append(seconds)
+
+    def histogram(self, values):
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for value in values:
+            counts[bisect.bisect_left(HISTOGRAM_BUCKETS, value * 1000)] += 1
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]}ms"]
+        return dict(zip(labels, counts))
+
+    def summary(self, elapsed):
+        steps = {}
+        for step, values in sorted(self.latencies.items()):
+            steps[step] = {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p90_ms": round(percentile(values, 90) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(max(values) * 1000, 2),
+                "histogram": self.histogram(values),
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "requests_per_s": round(total / elapsed, 2) if elapsed else 0.0,
+            "bookings_per_s": round(self.outcomes.get("booked", 0) / elapsed, 2) if elapsed else 0.0,
+            "arrival_lag_p99_ms": round(percentile(self.lags, 99) * 1000, 2),
+            "statuses": dict(sorted(self.statuses.items())),
+            "outcomes": dict(sorted(self.outcomes.items())),
+            "errors": dict(sorted(self.errors.items())),
+            "steps": steps,
+        }
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Redirect targets tell us how a POST went; don't follow them.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Guest:
+    """One logged-in browser: a cookie jar plus the CSRF token Django gave it."""
+
+    def __init__(self, base_url, username, stats, checked_in=False, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.checked_in = checked_in
+        self.stats = stats
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect,
+        )
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == "csrftoken":
+                return cookie.value
+        return ""
+
+    def request(self, step, path, data=None):
+        """Return ``(status, location)``; HTTP errors are responses, not exceptions."""
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body)
+        if body is not None:
+            req.add_header("X-CSRFToken", self.csrf_token())
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                response.read()
+                status, location = response.status, response.headers.get("Location", "")
+        except urllib.error.HTTPError as e:
+            e.read()
+            status, location = e.code, e.headers.get("Location", "")
+        self.stats.request(step, time.perf_counter() - start, status)
+        return status, location
+
+    def login(self, password):
+        self.request("login_form", "/login/")
+        status, location = self.request("login", "/login/", {"username": self.username, "password": password})
+        return status == 302 and "/login/" not in location
+
+
+class Scenario:
+    """Picks flows and their parameters; all randomness comes from one seeded RNG."""
+
+    def __init__(self, rooms, menu_items, mix, horizon_days=14, hot_rooms=5, seed=1):
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.rooms = rooms
+        self.hot_rooms = rooms[:hot_rooms] or rooms
+        self.menu_items = menu_items
+        self.flows, self.weights = zip(*mix.items())
+        self.horizon_days = horizon_days
+
+    def draw(self):
+        with self.rng_lock:
+            flow = self.rng.choices(self.flows, self.weights)[0]
+            start = timezone.localdate() + timedelta(days=self.rng.randint(1, self.horizon_days))
+            return {
+                "flow": flow,
+                "page": self.rng.randint(1, max(1, -(-len(self.rooms) // 9))),
+                "room": self.rng.choice(self.hot_rooms),
+                "any_room": self.rng.choice(self.rooms),
+                "check_in": start,
+                "check_out": start + timedelta(days=self.rng.randint(1, 4)),
+                "extra_days": self.rng.randint(1, 3),
+                "item": self.rng.choice(self.menu_items) if self.menu_items else None,
+            }
+
+    def run(self, guest, plan):
+        getattr(self, f"flow_{plan['flow']}")(guest, plan)
+
+    def flow_search(self, guest, plan):
+        guest.request("search", f"/rooms/?page={plan['page']}")
+
+    def flow_view(self, guest, plan):
+        guest.request("view_room", f"/book/room/{plan['any_room']}/")
+
+    def flow_book(self, guest, plan):
+        self.flow_search(guest, plan)
+        guest.request("view_room", f"/book/room/{plan['room']}/")
+        status, location = guest.request("book", "/book/book/private/", {
+            "room_id": plan["room"],
+            "check_in": f"{plan['check_in'].isoformat()}T14:00",
+            "check_out": f"{plan['check_out'].isoformat()}T11:00",
+            "guest_count": 1,
+        })
+        if status == 302 and "/booking/success/" in location:
+            guest.stats.outcome("booked")
+        elif status == 302:
+            guest.stats.outcome("book_rejected")
+
+    def flow_extend(self, guest, plan):
+        booking = Booking.objects.filter(
+            guest_name=guest.username, status__in=LIVE_STATUSES,
+        ).order_by("-check_in").first()
+        if booking is None:
+            # Nothing to extend yet; behave like a guest who books first.
+            return self.flow_book(guest, plan)
+        guest.request("view_room", f"/book/room/{booking.room_id}/")
+        new_check_out = timezone.localtime(booking.check_out) + timedelta(days=plan["extra_days"])
+        guest.request("extend", "/book/extend-booking/", {
+            "booking_id": booking.id,
+            "new_check_out": new_check_out.strftime("%Y-%m-%dT%H:%M"),
+        })
+        previous = booking.check_out
+        booking.refresh_from_db(fields=["check_out"])
+        guest.stats.outcome("extended" if booking.check_out > previous else "extend_rejected")
+
+    def flow_order(self, guest, plan):
+        if plan["item"] is None:
+            return self.flow_view(guest, plan)
+        status, _ = guest.request("private_menu", "/menu/private-menu/")
+        if status != 200:
+            guest.stats.outcome("order_not_checked_in")
+            return
+        guest.request("order", "/menu/place-order/", {"item_id": plan["item"], "quantity": 1})
+        guest.stats.outcome("ordered")
+
+
+def run(guests, scenario, rate, concurrency, duration, seed=1):
+    """Drive Poisson arrivals at ``rate`` sessions/s for ``duration`` seconds."""
+    stats = guests[0].stats
+    pool_lock = threading.Lock()
+    idle = list(guests)
+    arrivals = random.Random(seed)
+
+    def session(scheduled):
+        stats.lag(time.perf_counter() - scheduled)
+        plan = scenario.draw()
+        with pool_lock:
+            # Only checked-in guests can order food; anyone else can do the rest.
+            wanted = [g for g in idle if g.checked_in] if plan["flow"] == "order" else []
+            guest = wanted[-1] if wanted else (idle[-1] if idle else None)
+            if guest is not None:
+                idle.remove(guest)
+        if guest is None:
+            stats.outcome("no_idle_guest")
+            return
+        try:
+            scenario.run(guest, plan)
+        except Exception as e:
+            stats.error(plan["flow"], e)
+        finally:
+            connections.close_all()
+            with pool_lock:
+                idle.append(guest)
+
+    start = time.perf_counter()
+    next_at = start
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            next_at += arrivals.expovariate(rate)
+            if next_at - start >= duration:
+                break
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(session, next_at)
+    return time.perf_counter() - start
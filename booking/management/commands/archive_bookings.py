@@ -0,0 +1,33 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move completed bookings (and their delivered orders) that checked out more "
+        "than ARCHIVE_AFTER_DAYS ago into the archive tables, one chunk per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Default: ARCHIVE_AFTER_DAYS.")
+        parser.add_argument("--chunk-size", type=int, help="Default: ARCHIVE_CHUNK_SIZE.")
+        parser.add_argument("--max-chunks", type=int, help="Stop after this many chunks; a rerun carries on.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived.")
+
+    def handle(self, *args, days=None, chunk_size=None, max_chunks=None, dry_run=False, **options):
+        now = timezone.now()
+        before = now - timedelta(days=days) if days is not None else archive.cutoff(now)
+        if dry_run:
+            self.stdout.write(f"{archive.candidates(before).count()} booking(s) checked out before {before:%Y-%m-%d}")
+            return
+        started = time.perf_counter()
+        counts = archive.archive(before=before, chunk_size=chunk_size, max_chunks=max_chunks, now=now)
+        self.stdout.write(
+            ", ".join(f"{key} {value}" for key, value in counts.items())
+            + f" in {time.perf_counter() - started:.1f}s"
+        )
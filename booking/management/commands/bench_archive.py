@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from booking import archive, pricing
+from booking.models import ArchivedBooking, Booking
+from core.seed import seed
+from menu.models import ArchivedOrder, Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with years of bookings and orders, archive the "
+        "old stays, and time the job and the pricing forecast read-through before and after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=500)
+        parser.add_argument("--bookings", type=int, default=100000)
+        parser.add_argument("--orders", type=int, default=20000)
+        parser.add_argument("--years", type=int, default=3)
+
+    def _forecast_ms(self, today):
+        started = time.perf_counter()
+        pricing.forecast(today)
+        return (time.perf_counter() - started) * 1000
+
+    def handle(self, *args, rooms=500, bookings=100000, orders=20000, years=3, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            seed(rooms=rooms, bookings=bookings, users=200, years=years, ratings=0, orders=orders, images_per_room=0)
+            self.stdout.write(f"seeded in {time.perf_counter() - started:.1f}s")
+            today = timezone.localdate()
+            self.stdout.write(
+                f"before: {Booking.objects.count()} hot bookings, {Order.objects.count()} hot orders, "
+                f"forecast {self._forecast_ms(today):.0f} ms"
+            )
+
+            started = time.perf_counter()
+            counts = archive.archive()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"archive: {counts} in {elapsed:.1f}s ({counts['bookings'] / max(elapsed, 1e-9):.0f} bookings/s)"
+            )
+            self.stdout.write(
+                f"after: {Booking.objects.count()} hot / {ArchivedBooking.objects.count()} archived bookings, "
+                f"{Order.objects.count()} hot / {ArchivedOrder.objects.count()} archived orders, "
+                f"forecast {self._forecast_ms(today):.0f} ms"
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from booking import housekeeping
+from core.seed import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with a large property and time building "
+        "the housekeeping turnover queue (first build and rerun), with query counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=1000)
+        parser.add_argument("--bookings", type=int, default=30000)
+        parser.add_argument("--users", type=int, default=2000, help="Every 25th seeded user is a worker.")
+        parser.add_argument("--years", type=int, default=1)
+
+    def handle(self, *args, rooms=1000, bookings=30000, users=2000, years=1, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            seed(rooms=rooms, bookings=bookings, users=users, years=years, ratings=0, orders=0, images_per_room=0)
+            self.stdout.write(f"seeded in {time.perf_counter() - started:.1f}s")
+            day = timezone.localdate()
+
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                pairs = sum(1 for _ in housekeeping.turnovers(day))
+                elapsed = time.perf_counter() - started
+            self.stdout.write(f"turnovers: {pairs} departures in {elapsed * 1000:.1f} ms, {len(ctx)} queries")
+
+            for label in ("first build", "rerun"):
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    counts = housekeeping.build_queue(day)
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(f"{label}: {elapsed * 1000:.1f} ms, {len(ctx)} queries, {counts}")
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from booking import pricing
+from core.seed import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with years of bookings for thousands of rooms "
+        "and time the occupancy forecast and the rate suggestion job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=2000)
+        parser.add_argument("--bookings", type=int, default=100000)
+        parser.add_argument("--years", type=int, default=3)
+
+    def handle(self, *args, rooms=2000, bookings=100000, years=3, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            seed(rooms=rooms, bookings=bookings, users=200, years=years, ratings=0, orders=0, images_per_room=0)
+            self.stdout.write(f"seeded in {time.perf_counter() - started:.1f}s")
+            today = timezone.localdate()
+
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                types, dates, _, _, occupancy = pricing.forecast(today)
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"forecast: {len(types)} room types x {len(dates)} nights in {elapsed * 1000:.0f} ms, "
+                f"{len(ctx)} queries, mean occupancy {occupancy.mean():.2f}"
+            )
+            for label in ("first run", "rerun"):
+                started = time.perf_counter()
+                counts = pricing.build_suggestions(today)
+                self.stdout.write(f"{label}: {(time.perf_counter() - started) * 1000:.0f} ms, {counts}")
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from booking.pricing import build_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        "Nightly batch job: forecast occupancy per room type from booking history "
+        "and write suggested nightly rate factors for review in the admin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="First night to price, YYYY-MM-DD (default: today).")
+        parser.add_argument("--history-days", type=int, help="Default: PRICING_HISTORY_DAYS.")
+        parser.add_argument("--horizon-days", type=int, help="Default: PRICING_HORIZON_DAYS.")
+
+    def handle(self, *args, date=None, history_days=None, horizon_days=None, **options):
+        day = parse_date(date) if date else timezone.localdate()
+        if day is None:
+            raise CommandError(f"Not a date: {date!r}")
+        started = time.perf_counter()
+        counts = build_suggestions(day, history_days=history_days, horizon_days=horizon_days)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{day}: " + ", ".join(f"{key} {value}" for key, value in counts.items()) + f" in {elapsed:.2f}s"
+        )
@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import warnings
+
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection
+from django.test import override_settings
+
+from booking import loadtest
+from booking.models import Booking, BookingStatus, Room
+from core.seed import SEED_PASSWORD, seed
+from menu.models import MenuItem
+
+
+class LoadTestServer(ThreadedWSGIServer):
+    # The default backlog of 10 refuses connections long before Django saturates.
+    request_queue_size = 256
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay concurrent guest flows (search, view room, book, extend, order food) "
+        "against a live server with Poisson arrivals, then report throughput, latency "
+        "histograms and double bookings. Without --url, seeds a throwaway database and "
+        "serves it from an in-process threaded WSGI server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Existing server to target; its database must be this one.")
+        parser.add_argument("--rate", type=float, default=20.0, help="Session arrivals per second.")
+        parser.add_argument("--concurrency", type=int, default=16, help="Sessions in flight at once.")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds of arrivals.")
+        parser.add_argument("--guests", type=int, default=50, help="Virtual guests to log in.")
+        parser.add_argument(
+            "--mix", default=",".join(f"{k}={v}" for k, v in loadtest.DEFAULT_MIX.items()),
+            help="Flow weights, e.g. search=30,view=25,book=25,extend=10,order=10.",
+        )
+        parser.add_argument("--hot-rooms", type=int, default=5, help="Rooms that bookings compete for.")
+        parser.add_argument("--horizon-days", type=int, default=14, help="Bookings start within this many days.")
+        parser.add_argument("--rooms", type=int, default=20, help="Rooms to seed (without --url).")
+        parser.add_argument("--bookings", type=int, default=3000, help="Bookings to seed (without --url).")
+        parser.add_argument("--password", default=SEED_PASSWORD, help="Password shared by the guests.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Also write the JSON report here.")
+
+    def handle(self, *args, **options):
+        try:
+            mix = loadtest.parse_mix(options["mix"])
+        except ValueError as e:
+            raise CommandError(e)
+        # Errors are part of the report; don't also dump tracebacks to stderr.
+        for name in ("django.request", "django.server", "hotelgrand.sql"):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+        # private_booking stores the naive datetimes it parses, one warning per booking.
+        warnings.filterwarnings("ignore", message=".*received a naive datetime", category=RuntimeWarning)
+
+        if options["url"]:
+            report = self.load(options["url"], mix, options)
+        else:
+            report = self.run_local(mix, options)
+
+        self.print_report(report)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+        if report["double_bookings"]["count"]:
+            self.stderr.write(self.style.ERROR(
+                f"{report['double_bookings']['count']} bookings overlap another live booking of the same room."
+            ))
+
+    def run_local(self, mix, options):
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        tmpdir = None
+        if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+            # Server threads need a real file; a shared in-memory database serializes on table locks.
+            tmpdir = tempfile.mkdtemp(prefix="loadtest-")
+            test_settings["NAME"] = os.path.join(tmpdir, "loadtest.sqlite3")
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(ALLOWED_HOSTS=["*"], THROTTLE_ENABLED=False, DEBUG=False):
+                seed(rooms=options["rooms"], bookings=options["bookings"], users=max(options["guests"], 20))
+                connection.close()
+                server = LoadTestServer(("127.0.0.1", 0), WSGIRequestHandler)
+                server.set_app(WSGIHandler())
+                thread = threading.Thread(target=server.serve_forever, daemon=True)
+                thread.start()
+                try:
+                    host, port = server.server_address
+                    return self.load(f"http://{host}:{port}", mix, options)
+                finally:
+                    server.shutdown()
+                    server.server_close()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if tmpdir:
+                test_settings.pop("NAME", None)
+                os.rmdir(tmpdir)
+
+    def load(self, base_url, mix, options):
+        rooms = list(Room.objects.order_by("id").values_list("id", flat=True))
+        items = list(MenuItem.objects.order_by("id").values_list("id", flat=True))
+        if not rooms:
+            raise CommandError("No rooms to book; run seed_data first.")
+        # Guests that are checked in somewhere first, so the food flow has someone to serve.
+        checked_in = set(Booking.objects.filter(status=BookingStatus.CHECKED_IN).values_list("guest_name", flat=True))
+        usernames = list(User.objects.filter(is_staff=False).order_by("id").values_list("username", flat=True))
+        usernames.sort(key=lambda name: name not in checked_in)
+
+        stats = loadtest.Stats()
+        guests = []
+        for username in usernames[:options["guests"]]:
+            guest = loadtest.Guest(base_url, username, stats, checked_in=username in checked_in)
+            if guest.login(options["password"]):
+                guests.append(guest)
+        if not guests:
+            raise CommandError(f"No guest could log in to {base_url}.")
+        self.stdout.write(f"{len(guests)} guests logged in to {base_url}.")
+        # Logins aren't part of the measured load.
+        stats.latencies.clear()
+        stats.statuses.clear()
+
+        since_id = Booking.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        scenario = loadtest.Scenario(
+            rooms, items, mix, horizon_days=options["horizon_days"],
+            hot_rooms=options["hot_rooms"], seed=options["seed"],
+        )
+        elapsed = loadtest.run(
+            guests, scenario, rate=options["rate"], concurrency=options["concurrency"],
+            duration=options["duration"], seed=options["seed"],
+        )
+
+        overlaps = list(loadtest.double_bookings(since_id).values("id", "room_id", "check_in", "check_out"))
+        report = stats.summary(elapsed)
+        report["config"] = {
+            "url": base_url, "rate": options["rate"], "concurrency": options["concurrency"],
+            "duration": options["duration"], "guests": len(guests), "mix": mix,
+            "hot_rooms": options["hot_rooms"], "horizon_days": options["horizon_days"],
+            "database": connection.vendor,
+        }
+        report["double_bookings"] = {
+            "count": len(overlaps),
+            "sample": [
+                {**row, "check_in": row["check_in"].isoformat(), "check_out": row["check_out"].isoformat()}
+                for row in overlaps[:10]
+            ],
+        }
+        return report
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{report['requests']} requests in {report['elapsed_s']}s: "
+            f"{report['requests_per_s']} req/s, {report['bookings_per_s']} bookings/s, "
+            f"arrival lag p99 {report['arrival_lag_p99_ms']} ms"
+        )
+        self.stdout.write(f"{'step':<14}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for step, row in report["steps"].items():
+            self.stdout.write(
+                f"{step:<14}{row['count']:>7}{row['p50_ms']:>10}{row['p90_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}"
+            )
+        self.stdout.write(f"statuses: {report['statuses']}")
+        self.stdout.write(f"outcomes: {report['outcomes']}")
+        if report["errors"]:
+            self.stdout.write(f"errors:   {report['errors']}")
+        self.stdout.write(f"double bookings: {report['double_bookings']['count']}")
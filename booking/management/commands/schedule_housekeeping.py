@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from booking.housekeeping import build_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Build (or refresh) the housekeeping turnover queue for a day and assign it "
+        "to workers. Safe to rerun; meant for a morning cron plus reruns as bookings change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="YYYY-MM-DD (default: today).")
+        parser.add_argument("--days", type=int, default=1, help="Also build the following days.")
+
+    def handle(self, *args, date=None, days=1, **options):
+        day = parse_date(date) if date else timezone.localdate()
+        if day is None:
+            raise CommandError(f"Not a date: {date!r}")
+        for offset in range(days):
+            current = day + timedelta(days=offset)
+            counts = build_queue(current)
+            self.stdout.write(f"{current}: " + ", ".join(f"{key} {value}" for key, value in counts.items()))
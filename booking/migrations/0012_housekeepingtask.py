@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0011_booking_updated_at_and_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HousekeepingTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('vacated_at', models.DateTimeField()),
+                ('ready_by', models.DateTimeField(blank=True, null=True)),
+                ('priority', models.PositiveIntegerField(help_text='Minutes between check-out and the next check-in; lower is more urgent')),
+                ('scheduled_start', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In progress'), ('done', 'Done')], default='pending', max_length=20)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='housekeeping_tasks', to=settings.AUTH_USER_MODEL)),
+                ('booking', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='housekeeping_task', to='booking.booking')),
+                ('next_booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='booking.booking')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='housekeeping_tasks', to='booking.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'status', 'priority'], name='housekeeping_queue')],
+            },
+        ),
+    ]
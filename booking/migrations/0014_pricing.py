@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def room_type_from_name(apps, schema_editor):
+    # "Deluxe 101" -> "Deluxe"; staff can correct it in the admin.
+    Room = apps.get_model('booking', 'Room')
+    rooms = list(Room.objects.only('id', 'name'))
+    for room in rooms:
+        room.room_type = room.name.split()[0] if room.name.split() else ''
+    Room.objects.bulk_update(rooms, ['room_type'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0013_waitlistentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Existing bookings stay NULL: their real booking time is unknown.
+        migrations.AddField(
+            model_name='booking',
+            name='created_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='room_type',
+            field=models.CharField(blank=True, db_index=True, max_length=50),
+        ),
+        migrations.RunPython(room_type_from_name, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='RateSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(max_length=50)),
+                ('date', models.DateField()),
+                ('rooms', models.PositiveIntegerField(help_text='Rooms of this type when forecast')),
+                ('on_books', models.PositiveIntegerField(help_text='Rooms already booked for the night when forecast')),
+                ('forecast_occupancy', models.FloatField()),
+                ('factor', models.DecimalField(decimal_places=2, help_text='Nightly rate = Room.price x factor', max_digits=4)),
+                ('status', models.CharField(choices=[('pending', 'Pending review'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'date'], name='rate_suggestion_status_date')],
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'date'), name='rate_suggestion_per_night')],
+            },
+        ),
+    ]
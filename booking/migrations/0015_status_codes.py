@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:38
+
+import core.indexes
+from django.db import migrations, models
+
+# Frozen copy of booking.models.BookingStatus; anything unrecognised becomes pending.
+CODES = {'pending': 0, 'confirmed': 1, 'checked_in': 2, 'completed': 3, 'cancelled': 4}
+
+
+def names_to_codes(apps, schema_editor):
+    # Still a CharField here: write the codes as text, one UPDATE per status, and the
+    # AlterField below casts the column in place.
+    Booking = apps.get_model('booking', 'Booking')
+    for name, code in CODES.items():
+        Booking.objects.filter(status=name).update(status=str(code))
+    Booking.objects.exclude(status__in=[str(code) for code in CODES.values()]).update(status='0')
+
+
+def codes_to_names(apps, schema_editor):
+    Booking = apps.get_model('booking', 'Booking')
+    for name, code in CODES.items():
+        Booking.objects.filter(status=str(code)).update(status=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0014_pricing'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_status_check_in',
+        ),
+        migrations.RunPython(names_to_codes, codes_to_names),
+        migrations.AlterField(
+            model_name='booking',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Pending'), (1, 'Confirmed'), (2, 'Checked in'), (3, 'Completed'), (4, 'Cancelled')], default=0),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=core.indexes.PartialIndex(condition=models.Q(('status__literal_in', (1, 2))), fields=['room', 'check_in'], name='booking_live_room'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=core.indexes.PartialIndex(condition=models.Q(('status__literal_in', (1, 2))), fields=['check_in'], name='booking_live_check_in'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0015_status_codes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('guest_name', models.CharField(max_length=100)),
+                ('check_in', models.DateTimeField()),
+                ('check_out', models.DateTimeField()),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'Pending'), (1, 'Confirmed'), (2, 'Checked in'), (3, 'Completed'), (4, 'Cancelled')])),
+                ('special_requests', models.TextField(blank=True)),
+                ('total_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('rating', models.IntegerField(blank=True, null=True)),
+                ('review', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(null=True)),
+                ('archived_at', models.DateTimeField()),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='booking.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['check_in'], name='archived_booking_check_in'), models.Index(fields=['guest_name'], name='archived_booking_guest')],
+            },
+        ),
+    ]
@@ -1,4 +1,8 @@
 from django.db import models
+from django.utils import timezone
+
+from core import states
+from core.indexes import PartialIndex
 
 
 
@@ -14,6 +18,8 @@ class Room(models.Model):
     bathrooms = models.IntegerField(default=1)
     size = models.IntegerField(help_text="Size in square feet", default=500)
     security_level = models.CharField(max_length=50, default="Standard")
+    # Rooms of a type share a demand forecast and rate factor (booking/pricing.py)
+    room_type = models.CharField(max_length=50, blank=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -38,23 +44,82 @@ class RoomImage(models.Model):
         if self.image and self.image_url:
             raise ValidationError("Please provide only one: image file or image URL.")
 
+class BookingStatus(models.IntegerChoices):
+    # Live states are adjacent codes, so a status-leading index keeps them in one short range
+    PENDING = 0, "Pending"
+    CONFIRMED = 1, "Confirmed"
+    CHECKED_IN = 2, "Checked in"
+    COMPLETED = 3, "Completed"
+    CANCELLED = 4, "Cancelled"
+
+
+# Bookings that hold their room's nights
+LIVE_STATUSES = (BookingStatus.CONFIRMED, BookingStatus.CHECKED_IN)
+# Matches the partial indexes below word for word; filter with it rather than status__in (core/indexes.py)
+IS_LIVE = models.Q(status__literal_in=LIVE_STATUSES)
+
+
 class Booking(models.Model):
+    Status = BookingStatus
+    # Allowed status changes, enforced on save (core/states.py)
+    TRANSITIONS = {
+        Status.PENDING: {Status.CONFIRMED, Status.CANCELLED},
+        Status.CONFIRMED: {Status.CHECKED_IN, Status.COMPLETED, Status.CANCELLED},
+        Status.CHECKED_IN: {Status.COMPLETED},
+        Status.COMPLETED: set(),
+        Status.CANCELLED: set(),
+    }
+
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     guest_name = models.CharField(max_length=100)
     check_in = models.DateTimeField()
     check_out = models.DateTimeField()
-    status = models.CharField(max_length=20, default='pending')
+    status = models.PositiveSmallIntegerField(choices=Status.choices, default=Status.PENDING)
     special_requests = models.TextField(blank=True)
     total_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     rating = models.IntegerField(blank=True, null=True)  # 1–5 stars
     review = models.TextField(blank=True)
+    # Bumped on every save; the worker dashboard polls for rows changed since its last look
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # When the booking was made; lead time and pace for the pricing job. Null on rows older than the field.
+    created_at = models.DateTimeField(default=timezone.now, null=True, editable=False)
 
+    class Meta:
+        indexes = [
+            # Live rows only, not the years of history (core/indexes.py): availability and
+            # overlap checks per room, and the front desk's arrivals.
+            PartialIndex(fields=["room", "check_in"], name="booking_live_room", condition=IS_LIVE),
+            PartialIndex(fields=["check_in"], name="booking_live_check_in", condition=IS_LIVE),
+            # Departures, the in-house list and the expiry sweep; each reads one status's slice
+            models.Index(fields=["status", "check_out"], name="booking_status_check_out"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the row held when loaded, so a save's signals can tell what changed
+        # (freed nights in booking/waitlist.py, transitions in core/events.py)
+        instance._loaded_span = tuple(instance.__dict__.get(f) for f in ("room_id", "status", "check_in", "check_out"))
+        return instance
+
+    @property
+    def status_name(self):
+        return states.name(BookingStatus, self.status)
+
+    def clean(self):
+        loaded = getattr(self, "_loaded_span", None)
+        if loaded and loaded[1] is not None and not states.allowed(Booking, loaded[1], self.status):
+            raise ValidationError({"status": f"Can't go from {states.name(BookingStatus, loaded[1])} to {self.status_name}."})
 
     def save(self, *args, **kwargs):
+        loaded = getattr(self, "_loaded_span", None)
+        if loaded and loaded[1] is not None:
+            states.check(Booking, loaded[1], self.status)
         if self.check_in and self.check_out and self.room:
             duration = (self.check_out - self.check_in).days
             self.total_price = self.room.price * max(duration, 1)
         super().save(*args, **kwargs)
+        self._loaded_span = (self.room_id, self.status, self.check_in, self.check_out)
 
 
 from django import forms
@@ -91,4 +156,121 @@ def save(self, *args, **kwargs):
         duration_seconds = (self.check_out - self.check_in).total_seconds()
         duration_days = Decimal(duration_seconds) / Decimal(86400)  # 86400 seconds in a day
         self.total_price = self.room.price * max(duration_days, Decimal("1.0"))
-    super().save(*args, **kwargs)
\ No newline at end of file
+    super().save(*args, **kwargs)
+
+class HousekeepingTask(models.Model):
+    """Cleaning a room between one guest's check-out and the next check-in (booking/housekeeping.py)."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('in_progress', 'In progress'),
+        ('done', 'Done'),
+    ]
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="housekeeping_tasks")
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name="housekeeping_task")
+    next_booking = models.ForeignKey(
+        Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    date = models.DateField()
+    vacated_at = models.DateTimeField()
+    ready_by = models.DateTimeField(null=True, blank=True)
+    priority = models.PositiveIntegerField(help_text="Minutes between check-out and the next check-in; lower is more urgent")
+    assigned_to = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="housekeeping_tasks"
+    )
+    scheduled_start = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["date", "status", "priority"], name="housekeeping_queue")]
+
+    def __str__(self):
+        return f"Turnover of {self.room.name} on {self.date}"
+
+
+class WaitlistEntry(models.Model):
+    """A guest waiting for a room/date range that was taken (booking/waitlist.py)."""
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('withdrawn', 'Withdrawn'),
+    ]
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="waitlist")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="waitlist_entries")
+    check_in = models.DateTimeField()
+    check_out = models.DateTimeField()
+    guest_count = models.PositiveIntegerField(default=1)
+    special_requests = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    booking = models.OneToOneField(
+        Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name="waitlist_entry"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Entries that could use freed nights: one room, still waiting, check_in in a bounded range
+            models.Index(fields=["room", "status", "check_in"], name="waitlist_overlap"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} waiting for {self.room.name} from {self.check_in:%Y-%m-%d}"
+
+
+class RateSuggestion(models.Model):
+    """Forecast occupancy and suggested rate factor for one room type on one night (booking/pricing.py)."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending review'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+    ]
+
+    room_type = models.CharField(max_length=50)
+    date = models.DateField()
+    rooms = models.PositiveIntegerField(help_text="Rooms of this type when forecast")
+    on_books = models.PositiveIntegerField(help_text="Rooms already booked for the night when forecast")
+    forecast_occupancy = models.FloatField()
+    factor = models.DecimalField(max_digits=4, decimal_places=2, help_text="Nightly rate = Room.price x factor")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    generated_at = models.DateTimeField(auto_now=True)
+    reviewed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["room_type", "date"], name="rate_suggestion_per_night")]
+        indexes = [models.Index(fields=["status", "date"], name="rate_suggestion_status_date")]
+
+    def __str__(self):
+        return f"{self.room_type or 'Untyped'} on {self.date}: x{self.factor}"
+
+
+class ArchivedBooking(models.Model):
+    """A finished stay moved out of ``Booking`` by booking/archive.py; same id and columns, read-only."""
+    id = models.BigIntegerField(primary_key=True)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="archived_bookings")
+    guest_name = models.CharField(max_length=100)
+    check_in = models.DateTimeField()
+    check_out = models.DateTimeField()
+    status = models.PositiveSmallIntegerField(choices=BookingStatus.choices)
+    special_requests = models.TextField(blank=True)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    rating = models.IntegerField(blank=True, null=True)
+    review = models.TextField(blank=True)
+    updated_at = models.DateTimeField()
+    created_at = models.DateTimeField(null=True)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Reporting reads history by date range (booking/pricing.py), the admin by guest
+            models.Index(fields=["check_in"], name="archived_booking_check_in"),
+            models.Index(fields=["guest_name"], name="archived_booking_guest"),
+        ]
+
+    @property
+    def status_name(self):
+        return states.name(BookingStatus, self.status)
+
+    def __str__(self):
+        return f"{self.guest_name} in {self.room.name} from {self.check_in:%Y-%m-%d} (archived)"
@@ -0,0 +1,207 @@
+"""
+Occupancy forecast and suggested nightly rates, per room type.
+
+``build_suggestions(today)`` is the nightly batch job (``manage.py
+forecast_rates``). It reads ``PRICING_HISTORY_DAYS`` of past bookings plus
+everything already on the books for the next ``PRICING_HORIZON_DAYS``,
+with one query per table. Bookings are read through the archive
+(booking/archive.py), so archived stays still count as history. All the arithmetic is then done on NumPy arrays;
+there are no per-booking or per-night Python loops.
+
+- Occupancy curves: each booking adds +1 on its first night and -1 after
+  its last, per room type. A cumulative sum gives rooms occupied per type
+  per night, for the past (final occupancy) and the future (on the books
+  today).
+- Baseline: the type's mean historical occupancy times a day-of-week
+  factor and a week-of-year (season) factor.
+- Lead time: from past booking-nights whose ``created_at`` is known,
+  ``booked_by[type, lead]`` is the share of a night's final occupancy
+  that was already booked ``lead`` days ahead.
+- Pace: nights booked faster than usual for their lead time
+  (``on_books / (booked_by x baseline)``) are expected to keep picking up
+  faster. Forecast = on the books + (1 - booked_by) x baseline x pace.
+- Rate: ``factor = 1 + PRICING_SENSITIVITY x (forecast - PRICING_TARGET_OCCUPANCY)``,
+  clamped and rounded to 0.05. The nightly rate is ``Room.price x factor``.
+
+Results are written as ``RateSuggestion`` rows, one per room type and
+night, for review in the admin. Only approved rows are published (the
+channel feed prices nights with them). A rerun refreshes pending rows and
+leaves reviewed ones alone.
+
+Nights are counted on the UTC offset of today. Check-ins are at 14:00 and
+check-outs at 11:00, so a DST hour never moves a night across midnight.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from booking import archive
+from booking.housekeeping import day_bounds
+from booking.models import BookingStatus, RateSuggestion, Room
+
+# Stays that filled a room: finished ones count for history, live ones for the books.
+OCCUPYING_STATUSES = (BookingStatus.CONFIRMED, BookingStatus.CHECKED_IN, BookingStatus.COMPLETED)
+MAX_LEAD_DAYS = 365
+BATCH_SIZE = 1000
+FIELDS = ["rooms", "on_books", "forecast_occupancy", "factor"]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _day_numbers(datetimes, offset):
+    """Local day numbers (days since the epoch) for aware datetimes; NaN for None."""
+    stamps = np.fromiter(
+        (np.nan if dt is None else dt.timestamp() for dt in datetimes), dtype=np.float64, count=len(datetimes),
+    )
+    return np.floor((stamps + offset) / 86400)
+
+
+def _by_group(values, groups, size, min_days=1):
+    """Mean of ``values`` (types x days) over day groups (e.g. weekday); NaN for groups under ``min_days``."""
+    onehot = np.zeros((values.shape[1], size))
+    onehot[np.arange(values.shape[1]), groups] = 1
+    counts = onehot.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts >= min_days, (values @ onehot) / counts, np.nan)
+
+
+def forecast(today, history_days=None, horizon_days=None):
+    """Forecast occupancy per room type for the next ``horizon_days`` nights.
+
+    Returns ``(types, dates, rooms, on_books, occupancy)``: ``rooms`` per
+    type, and ``on_books``/``occupancy`` as (types x nights) arrays.
+    """
+    history_days = history_days or _setting("PRICING_HISTORY_DAYS", 3 * 365)
+    horizon_days = horizon_days or _setting("PRICING_HORIZON_DAYS", 90)
+    offset = timezone.localtime().utcoffset().total_seconds()
+    day0 = (today - timedelta(days=history_days)).toordinal() - 719163  # 719163 = date(1970, 1, 1).toordinal()
+    span = history_days + horizon_days
+    start = day_bounds(today - timedelta(days=history_days))[0]
+    end = day_bounds(today + timedelta(days=horizon_days))[0]
+
+    room_rows = list(Room.objects.values_list("id", "room_type"))
+    types = sorted({room_type for _, room_type in room_rows})
+    if not room_rows:
+        return types, [], np.zeros(0, dtype=np.int64), np.zeros((0, horizon_days)), np.zeros((0, horizon_days))
+    index = {room_type: g for g, room_type in enumerate(types)}
+    type_of_room = np.zeros(max(pk for pk, _ in room_rows) + 1, dtype=np.int64)
+    for pk, room_type in room_rows:
+        type_of_room[pk] = index[room_type]
+    rooms = np.bincount(type_of_room[[pk for pk, _ in room_rows]], minlength=len(types))
+
+    rows = list(archive.read_through(
+        ("room_id", "check_in", "check_out", "created_at"),
+        status__in=OCCUPYING_STATUSES, check_in__lt=end, check_out__gt=start,
+    ))
+    occupied = np.zeros((len(types), span))
+    booked_by = np.zeros((len(types), MAX_LEAD_DAYS + 1))
+    first_day = history_days
+    if rows:
+        room_ids, check_ins, check_outs, created = zip(*rows)
+        group = type_of_room[np.array(room_ids)]
+        first = _day_numbers(check_ins, offset).astype(np.int64) - day0
+        last = np.maximum(_day_numbers(check_outs, offset).astype(np.int64) - day0, first + 1)
+        made = _day_numbers(created, offset) - day0
+
+        # 📈 Occupancy curves: +1 on the first night, -1 after the last, then a running sum.
+        lo, hi = np.clip(first, 0, span), np.clip(last, 0, span)
+        inside = lo < hi
+        delta = np.zeros((len(types), span + 1))
+        np.add.at(delta, (group[inside], lo[inside]), 1)
+        np.add.at(delta, (group[inside], hi[inside]), -1)
+        occupied = np.cumsum(delta, axis=1)[:, :span]
+        first_day = int(min(max(first.min(), 0), history_days))
+
+        # ⏱️ Lead times: every past night of every booking whose booking time is known.
+        known = ~np.isnan(made) & (first < history_days) & (last > 0)
+        if known.any():
+            made = made[known].astype(np.int64)
+            k_first, k_last, k_group = first[known], np.minimum(last[known], history_days), group[known]
+            lengths = np.maximum(k_last - k_first, 0)
+            nights = np.repeat(k_first, lengths) + (
+                np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            )
+            leads = np.clip(nights - np.repeat(made, lengths), 0, MAX_LEAD_DAYS)
+            past = nights >= 0
+            counts = np.zeros((len(types), MAX_LEAD_DAYS + 1))
+            np.add.at(counts, (np.repeat(k_group, lengths)[past], leads[past]), 1)
+            # Share of nights booked at least `lead` days ahead; pooled for types with no history.
+            totals = counts.sum(axis=1, keepdims=True)
+            pooled = counts.sum(axis=0)[::-1].cumsum()[::-1] / max(counts.sum(), 1)
+            booked_by = np.where(totals > 0, counts[:, ::-1].cumsum(axis=1)[:, ::-1] / np.maximum(totals, 1), pooled)
+
+    # 📅 Baseline from history: type mean x day-of-week factor x week-of-year factor.
+    per_room = np.maximum(rooms, 1)[:, None]
+    history = occupied[:, first_day:history_days] / per_room
+    future = occupied[:, history_days:] / per_room
+    dates = [today + timedelta(days=i) for i in range(horizon_days)]
+    if history.shape[1]:
+        past_dates = [today - timedelta(days=history_days - i) for i in range(first_day, history_days)]
+        mean = history.mean(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            by_weekday = _by_group(history, np.array([d.weekday() for d in past_dates]), 7) / mean
+            # Whole weeks only; a partial week at the edge of history would stand in for its weekdays.
+            by_week = _by_group(history, np.array([d.isocalendar()[1] - 1 for d in past_dates]), 53, 7) / mean
+        by_weekday = np.nan_to_num(by_weekday, nan=1.0, posinf=1.0)
+        by_week = np.nan_to_num(by_week, nan=1.0, posinf=1.0)
+        baseline = np.clip(
+            mean
+            * by_weekday[:, [d.weekday() for d in dates]]
+            * by_week[:, [d.isocalendar()[1] - 1 for d in dates]],
+            0, 1,
+        )
+    else:
+        baseline = np.zeros_like(future)
+
+    # 🏃 Pace: pickup still to come, scaled by how far ahead of the usual curve this night is.
+    share = booked_by[:, np.minimum(np.arange(horizon_days), MAX_LEAD_DAYS)]
+    expected_now = share * baseline
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pace = np.where(expected_now > 0.01, future / expected_now, 1.0)
+    pace = np.clip(pace, 0.5, 2.0)
+    occupancy = np.clip(future + (1 - share) * baseline * pace, 0, 1)
+    return types, dates, rooms, occupied[:, history_days:].astype(np.int64), occupancy
+
+
+def factors(occupancy):
+    """Rate factor per forecast occupancy, rounded to 0.05."""
+    raw = 1 + _setting("PRICING_SENSITIVITY", 1.0) * (occupancy - _setting("PRICING_TARGET_OCCUPANCY", 0.7))
+    raw = np.clip(raw, _setting("PRICING_MIN_FACTOR", 0.7), _setting("PRICING_MAX_FACTOR", 1.5))
+    return np.round(raw * 20) / 20
+
+
+@transaction.atomic
+def build_suggestions(today, history_days=None, horizon_days=None):
+    """Write (or refresh) pending ``RateSuggestion`` rows for the horizon; returns counts."""
+    types, dates, rooms, on_books, occupancy = forecast(today, history_days, horizon_days)
+    suggested = factors(occupancy)
+    now = timezone.now()
+    existing = {
+        (row.room_type, row.date): row
+        for row in RateSuggestion.objects.select_for_update().filter(date__gte=dates[0], date__lte=dates[-1])
+    } if dates else {}
+
+    created, updated, reviewed = [], [], 0
+    for g, room_type in enumerate(types):
+        for i, date in enumerate(dates):
+            row = existing.get((room_type, date)) or RateSuggestion(room_type=room_type, date=date)
+            if row.pk is not None and row.status != "pending":
+                reviewed += 1
+                continue
+            row.rooms = int(rooms[g])
+            row.on_books = int(on_books[g, i])
+            row.forecast_occupancy = round(float(occupancy[g, i]), 4)
+            row.factor = Decimal(f"{suggested[g, i]:.2f}")
+            row.generated_at = now  # bulk_update skips auto_now
+            (updated if row.pk is not None else created).append(row)
+
+    RateSuggestion.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    RateSuggestion.objects.bulk_update(updated, FIELDS + ["generated_at"], batch_size=BATCH_SIZE)
+    return {"types": len(types), "nights": len(dates), "created": len(created),
+            "updated": len(updated), "reviewed": reviewed}
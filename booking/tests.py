@@ -1,3 +1,589 @@
-from django.test import TestCase
+import importlib.util
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from booking import archive, dashboard, feed, housekeeping, loadtest, waitlist
+from booking.models import IS_LIVE, ArchivedBooking, Booking, BookingStatus, HousekeepingTask, RateSuggestion, Review, Room, WaitlistEntry
+from core import states
+from menu.models import IS_OPEN, ArchivedOrder, MenuItem, Order, OrderStatus
+from booking.views import available_rooms_between
+
+
+def make_room(name="Deluxe", **kwargs):
+    defaults = dict(description="A room", price=100, capacity=2, amenities="WiFi")
+    defaults.update(kwargs)
+    return Room.objects.create(name=name, **defaults)
+
+
+def make_booking(room, check_in, nights=2, status=BookingStatus.CONFIRMED, guest_name="guest"):
+    return Booking.objects.create(
+        room=room, guest_name=guest_name, status=status,
+        check_in=check_in, check_out=check_in + timedelta(days=nights),
+    )
+
+
+class AvailabilityTests(TestCase):
+    def setUp(self):
+        self.booked = make_room("Booked")
+        self.free = make_room("Free")
+        self.start = timezone.now() + timedelta(days=10)
+        make_booking(self.booked, self.start)
+
+    def test_available_rooms_is_one_query(self):
+        with self.assertNumQueries(1):
+            rooms = list(available_rooms_between(self.start, self.start + timedelta(days=1)))
+        self.assertEqual(rooms, [self.free])
+
+    def test_cancelled_bookings_do_not_block(self):
+        Booking.objects.update(status=BookingStatus.CANCELLED)
+        rooms = available_rooms_between(self.start, self.start + timedelta(days=1))
+        self.assertEqual(set(rooms), {self.booked, self.free})
+
+    def test_checked_in_guests_block_their_room(self):
+        Booking.objects.update(status=BookingStatus.CHECKED_IN)
+        rooms = available_rooms_between(self.start, self.start + timedelta(days=1))
+        self.assertEqual(list(rooms), [self.free])
+
+    def test_check_availability_page(self):
+        response = self.client.get("/book/check/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.context["available_rooms"]), {self.booked, self.free})
+
+        day = timezone.localdate(self.start)
+        response = self.client.post("/book/check/", {"check_in": day, "check_out": day + timedelta(days=1)})
+        self.assertEqual(response.context["available_rooms"], [self.free])
+        self.assertContains(response, "Free")
+
+    @skipUnless(connection.vendor == "sqlite", "Checks SQLite's query plan")
+    def test_live_queries_use_the_partial_indexes(self):
+        start = self.start
+        conflict = Booking.objects.filter(IS_LIVE, room=self.booked, check_in__lt=start, check_out__gt=start)
+        self.assertIn("booking_live_room", conflict.explain())
+        self.assertIn("order_open", Order.objects.filter(IS_OPEN).order_by("ordered_at").explain())
+
+
+class StatusTests(TestCase):
+    def setUp(self):
+        self.booking = make_booking(make_room(), timezone.now() + timedelta(days=3))
+
+    def test_saves_follow_the_transition_table(self):
+        self.booking.status = BookingStatus.CHECKED_IN
+        self.booking.save()
+        self.booking.status = BookingStatus.CANCELLED
+        with self.assertRaises(states.InvalidTransition):
+            self.booking.save()
+        with self.assertRaises(ValidationError):
+            self.booking.full_clean()
+        self.assertEqual(Booking.objects.get().status, BookingStatus.CHECKED_IN)
+
+        stale = Booking.objects.get()
+        stale.status = BookingStatus.COMPLETED
+        stale.save()
+        self.assertEqual(stale.status_name, "completed")
+
+    def test_admin_actions_skip_rows_that_cannot_move(self):
+        checked_in = make_booking(make_room("Suite"), timezone.now(), status=BookingStatus.CHECKED_IN)
+        self.client.force_login(User.objects.create_superuser("boss", password="pw"))
+        self.client.post("/admin/booking/booking/", {
+            "action": "cancel_bookings", "_selected_action": [self.booking.pk, checked_in.pk],
+        })
+        self.assertEqual(dict(Booking.objects.values_list("pk", "status")), {
+            self.booking.pk: BookingStatus.CANCELLED, checked_in.pk: BookingStatus.CHECKED_IN,
+        })
+
+    def test_orders_only_move_forward(self):
+        item = MenuItem.objects.create(name="Tea", price=2, estimated_time=5)
+        order = Order.objects.create(user=User.objects.create_user("guest"), booking=self.booking, item=item)
+        order.status = OrderStatus.DELIVERED
+        order.save()
+        order.status = OrderStatus.PREPARING
+        with self.assertRaises(states.InvalidTransition):
+            order.save()
+
+    def test_literal_in_writes_codes_into_the_sql(self):
+        sql, params = Booking.objects.filter(IS_LIVE).query.sql_with_params()
+        self.assertIn('"status" IN (1, 2)', sql)
+        self.assertEqual(params, ())
+
+    def test_partial_index_leads_with_status_without_partial_index_support(self):
+        index = next(i for i in Booking._meta.indexes if i.name == "booking_live_room")
+        editor = connection.schema_editor()  # Only renders SQL; nothing is run.
+        self.assertIn("WHERE", str(index.create_sql(Booking, editor)))
+        with mock.patch.object(connection.features, "supports_partial_indexes", False):
+            sql = str(index.create_sql(Booking, editor))
+        self.assertNotIn("WHERE", sql)
+        self.assertIn('("status", "room_id", "check_in")', sql)
+
+
+class AsyncRoomDetailTests(TestCase):
+    def setUp(self):
+        self.room = make_room()
+        self.user = User.objects.create_user("alice", password="pw")
+        Review.objects.create(room=self.room, user=self.user, text="Lovely")
+
+    async def test_room_detail_shows_reviews_and_booking(self):
+        booking = await Booking.objects.acreate(
+            room=self.room, guest_name="alice", status=BookingStatus.CONFIRMED,
+            check_in=timezone.now() + timedelta(days=1), check_out=timezone.now() + timedelta(days=3),
+        )
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(f"/book/room/{self.room.id}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["existing_booking"], booking)
+        self.assertEqual([r.text for r in response.context["reviews"]], ["Lovely"])
+
+    async def test_room_detail_404(self):
+        response = await self.async_client.get("/book/room/999/")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_expired_bookings_are_completed(self):
+        past = await Booking.objects.acreate(
+            room=self.room, guest_name="bob", status=BookingStatus.CONFIRMED,
+            check_in=timezone.now() - timedelta(days=3), check_out=timezone.now() - timedelta(days=1),
+        )
+        await self.async_client.get(f"/book/room/{self.room.id}/")
+        await past.arefresh_from_db()
+        self.assertEqual(past.status, BookingStatus.COMPLETED)
+
+    async def test_sweep_skips_the_locking_update_when_nothing_is_due(self):
+        from booking import views
+        with mock.patch.object(views, "_complete_bookings") as complete:
+            await views.aexpire_old_bookings()
+        complete.assert_not_called()
+
+
+class LoadTestTests(TestCase):
+    def test_double_bookings_reports_overlapping_live_bookings(self):
+        room = make_room()
+        start = timezone.now() + timedelta(days=5)
+        first = make_booking(room, start, nights=3)
+        second = make_booking(room, start + timedelta(days=2), status=BookingStatus.CHECKED_IN)
+        make_booking(room, start + timedelta(days=3), status=BookingStatus.CANCELLED)
+        make_booking(make_room("Other"), start)
+
+        self.assertEqual(set(loadtest.double_bookings()), {first, second})
+        self.assertEqual(list(loadtest.double_bookings(since_id=first.id)), [second])
+
+    def test_parse_mix(self):
+        self.assertEqual(loadtest.parse_mix("book=3, search"), {"book": 3, "search": 1})
+        with self.assertRaises(ValueError):
+            loadtest.parse_mix("checkout=1")
+
+
+class WorkerDashboardTests(TestCase):
+    def setUp(self):
+        self.worker = User.objects.create_user("desk", password="pw")
+        UserProfile.objects.create(user=self.worker, role="worker")
+        self.room = make_room()
+        self.now = timezone.now()
+        today = timezone.localtime(self.now).replace(hour=14, minute=0, second=0, microsecond=0)
+        self.arriving = make_booking(self.room, today, nights=2, guest_name="arriving")
+        self.leaving = make_booking(make_room("Suite"), today - timedelta(days=2, hours=3), nights=2,
+                                    status=BookingStatus.CHECKED_IN, guest_name="leaving")
+        self.later = make_booking(self.room, today + timedelta(days=5), guest_name="later")
+        item = MenuItem.objects.create(name="Tea", price=2, estimated_time=5)
+        self.order = Order.objects.create(user=self.worker, booking=self.leaving, item=item)
+
+    def test_only_workers_and_staff_get_in(self):
+        guest = User.objects.create_user("guest", password="pw")
+        UserProfile.objects.create(user=guest, role="customer")
+        self.client.force_login(guest)
+        self.assertEqual(self.client.get("/book/worker/").status_code, 403)
+        self.assertEqual(self.client.get("/book/worker/delta/?since=2026-01-01T00:00:00Z").status_code, 403)
+
+    def test_snapshot_is_one_query_per_list(self):
+        with self.assertNumQueries(4):
+            sections = dashboard.snapshot(self.now)
+        self.assertEqual(sections["arrivals"], [self.arriving])
+        self.assertEqual(sections["departures"], [self.leaving])
+        self.assertEqual(sections["in_house"], [self.leaving])
+        self.assertEqual(sections["orders"], [self.order])
+
+    def test_dashboard_renders_every_list(self):
+        self.client.force_login(self.worker)
+        response = self.client.get("/book/worker/")
+        self.assertContains(response, 'data-row="booking-%d"' % self.arriving.pk)
+        self.assertContains(response, 'data-row="order-%d"' % self.order.pk)
+        self.assertNotContains(response, 'data-row="booking-%d"' % self.later.pk)
+
+    def test_delta_returns_only_changed_rows_with_their_new_lists(self):
+        an_hour_ago = self.now - timedelta(hours=1)
+        Booking.objects.update(updated_at=an_hour_ago)
+        Order.objects.update(updated_at=an_hour_ago)
+        self.arriving.status = BookingStatus.CHECKED_IN
+        self.arriving.save()
+        self.order.status = OrderStatus.DELIVERED
+        self.order.save()
+
+        self.client.force_login(self.worker)
+        response = self.client.get("/book/worker/delta/", {"since": self.now.isoformat()})
+        rows = {row["id"]: row for row in response.json()["rows"]}
+        self.assertEqual(set(rows), {f"booking-{self.arriving.pk}", f"order-{self.order.pk}"})
+        self.assertEqual(rows[f"booking-{self.arriving.pk}"]["sections"], ["arrivals", "in_house"])
+        self.assertEqual(rows[f"order-{self.order.pk}"]["sections"], [])
+
+    def test_delta_from_another_day_asks_for_a_reload(self):
+        self.client.force_login(self.worker)
+        since = (self.now - timedelta(days=1)).isoformat()
+        self.assertEqual(self.client.get("/book/worker/delta/", {"since": since}).json(), {"reload": True})
+        self.assertEqual(self.client.get("/book/worker/delta/", {"since": "yesterday"}).status_code, 400)
+
+
+class HousekeepingTests(TestCase):
+    def setUp(self):
+        self.day = timezone.localdate() + timedelta(days=3)
+        self.morning = housekeeping.day_bounds(self.day)[0] + timedelta(hours=10)
+        self.worker = User.objects.create_user("maid", password="pw")
+        UserProfile.objects.create(user=self.worker, role="worker")
+        self.tight, self.loose, self.empty = make_room("Tight"), make_room("Loose"), make_room("Empty")
+        self.leaving_tight = make_booking(self.tight, self.morning - timedelta(days=2))
+        self.next_tight = make_booking(self.tight, self.morning + timedelta(hours=2))
+        self.leaving_loose = make_booking(self.loose, self.morning - timedelta(days=2))
+        self.next_loose = make_booking(self.loose, self.morning + timedelta(days=2))
+        self.leaving_empty = make_booking(self.empty, self.morning - timedelta(days=2))
+
+    def test_turnovers_pair_each_departure_with_the_next_arrival(self):
+        with self.assertNumQueries(1):
+            pairs = dict(housekeeping.turnovers(self.day))
+        self.assertEqual(pairs, {
+            self.leaving_tight: self.next_tight,
+            self.leaving_loose: self.next_loose,
+            self.leaving_empty: None,
+        })
+
+    def test_priority_is_minutes_until_the_next_arrival(self):
+        housekeeping.build_queue(self.day)
+        tasks = {task.room_id: task for task in HousekeepingTask.objects.all()}
+        self.assertEqual(tasks[self.tight.pk].priority, 120)
+        self.assertEqual(tasks[self.loose.pk].priority, 2 * 24 * 60)
+        self.assertEqual(tasks[self.empty.pk].priority, 7 * 24 * 60)
+        self.assertIsNone(tasks[self.empty.pk].ready_by)
+
+    def test_tasks_are_scheduled_in_priority_order_after_checkout(self):
+        housekeeping.build_queue(self.day)
+        tasks = list(HousekeepingTask.objects.order_by("scheduled_start"))
+        self.assertEqual([task.room_id for task in tasks], [self.tight.pk, self.loose.pk, self.empty.pk])
+        self.assertTrue(all(task.assigned_to_id == self.worker.pk for task in tasks))
+        self.assertEqual(tasks[0].scheduled_start, self.morning)
+        self.assertEqual(tasks[1].scheduled_start, self.morning + timedelta(minutes=45))
+
+    def test_rerun_is_idempotent_and_drops_cancelled_departures(self):
+        housekeeping.build_queue(self.day)
+        task = HousekeepingTask.objects.get(room=self.tight)
+        task.status = "in_progress"
+        task.save()
+        self.leaving_empty.status = BookingStatus.CANCELLED
+        self.leaving_empty.save()
+
+        counts = housekeeping.build_queue(self.day)
+        self.assertEqual((counts["created"], counts["updated"], counts["removed"]), (0, 2, 1))
+        self.assertEqual(HousekeepingTask.objects.get(pk=task.pk).status, "in_progress")
+        self.assertFalse(HousekeepingTask.objects.filter(room=self.empty).exists())
+
+    def test_build_queue_query_count_does_not_grow_with_rooms(self):
+        for i in range(20):
+            make_booking(make_room(f"Extra {i}"), self.morning - timedelta(days=1), nights=1)
+        # Savepoint, existing tasks, the sweep, workers, one insert, release.
+        with self.assertNumQueries(6):
+            counts = housekeeping.build_queue(self.day)
+        self.assertEqual(counts["tasks"], 23)
+
+
+class WaitlistTests(TestCase):
+    def setUp(self):
+        self.room = make_room()
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=30)
+        self.booking = make_booking(self.room, self.start, nights=4)
+        self.first = User.objects.create_user("first")
+        self.second = User.objects.create_user("second")
+        # Thousands of entries across other rooms and dates that a promotion must not wade through.
+        others = [make_room(f"Other {i}") for i in range(10)]
+        WaitlistEntry.objects.bulk_create([
+            WaitlistEntry(
+                room=self.room if i % 11 == 0 else others[i % 10], user=self.second,
+                check_in=self.start + timedelta(days=40 + i % 300), check_out=self.start + timedelta(days=42 + i % 300),
+            )
+            for i in range(5000)
+        ])
+
+    def test_cancellation_promotes_the_first_entry_that_fits(self):
+        too_long = waitlist.join(self.second, self.room, self.start, self.start + timedelta(days=6))
+        make_booking(self.room, self.start + timedelta(days=5), nights=2)
+        fits = waitlist.join(self.first, self.room, self.start + timedelta(days=1), self.start + timedelta(days=3))
+        later = waitlist.join(self.second, self.room, self.start + timedelta(days=2), self.start + timedelta(days=4))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.status = BookingStatus.CANCELLED
+            self.booking.save()
+
+        statuses = dict(WaitlistEntry.objects.filter(pk__in=[too_long.pk, fits.pk, later.pk]).values_list("pk", "status"))
+        self.assertEqual(statuses, {too_long.pk: "waiting", fits.pk: "promoted", later.pk: "waiting"})
+        fits.refresh_from_db()
+        self.assertEqual((fits.booking.guest_name, fits.booking.status), ("first", BookingStatus.CONFIRMED))
+
+    def test_shortened_booking_promotes_into_the_freed_tail(self):
+        entry = waitlist.join(self.first, self.room, self.start + timedelta(days=2), self.start + timedelta(days=4))
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking.objects.get(pk=self.booking.pk)
+            booking.check_out = self.start + timedelta(days=2)
+            booking.save()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, "promoted")
+
+    def test_promotion_query_count_does_not_depend_on_the_waitlist_size(self):
+        waitlist.join(self.first, self.room, self.start, self.start + timedelta(days=1))
+        Booking.objects.filter(pk=self.booking.pk).update(status=BookingStatus.CANCELLED)
+        # Savepoint, room lock, candidates, live bookings, insert, entry update, notification, event, release.
+        with self.assertNumQueries(9):
+            promoted = waitlist.promote(self.room.pk, self.start, self.start + timedelta(days=4))
+        self.assertEqual(len(promoted), 1)
+
+    @skipUnless(connection.vendor == "sqlite", "Checks SQLite's query plan")
+    def test_candidates_use_the_overlap_index(self):
+        plan = waitlist.candidates(self.room.pk, self.start, self.start + timedelta(days=4)).explain()
+        self.assertIn("waitlist_overlap", plan)
+
+    def test_conflicting_booking_request_can_join_the_waitlist(self):
+        self.client.force_login(self.first)
+        check_in = timezone.localtime(self.start + timedelta(days=1))
+        response = self.client.post("/book/book/private/", {
+            "room_id": self.room.pk,
+            "check_in": check_in.strftime("%Y-%m-%dT%H:%M"),
+            "check_out": (check_in + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M"),
+            "waitlist": "1",
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(WaitlistEntry.objects.filter(user=self.first, room=self.room, status="waiting").exists())
+
+
+class AvailabilityFeedTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        noon = housekeeping.day_bounds(self.today)[0] + timedelta(hours=14)
+        self.busy, self.free = make_room("Busy", price=120), make_room("Free", price=80)
+        make_booking(self.busy, noon + timedelta(days=1), nights=2)
+        make_booking(self.busy, noon + timedelta(days=2), nights=3)
+        make_booking(self.busy, noon + timedelta(days=8), status=BookingStatus.CANCELLED)
+
+    def test_sweep_marks_nights_from_check_in_until_check_out(self):
+        with self.assertNumQueries(3):
+            rows = {room_id: taken for room_id, _, taken in feed.availability(self.today, 10)}
+        self.assertEqual(rows[self.busy.pk], [False, True, True, True, True, False, False, False, False, False])
+        self.assertEqual(rows[self.free.pk], [False] * 10)
+
+    def test_since_only_sends_rooms_with_changed_bookings(self):
+        Booking.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        since = timezone.now() - timedelta(minutes=1)
+        self.assertEqual(list(feed.availability(self.today, 5, since=since)), [])
+        make_booking(self.free, housekeeping.day_bounds(self.today)[0] + timedelta(days=3, hours=14))
+        self.assertEqual([row[0] for row in feed.availability(self.today, 5, since=since)], [self.free.pk])
+
+    @override_settings(CHANNEL_FEED_TOKEN="s3cret")
+    def test_endpoint_streams_jsonl_and_csv_to_token_holders(self):
+        url = "/book/feed/availability/"
+        self.assertEqual(self.client.get(url).status_code, 403)
+        auth = {"HTTP_AUTHORIZATION": "Bearer s3cret"}
+
+        response = self.client.get(url, {"days": 3}, **auth)
+        self.assertTrue(response.streaming)
+        self.assertIn("X-Feed-Cursor", response)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1], {"room": self.busy.pk, "date": str(self.today + timedelta(days=1)),
+                                   "available": False, "price": "120.00"})
+
+        response = self.client.get(url, {"days": 3, "format": "csv"}, **auth)
+        body = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(body[0], "room,date,available,price")
+        self.assertEqual(len(body), 7)
+        self.assertEqual(self.client.get(url, {"days": 0}, **auth).status_code, 400)
+
+    @override_settings(CHANNEL_FEED_TOKEN="s3cret")
+    async def test_asgi_streams_without_buffering_the_whole_feed(self):
+        response = await self.async_client.get(
+            "/book/feed/availability/", {"days": 3}, headers={"authorization": "Bearer s3cret"},
+        )
+        # An async iterator is sent chunk by chunk; a sync one would be listed first.
+        self.assertTrue(response.is_async)
+        pulled = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(pulled), 2)  # one chunk per room
+        self.assertEqual(b"".join(pulled).decode().count("\n"), 6)
+
+
+@skipUnless(importlib.util.find_spec("numpy"), "the pricing job needs NumPy")
+class PricingTests(TestCase):
+    def setUp(self):
+        from booking import pricing
+        self.pricing = pricing
+        self.today = timezone.localdate()
+        self.suites = [make_room(f"Suite {i}", room_type="Suite", price=200) for i in range(2)]
+        self.standard = make_room("Standard 1", room_type="Standard", price=100)
+        # Eight weeks of history: both suites full every Saturday night, booked ten days ahead.
+        for weeks in range(8):
+            saturday = self.today - timedelta(days=(self.today.weekday() - 5) % 7 + 7 * weeks)
+            for room in self.suites:
+                self.stay(room, saturday, created=saturday - timedelta(days=10), status=BookingStatus.COMPLETED)
+
+    def stay(self, room, night, created=None, status=BookingStatus.CONFIRMED):
+        check_in = housekeeping.day_bounds(night)[0] + timedelta(hours=14)
+        booking = make_booking(room, check_in, nights=1, status=status)
+        Booking.objects.filter(pk=booking.pk).update(
+            check_out=check_in + timedelta(hours=21), created_at=created or timezone.now(),
+        )
+        return booking
+
+    def test_forecast_follows_day_of_week_history_and_the_books(self):
+        self.stay(self.standard, self.today + timedelta(days=1))
+        with self.assertNumQueries(2):
+            types, dates, rooms, on_books, occupancy = self.pricing.forecast(self.today, history_days=70, horizon_days=21)
+        self.assertEqual(types, ["Standard", "Suite"])
+        self.assertEqual(list(rooms), [1, 2])
+        suite = occupancy[types.index("Suite")]
+        saturdays = [i for i, d in enumerate(dates) if d.weekday() == 5]
+        # Beyond the usual ten-day lead the history decides; inside it, an empty book is behind pace.
+        self.assertTrue(all(suite[i] > 0.9 for i in saturdays if i > 10))
+        self.assertTrue(all(suite[i] < 0.1 for i in saturdays if i < 10))
+        self.assertTrue(all(suite[i] < 0.1 for i, d in enumerate(dates) if d.weekday() == 1))
+        self.assertEqual(on_books[types.index("Standard"), 1], 1)
+        self.assertEqual(occupancy[types.index("Standard"), 1], 1.0)
+
+    def test_factors_are_clamped_and_rounded(self):
+        import numpy as np
+        self.assertEqual(list(self.pricing.factors(np.array([0.0, 0.7, 0.83, 1.0]))), [0.7, 1.0, 1.15, 1.3])
+
+    def test_rerun_refreshes_pending_rows_and_keeps_reviewed_ones(self):
+        counts = self.pricing.build_suggestions(self.today, history_days=70, horizon_days=14)
+        self.assertEqual((counts["created"], counts["types"], counts["nights"]), (28, 2, 14))
+        RateSuggestion.objects.filter(room_type="Suite", date=self.today).update(status="approved", factor="1.40")
+        counts = self.pricing.build_suggestions(self.today, history_days=70, horizon_days=14)
+        self.assertEqual((counts["created"], counts["updated"], counts["reviewed"]), (0, 27, 1))
+        self.assertEqual(RateSuggestion.objects.get(room_type="Suite", date=self.today).factor, Decimal("1.40"))
+
+    def test_admin_edits_factors_only_while_pending(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        pending, approved = (
+            RateSuggestion.objects.create(
+                room_type="Suite", date=self.today + timedelta(days=i), rooms=2, on_books=0,
+                forecast_occupancy=0.9, factor=Decimal("1.25"), status=status,
+            )
+            for i, status in enumerate(["pending", "approved"])
+        )
+        url = "/admin/booking/ratesuggestion/{}/change/"
+        self.assertContains(self.client.get(url.format(pending.pk)), 'name="factor"')
+        self.assertNotContains(self.client.get(url.format(approved.pk)), 'name="factor"')
+        self.assertNotContains(self.client.get("/admin/booking/ratesuggestion/"), 'name="form-0-factor"')
+
+    def test_channel_feed_prices_nights_with_approved_factors(self):
+        RateSuggestion.objects.create(
+            room_type="Suite", date=self.today + timedelta(days=1), rooms=2, on_books=0,
+            forecast_occupancy=0.9, factor=Decimal("1.25"), status="approved",
+        )
+        RateSuggestion.objects.create(
+            room_type="Suite", date=self.today + timedelta(days=2), rooms=2, on_books=0,
+            forecast_occupancy=0.9, factor=Decimal("1.50"), status="pending",
+        )
+        rates = {room_id: prices for room_id, prices, _ in feed.availability(self.today, 3)}
+        self.assertEqual(rates[self.suites[0].pk], [Decimal("200"), Decimal("250.00"), Decimal("200")])
+        self.assertEqual(rates[self.standard.pk], [Decimal("100")] * 3)
+
+    def test_forecast_reads_archived_history(self):
+        before = self.pricing.forecast(self.today, history_days=70, horizon_days=21)[4]
+        counts = archive.archive(before=timezone.now())
+        self.assertEqual(counts["bookings"], 16)
+        self.assertFalse(Booking.objects.exists())
+        with self.assertNumQueries(2):
+            after = self.pricing.forecast(self.today, history_days=70, horizon_days=21)[4]
+        self.assertEqual(before.tolist(), after.tolist())
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.room = make_room()
+        self.user = User.objects.create_user("guest")
+        self.item = MenuItem.objects.create(name="Tea", price=2, estimated_time=5)
+        long_ago = timezone.now() - timedelta(days=400)
+        self.old = [make_booking(self.room, long_ago + timedelta(days=3 * i), status=BookingStatus.COMPLETED)
+                    for i in range(5)]
+        self.delivered = Order.objects.create(
+            user=self.user, booking=self.old[0], item=self.item, quantity=2, status=OrderStatus.DELIVERED,
+        )
+
+    def test_old_completed_stays_move_with_their_orders(self):
+        open_order = make_booking(self.room, timezone.now() - timedelta(days=380), status=BookingStatus.COMPLETED)
+        Order.objects.create(user=self.user, booking=open_order, item=self.item)
+        recent = make_booking(self.room, timezone.now() - timedelta(days=30), status=BookingStatus.COMPLETED)
+        cancelled = make_booking(self.room, timezone.now() - timedelta(days=390), status=BookingStatus.CANCELLED)
+        live = make_booking(self.room, timezone.now() + timedelta(days=5))
+        task = HousekeepingTask.objects.create(
+            room=self.room, booking=self.old[1], date=self.old[1].check_out.date(),
+            vacated_at=self.old[1].check_out, priority=60,
+        )
+        review = Review.objects.create(room=self.room, user=self.user, text="Lovely")
+
+        counts = archive.archive()
+
+        self.assertEqual((counts["bookings"], counts["orders"]), (5, 1))
+        self.assertEqual(
+            set(Booking.objects.values_list("id", flat=True)), {open_order.pk, recent.pk, cancelled.pk, live.pk},
+        )
+        cold = ArchivedBooking.objects.get(pk=self.old[0].pk)
+        self.assertEqual((cold.room, cold.status_name, cold.total_price), (self.room, "completed", self.old[0].total_price))
+        moved = ArchivedOrder.objects.get(pk=self.delivered.pk)
+        self.assertEqual((moved.booking, moved.quantity), (cold, 2))
+        self.assertEqual(list(cold.orders.all()), [moved])
+        self.assertFalse(Order.objects.filter(pk=self.delivered.pk).exists())
+        self.assertFalse(HousekeepingTask.objects.filter(pk=task.pk).exists())
+        self.assertTrue(Review.objects.filter(pk=review.pk).exists())
+
+    def test_each_chunk_is_its_own_transaction(self):
+        real = ArchivedOrder.objects.bulk_create
+        calls = []
+
+        def fail_second_chunk(objs, *args, **kwargs):
+            calls.append(objs)
+            if len(calls) == 2:
+                raise RuntimeError("disk full")
+            return real(objs, *args, **kwargs)
+
+        with mock.patch.object(ArchivedOrder.objects, "bulk_create", side_effect=fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                archive.archive(chunk_size=2)
+        # The first chunk committed; the failed one rolled back whole and a rerun finishes.
+        self.assertEqual(ArchivedBooking.objects.count(), 2)
+        self.assertEqual((Booking.objects.count(), ArchivedOrder.objects.count()), (3, 1))
+        counts = archive.archive(chunk_size=2)
+        self.assertEqual((counts["chunks"], counts["bookings"], counts["orders"]), (2, 3, 0))
+        self.assertFalse(Booking.objects.exists())
+
+    def test_read_through_returns_hot_and_archived_rows(self):
+        archive.archive(max_chunks=1, chunk_size=2)
+        with self.assertNumQueries(1):
+            ids = sorted(pk for (pk,) in archive.read_through(("id",), room=self.room))
+        self.assertEqual(ids, [booking.pk for booking in self.old])
+
+    def test_archive_tables_mirror_the_live_ones(self):
+        # archive_chunk copies rows field by field; a new column on Booking or Order needs one here too.
+        def columns(model):
+            return {field.attname for field in model._meta.concrete_fields} - {"archived_at"}
+        self.assertEqual(columns(ArchivedBooking), columns(Booking))
+        self.assertEqual(columns(ArchivedOrder), columns(Order))
+
+    def test_admin_lists_the_archive(self):
+        archive.archive()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        response = self.client.get("/admin/booking/archivedbooking/", {"q": "guest"})
+        self.assertContains(response, "5 results")
+        response = self.client.get(f"/admin/booking/archivedbooking/{self.old[0].pk}/change/")
+        self.assertContains(response, "Tea")
+        self.assertEqual(self.client.get("/admin/menu/archivedorder/").status_code, 200)
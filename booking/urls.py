@@ -10,4 +10,7 @@ urlpatterns = [
     path("room/<int:room_id>/", room_detail, name="room_detail"),
     path("extend-booking/", views.extend_booking, name="extend_booking"),
     path("submit-review/", views.submit_review, name="submit_review"),
+    path("worker/", views.worker_dashboard, name="worker_dashboard"),
+    path("worker/delta/", views.worker_dashboard_delta, name="worker_dashboard_delta"),
+    path("feed/availability/", views.availability_feed, name="availability_feed"),
     ]
\ No newline at end of file
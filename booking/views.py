@@ -1,13 +1,28 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.utils.dateparse import parse_datetime
 from django.utils import timezone
 from datetime import datetime
 
-from booking.models import Room, Booking, Review
+from accounts.decorators import is_worker, worker_required
+from booking import dashboard, feed, waitlist
+from booking.housekeeping import day_bounds
+from booking.models import IS_LIVE, Room, Booking, BookingStatus, Review
 from .forms import PrivateBookingForm, AvailabilityForm
+from core import events, outbox
+from core.db_router import PRIMARY, pinned, read_from_replica, replica_alias
+from core.views import alist
 
 import logging
 logger = logging.getLogger(__name__)
@@ -15,14 +30,44 @@ logger = logging.getLogger(__name__)
 # -------------------------------
 # ⏳ Expire Old Bookings
 # -------------------------------
+def _due_bookings(now):
+    return Booking.objects.using(PRIMARY).filter(check_out__lt=now, status=BookingStatus.CONFIRMED)
+
+
+def _complete_bookings(due, now):
+    with transaction.atomic(using=PRIMARY):
+        expired = list(Booking.objects.using(PRIMARY).select_for_update().filter(
+            id__in=due, status=BookingStatus.CONFIRMED
+        ).values_list("id", "status"))
+        Booking.objects.filter(id__in=[pk for pk, _ in expired]).update(status=BookingStatus.COMPLETED, updated_at=now)
+        events.record_transitions("booking", expired, BookingStatus.COMPLETED, source="expiry_sweep", when=now)
+
+
 def expire_old_bookings():
-    expired = Booking.objects.filter(
-        check_out__lt=timezone.now(),
-        status="confirmed"
-    )
-    for booking in expired:
-        booking.status = "completed"
-        booking.save()
+    now = timezone.now()
+    # Usually nothing is due; only lock (by primary key) when something is.
+    due = list(_due_bookings(now).values_list("id", flat=True))
+    if due:
+        _complete_bookings(due, now)
+
+
+async def aexpire_old_bookings():
+    # Same sweep for the async views. The usual "nothing due" answer is one async
+    # query; the locking update and event write only run in a thread when needed.
+    now = timezone.now()
+    due = [pk async for pk in _due_bookings(now).values_list("id", flat=True)]
+    if due:
+        await sync_to_async(_complete_bookings)(due, now)
+
+
+def available_rooms_between(check_in, check_out):
+    """Rooms with no live (confirmed or checked-in) booking overlapping [check_in, check_out), as one query."""
+    overlapping = Booking.objects.filter(
+        IS_LIVE,
+        check_in__lt=check_out,
+        check_out__gt=check_in,
+    ).values("room_id")
+    return Room.objects.exclude(id__in=overlapping)
 
 # -------------------------------
 # 📄 Public Booking Form
@@ -54,25 +99,35 @@ def private_booking(request):
             return redirect(request.META.get("HTTP_REFERER", "private_booking"))
 
         conflict = Booking.objects.filter(
+            IS_LIVE,
             room=room,
             check_in__lt=check_out_date,
             check_out__gt=check_in_date,
-            status="confirmed"
         )
         if conflict.exists():
+            if request.POST.get("waitlist"):
+                try:
+                    waitlist.join(request.user, room, check_in_date, check_out_date, guest_count, special_requests)
+                except ValueError as e:
+                    messages.error(request, f"❌ {e}")
+                else:
+                    messages.info(request, "🕒 Those dates are taken; you're on the waitlist and will be booked automatically if they free up.")
+                return redirect(request.META.get("HTTP_REFERER", "private_booking"))
             messages.error(request, "❌ This room is already booked for the selected dates.")
             return redirect(request.META.get("HTTP_REFERER", "private_booking"))
 
-        booking = Booking.objects.create(
-            room=room,
-            guest_name=request.user.username,
-            check_in=check_in_date,
-            check_out=check_out_date,
-            special_requests=special_requests,
-            status="confirmed"
-        )
-        booking.total_price = room.price * guest_count
-        booking.save()
+        with transaction.atomic():
+            booking = Booking.objects.create(
+                room=room,
+                guest_name=request.user.username,
+                check_in=check_in_date,
+                check_out=check_out_date,
+                special_requests=special_requests,
+                status=BookingStatus.CONFIRMED
+            )
+            booking.total_price = room.price * guest_count
+            booking.save()
+            outbox.booking_confirmed(request.user, booking)
 
         return redirect("booking_success")
 
@@ -90,10 +145,10 @@ def private_booking(request):
             filtered_rooms = []
             for room in Room.objects.all():
                 overlapping = Booking.objects.filter(
+                    IS_LIVE,
                     room=room,
                     check_in__lt=check_out,
                     check_out__gt=check_in,
-                    status="confirmed"
                 )
                 if not overlapping.exists():
                     filtered_rooms.append(room)
@@ -113,34 +168,25 @@ def private_booking(request):
 # -------------------------------
 # 📅 Availability Check
 # -------------------------------
-def check_availability(request):
-    expire_old_bookings()
+@read_from_replica
+async def check_availability(request):
+    await aexpire_old_bookings()
 
     form = AvailabilityForm(request.POST or None)
-    available_rooms = Room.objects.all()
+    rooms = Room.objects.all()
 
     if request.method == "POST":
         if "clear" in request.POST:
             form = AvailabilityForm()
-            available_rooms = Room.objects.all()
         elif form.is_valid():
-            check_in = form.cleaned_data["check_in"]
-            check_out = form.cleaned_data["check_out"]
+            # The form gives dates; compare from local midnight of each.
+            rooms = available_rooms_between(
+                day_bounds(form.cleaned_data["check_in"])[0], day_bounds(form.cleaned_data["check_out"])[0]
+            )
 
-            filtered_rooms = []
-            for room in Room.objects.all():
-                overlapping = Booking.objects.filter(
-                    room=room,
-                    check_in__lt=check_out,
-                    check_out__gt=check_in,
-                    status="confirmed"
-                )
-                if not overlapping.exists():
-                    filtered_rooms.append(room)
-
-            available_rooms = filtered_rooms
+    available_rooms = await alist(rooms)
 
-    return render(request, "customer/check_availability.html", {
+    return await sync_to_async(render)(request, "customer/check_availability.html", {
         "form": form,
         "available_rooms": available_rooms
     })
@@ -155,19 +201,26 @@ def booking_success(request):
 # -------------------------------
 # 🏨 Room Detail View
 # -------------------------------
-def room_detail(request, room_id):
-    expire_old_bookings()
-
-    room = get_object_or_404(Room, id=room_id)
-    reviews = Review.objects.filter(room=room).order_by("-created_at")[:5]
-
-    existing_booking = Booking.objects.filter(
-        room=room,
-        guest_name=request.user.username,
-        status__in=["confirmed", "checked_in"]
-    ).order_by("-check_out").first()
+@read_from_replica
+async def room_detail(request, room_id):
+    await aexpire_old_bookings()
+    user = await request.auser()
+
+    # Room (+ images), reviews and the guest's booking only need room_id, so fetch them together.
+    # The guest's own booking may be seconds old, so it always comes from the primary.
+    room, reviews, existing_booking = await asyncio.gather(
+        Room.objects.prefetch_related("images").filter(id=room_id).afirst(),
+        alist(Review.objects.filter(room_id=room_id).select_related("user").order_by("-created_at")[:5]),
+        Booking.objects.using(PRIMARY).filter(
+            IS_LIVE,
+            room_id=room_id,
+            guest_name=user.username,
+        ).order_by("-check_out").afirst(),
+    )
+    if room is None:
+        raise Http404("No Room matches the given query.")
 
-    return render(request, "customer/room_detail.html", {
+    return await sync_to_async(render)(request, "customer/room_detail.html", {
         "room": room,
         "reviews": reviews,
         "existing_booking": existing_booking,
@@ -205,17 +258,19 @@ def extend_booking(request):
                 return redirect("room_detail", room_id=room.id)
 
             conflict = Booking.objects.filter(
+                IS_LIVE,
                 room=room,
                 check_in__lt=new_checkout_dt,
                 check_out__gt=booking.check_out,
-                status="confirmed"
             ).exclude(id=booking.id)
 
             if conflict.exists():
                 messages.error(request, "❌ Room is not available for that extension.")
             else:
-                booking.check_out = new_checkout_dt
-                booking.save()
+                with transaction.atomic():
+                    booking.check_out = new_checkout_dt
+                    booking.save()
+                    outbox.booking_extended(request.user, booking)
                 messages.success(request, "✅ Booking extended successfully.")
 
         except Exception as e:
@@ -237,7 +292,7 @@ def submit_review(request):
         booking = Booking.objects.filter(
             room=room,
             guest_name=request.user.username,
-            status="checked_in"
+            status=BookingStatus.CHECKED_IN
         ).first()
 
         if not booking:
@@ -250,4 +305,80 @@ def submit_review(request):
             text=text
         )
         messages.success(request, "✅ Review submitted!")
-        return redirect("room_detail", room_id=room.id)
\ No newline at end of file
+        return redirect("room_detail", room_id=room.id)
+
+# -------------------------------
+# 🛎️ Worker Dashboard
+# -------------------------------
+@worker_required
+def worker_dashboard(request):
+    now = timezone.now()
+    return render(request, "worker/worker_dashboard.html", {
+        "sections": dashboard.snapshot(now),
+        "today": timezone.localdate(now),
+        "cursor": now.isoformat(),
+    })
+
+
+@worker_required
+def worker_dashboard_delta(request):
+    try:
+        since = parse_datetime(request.GET.get("since", ""))
+    except ValueError:
+        since = None
+    if since is None:
+        return JsonResponse({"error": "since must be an ISO timestamp"}, status=400)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    now = timezone.now()
+    if timezone.localdate(since) != timezone.localdate(now):
+        # A new day changes every list; let the page reload.
+        return JsonResponse({"reload": True})
+
+    rows = []
+    for kind, obj, sections in dashboard.changes(since, now):
+        rows.append({
+            "id": f"{kind}-{obj.pk}",
+            "sections": sections,
+            "html": render_to_string("worker/dashboard_row.html", {"kind": kind, "obj": obj}) if sections else "",
+        })
+    return JsonResponse({"cursor": now.isoformat(), "rows": rows})
+
+
+# -------------------------------
+# 📡 Channel Manager Feed
+# -------------------------------
+def availability_feed(request):
+    if not (feed.token_ok(request) or is_worker(request.user)):
+        raise PermissionDenied
+
+    fmt = request.GET.get("format", "jsonl")
+    if fmt not in feed.FORMATS:
+        return JsonResponse({"error": f"format must be one of {', '.join(feed.FORMATS)}"}, status=400)
+    try:
+        days = int(request.GET.get("days", getattr(settings, "CHANNEL_FEED_DAYS", 365)))
+        start = datetime.strptime(request.GET["start"], "%Y-%m-%d").date() if "start" in request.GET else timezone.localdate()
+    except ValueError:
+        return JsonResponse({"error": "days must be a number and start a YYYY-MM-DD date"}, status=400)
+    if not 1 <= days <= getattr(settings, "CHANNEL_FEED_MAX_DAYS", 730):
+        return JsonResponse({"error": "days is out of range"}, status=400)
+    since = None
+    if "since" in request.GET:
+        try:
+            since = parse_datetime(request.GET["since"])
+        except ValueError:
+            since = None
+        if since is None:
+            return JsonResponse({"error": "since must be an ISO timestamp"}, status=400)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+    # The rows are read while streaming, after this view returns, so the alias is picked here.
+    using = PRIMARY if pinned(request) else (replica_alias() or PRIMARY)
+    stream = feed.alines if isinstance(request, ASGIRequest) else feed.lines
+    response = StreamingHttpResponse(
+        stream(start, days, fmt=fmt, since=since, using=using),
+        content_type="text/csv" if fmt == "csv" else "application/x-ndjson",
+    )
+    response["X-Feed-Cursor"] = feed.cursor(timezone.now()).isoformat()
+    return response
@@ -0,0 +1,137 @@
+"""
+Waitlist for rooms whose dates are taken.
+
+When ``private_booking`` hits a conflict, the guest can ``join`` the
+waitlist for that room and date range. A confirmed or checked-in booking
+frees nights when it is cancelled, shortened, moved or deleted. Then
+``promote(room_id, start, end)`` books the waiting entries that now fit, in
+the order they joined.
+
+Only entries that overlap the freed span can have become bookable. A stay
+is at most ``WAITLIST_MAX_NIGHTS`` long, so those entries have a check-in in
+``[start - max stay, end)``. The ``waitlist_overlap`` index on
+``(room, status, check_in)`` covers exactly that range, so a promotion reads
+the few entries around the freed nights rather than the whole list.
+
+Promotion is atomic. The room row and the candidate entries are locked,
+the room's live bookings over the candidates' span are read once, and each
+entry that fits is booked, marked promoted and notified (core/outbox.py)
+in the same transaction. Their ``created`` events (core/events.py) go in
+as one insert.
+
+Saves and deletes are picked up by signals and promoted on commit.
+``Booking`` remembers the span it was loaded with, so no extra query is
+needed to see what changed. Queryset ``update()`` bypasses signals; call
+``promote`` for the spans it frees (the admin's cancel action does).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from booking.models import IS_LIVE, LIVE_STATUSES, Booking, BookingStatus, Room, WaitlistEntry
+from core import events, outbox
+
+
+def max_stay():
+    return timedelta(days=getattr(settings, "WAITLIST_MAX_NIGHTS", 30))
+
+
+def join(user, room, check_in, check_out, guest_count=1, special_requests=""):
+    """Put ``user`` on the waitlist for ``room`` over ``[check_in, check_out)``; returns the entry."""
+    if check_out - check_in > max_stay():
+        raise ValueError(f"Waitlisted stays are limited to {max_stay().days} nights.")
+    entry, _ = WaitlistEntry.objects.get_or_create(
+        room=room, user=user, check_in=check_in, check_out=check_out, status="waiting",
+        defaults={"guest_count": guest_count, "special_requests": special_requests},
+    )
+    return entry
+
+
+def candidates(room_id, start, end):
+    """Waiting entries for ``room_id`` that overlap ``[start, end)``, first come first served."""
+    return WaitlistEntry.objects.filter(
+        room_id=room_id,
+        status="waiting",
+        check_in__gte=max(start - max_stay(), timezone.now()),
+        check_in__lt=end,
+        check_out__gt=start,
+    ).order_by("created_at", "id")
+
+
+@transaction.atomic
+def promote(room_id, start, end):
+    """Book every waiting entry that now fits in ``room_id``; returns the promoted entries."""
+    room = Room.objects.select_for_update().filter(pk=room_id).first()
+    if room is None:
+        return []
+    entries = list(candidates(room_id, start, end).select_for_update().select_related("user"))
+    if not entries:
+        return []
+
+    busy = list(Booking.objects.filter(
+        IS_LIVE,
+        room_id=room_id,
+        check_in__lt=max(entry.check_out for entry in entries),
+        check_out__gt=min(entry.check_in for entry in entries),
+    ).values_list("check_in", "check_out"))
+
+    promoted = []
+    with events.buffered():
+        for entry in entries:
+            if any(taken_in < entry.check_out and taken_out > entry.check_in for taken_in, taken_out in busy):
+                continue
+            booking = Booking(
+                room=room,
+                guest_name=entry.user.username,
+                check_in=entry.check_in,
+                check_out=entry.check_out,
+                special_requests=entry.special_requests,
+                status=BookingStatus.CONFIRMED,
+            )
+            booking.save()
+            entry.status, entry.booking = "promoted", booking
+            entry.save(update_fields=["status", "booking"])
+            outbox.waitlist_promoted(entry.user, booking)
+            busy.append((entry.check_in, entry.check_out))
+            promoted.append(entry)
+    return promoted
+
+
+def freed_spans(booking):
+    """``(room_id, start, end)`` for each stretch of live nights this save gave up."""
+    loaded = getattr(booking, "_loaded_span", None)
+    if loaded is None:
+        return []
+    room_id, status, check_in, check_out = loaded
+    if status not in LIVE_STATUSES or check_in is None or check_out is None:
+        return []
+    if booking.status not in LIVE_STATUSES or booking.room_id != room_id:
+        return [(room_id, check_in, check_out)]
+    spans = []
+    if booking.check_in > check_in:
+        spans.append((room_id, check_in, min(booking.check_in, check_out)))
+    if booking.check_out < check_out:
+        spans.append((room_id, max(booking.check_out, check_in), check_out))
+    return spans
+
+
+def _promote_on_commit(spans):
+    for span in spans:
+        transaction.on_commit(lambda span=span: promote(*span))
+
+
+def _booking_saved(sender, instance, **kwargs):
+    _promote_on_commit(freed_spans(instance))
+
+
+def _booking_deleted(sender, instance, **kwargs):
+    if instance.status in LIVE_STATUSES:
+        _promote_on_commit([(instance.room_id, instance.check_in, instance.check_out)])
+
+
+def connect_signals():
+    post_save.connect(_booking_saved, sender=Booking, dispatch_uid="waitlist_booking_saved")
+    post_delete.connect(_booking_deleted, sender=Booking, dispatch_uid="waitlist_booking_deleted")
@@ -1,3 +1,22 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Event
+
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    list_display = ["occurred_at", "entity", "entity_id", "kind", "from_status", "to_status", "actor_id", "source"]
+    list_filter = ["entity", "kind", "source"]
+    search_fields = ["=entity_id"]
+    date_hierarchy = "occurred_at"
+    show_full_result_count = False  # COUNT(*) over millions of rows on every page
+
+    # The log is append-only; it is written by core/events.py, never by hand.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import checks  # noqa: F401 -- registers the performance checks
+        from core import events, media, page_cache
+        events.connect_signals()
+        media.connect_signals()
+        page_cache.connect_signals()
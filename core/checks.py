@@ -0,0 +1,93 @@
+"""
+Startup self-check of the settings that decide how fast the site runs.
+
+``effective_settings()`` summarises them (connection reuse, template
+caching, cache/session backends, static storage). The ``performance``
+system checks flag what is fine on a laptop but slow in production; they
+run with ``manage.py check --deploy``. ``startup_report()`` is called from
+wsgi.py/asgi.py and logs the summary once per process on the
+``hotelgrand.startup`` logger, plus the warnings when DEBUG is off.
+"""
+import json
+
+from django.conf import settings
+from django.core import checks
+from django.db import connections
+from django.template import engines
+
+import logging
+logger = logging.getLogger("hotelgrand.startup")
+
+CACHED_LOADER = "django.template.loaders.cached.Loader"
+
+
+def _templates_cached():
+    for engine in engines.all():
+        loaders = getattr(getattr(engine, "engine", None), "loaders", None)
+        if loaders is None:
+            continue
+        if not all(isinstance(loader, tuple) and loader[0] == CACHED_LOADER for loader in loaders):
+            return False
+    return True
+
+
+def effective_settings():
+    return {
+        "settings_module": settings.SETTINGS_MODULE,
+        "debug": settings.DEBUG,
+        "databases": {
+            alias: {
+                "engine": connections.settings[alias]["ENGINE"].rsplit(".", 1)[-1],
+                "conn_max_age": connections.settings[alias]["CONN_MAX_AGE"],
+                "conn_health_checks": connections.settings[alias]["CONN_HEALTH_CHECKS"],
+            }
+            for alias in connections
+        },
+        "templates_cached": _templates_cached(),
+        "caches": {alias: config["BACKEND"].rsplit(".", 1)[-1] for alias, config in settings.CACHES.items()},
+        "session_engine": settings.SESSION_ENGINE.rsplit(".", 1)[-1],
+        "staticfiles_storage": settings.STORAGES["staticfiles"]["BACKEND"].rsplit(".", 1)[-1],
+        "sql_instrumentation": getattr(settings, "SQL_INSTRUMENTATION_ENABLED", False),
+    }
+
+
+@checks.register("performance", deploy=True)
+def check_performance_settings(app_configs, **kwargs):
+    issues = []
+    for alias in connections:
+        config = connections.settings[alias]
+        if config["ENGINE"].endswith("sqlite3"):
+            continue
+        if config["CONN_MAX_AGE"] == 0:
+            issues.append(checks.Warning(
+                f"Database '{alias}' opens a new connection for every request.",
+                hint="Set DB_CONN_MAX_AGE (the prod settings default to 60 seconds).",
+                id="core.W001",
+            ))
+        elif not config["CONN_HEALTH_CHECKS"]:
+            issues.append(checks.Warning(
+                f"Database '{alias}' reuses connections without health checks.",
+                hint="Set DB_CONN_HEALTH_CHECKS=1 so a dropped connection isn't handed to a request.",
+                id="core.W002",
+            ))
+    if not _templates_cached():
+        issues.append(checks.Warning(
+            "Templates are re-read and re-parsed on every render.",
+            hint="Wrap the loaders in django.template.loaders.cached.Loader.",
+            id="core.W003",
+        ))
+    if settings.CACHES["default"]["BACKEND"].endswith("LocMemCache"):
+        issues.append(checks.Warning(
+            "The default cache is per-process; sessions, throttling and the user cache "
+            "are not shared between workers.",
+            hint="Set CACHE_BACKEND=redis or memcached with CACHE_LOCATION.",
+            id="core.W004",
+        ))
+    return issues
+
+
+def startup_report():
+    logger.info(json.dumps({"event": "startup", "settings": effective_settings()}, sort_keys=True))
+    if not settings.DEBUG:
+        for issue in check_performance_settings(None):
+            logger.warning("%s: %s %s", issue.id, issue.msg, issue.hint)
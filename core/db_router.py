@@ -0,0 +1,75 @@
+"""
+Primary/replica routing.
+
+Writes always go to ``default``. Reads go to the replica alias
+(``REPLICA_DATABASE``) only inside views wrapped in ``@read_from_replica``
+and only for models of ``REPLICA_READ_APPS`` (rooms, bookings, menu), so
+sessions and users are always read from the primary.
+
+Read-after-write across requests: ``ReplicaPinMiddleware`` sets a short
+cookie after any POST/PUT/PATCH/DELETE, and a pinned browser reads from the
+primary for ``REPLICA_PIN_SECONDS``; the booking a guest just made is there
+on the next page. Within a replica view, writes (e.g. the expiry sweep)
+still go to the primary but do not switch the view's reads back.
+
+With no replica alias configured everything reads from ``default``.
+"""
+import contextvars
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+
+PRIMARY = "default"
+
+_replica_reads = contextvars.ContextVar("replica_reads", default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, "REPLICA_DATABASE", "replica")
+    return alias if alias in settings.DATABASES else None
+
+
+def pinned(request):
+    return getattr(settings, "REPLICA_PIN_COOKIE", "pin_primary") in request.COOKIES
+
+
+def read_from_replica(view):
+    """Let the view's reads of REPLICA_READ_APPS models go to the replica."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if pinned(request):
+                return await view(request, *args, **kwargs)
+            token = _replica_reads.set(True)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if pinned(request):
+                return view(request, *args, **kwargs)
+            token = _replica_reads.set(True)
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return None
+        if model._meta.app_label not in getattr(settings, "REPLICA_READ_APPS", ()):
+            return None
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both aliases.
+        return True
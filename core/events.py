@@ -0,0 +1,151 @@
+"""
+Append-only event log of booking and order state transitions.
+
+Every status change becomes an ``Event`` row. Single saves are picked up
+by ``post_save`` signals: creation, status changes, and moved dates, using
+the values ``Booking``/``Order`` remember from when they were loaded. Bulk
+``update()`` paths can't be seen by signals, so they call
+``record_transitions`` themselves. That covers the admin actions and the
+expiry sweep.
+
+Writes are buffered. Inside ``with buffered():`` events collect in memory
+and go out as one ``bulk_create`` when the block ends, or every
+``EVENT_BATCH_SIZE`` rows. The batch code runs inside a transaction, so the
+events commit or roll back with the change. Outside a buffer each call
+writes straight away.
+
+Statuses are logged by name (``"checked_in"``, see core/states.py), not by
+their integer codes, so the log reads the same whatever the codes become.
+
+Cheap inserts at millions of rows: the primary key and ``occurred_at`` both
+grow with time, so every insert lands at the right edge of each index.
+There are only two secondary indexes: ``(entity, entity_id, occurred_at)``
+for replaying one booking over a time range, and ``(occurred_at)`` for
+windows. There are no foreign keys to check.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from booking.models import Booking, BookingStatus
+from core import states
+from core.models import Event
+from menu.models import Order, OrderStatus
+
+_buffer = contextvars.ContextVar("event_buffer", default=None)
+STATUS_CLASSES = {"booking": BookingStatus, "order": OrderStatus}
+
+
+def _batch_size():
+    return getattr(settings, "EVENT_BATCH_SIZE", 1000)
+
+
+@contextmanager
+def buffered():
+    """Collect events written in the block and insert them together at the end."""
+    if _buffer.get() is not None:
+        yield  # Nested: the outer block flushes.
+        return
+    pending = []
+    token = _buffer.set(pending)
+    try:
+        yield
+        Event.objects.bulk_create(pending, batch_size=_batch_size())
+    finally:
+        _buffer.reset(token)
+
+
+def record(events):
+    """Append ``events`` (unsaved ``Event`` instances)."""
+    pending = _buffer.get()
+    if pending is None:
+        Event.objects.bulk_create(events, batch_size=_batch_size())
+        return
+    pending.extend(events)
+    if len(pending) >= _batch_size():
+        Event.objects.bulk_create(pending, batch_size=_batch_size())
+        pending.clear()
+
+
+def status_name(entity, code):
+    return states.name(STATUS_CLASSES[entity], code)
+
+
+def record_transitions(entity, rows, to_status, source, actor=None, when=None):
+    """Log a bulk status change; ``rows`` are ``(id, previous status code)`` pairs."""
+    when = when or timezone.now()
+    actor_id = actor.pk if actor is not None and actor.is_authenticated else None
+    record([
+        Event(
+            occurred_at=when, entity=entity, entity_id=pk, kind="status",
+            from_status=status_name(entity, previous), to_status=status_name(entity, to_status),
+            actor_id=actor_id, source=source,
+        )
+        for pk, previous in rows
+        if previous != to_status
+    ])
+
+
+def history(entity, entity_id, start=None, end=None):
+    """One booking's or order's events in ``[start, end)``, oldest first (uses ``event_entity_time``)."""
+    events = Event.objects.filter(entity=entity, entity_id=entity_id)
+    if start is not None:
+        events = events.filter(occurred_at__gte=start)
+    if end is not None:
+        events = events.filter(occurred_at__lt=end)
+    return events.order_by("occurred_at", "id")
+
+
+def status_at(entity, entity_id, when):
+    """The status name the log says ``entity_id`` had at ``when``, or None before it existed."""
+    last = history(entity, entity_id, end=when).exclude(to_status="").order_by("-occurred_at", "-id").first()
+    return last.to_status if last else None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _booking_saved(sender, instance, created, **kwargs):
+    if created:
+        record([Event(
+            entity="booking", entity_id=instance.pk, kind="created", to_status=instance.status_name,
+            data={"room": instance.room_id, "check_in": _iso(instance.check_in), "check_out": _iso(instance.check_out)},
+        )])
+        return
+    loaded = getattr(instance, "_loaded_span", None)
+    if loaded is None:
+        return
+    room_id, status, check_in, check_out = loaded
+    events = []
+    if status is not None and status != instance.status:
+        events.append(Event(
+            entity="booking", entity_id=instance.pk, kind="status",
+            from_status=status_name("booking", status), to_status=instance.status_name,
+        ))
+    if (room_id, check_in, check_out) != (instance.room_id, instance.check_in, instance.check_out):
+        events.append(Event(entity="booking", entity_id=instance.pk, kind="rescheduled", data={
+            "from": {"room": room_id, "check_in": _iso(check_in), "check_out": _iso(check_out)},
+            "to": {"room": instance.room_id, "check_in": _iso(instance.check_in),
+                   "check_out": _iso(instance.check_out)},
+        }))
+    if events:
+        record(events)
+
+
+def _order_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_loaded_status", None)
+    if created:
+        record([Event(entity="order", entity_id=instance.pk, kind="created", to_status=instance.status_name,
+                      actor_id=instance.user_id, data={"item": instance.item_id, "quantity": instance.quantity})])
+    elif previous is not None and previous != instance.status:
+        record([Event(entity="order", entity_id=instance.pk, kind="status",
+                      from_status=status_name("order", previous), to_status=instance.status_name)])
+
+
+def connect_signals():
+    post_save.connect(_booking_saved, sender=Booking, dispatch_uid="events_booking_saved")
+    post_save.connect(_order_saved, sender=Order, dispatch_uid="events_order_saved")
@@ -0,0 +1,212 @@
+"""
+Fetch-and-cache layer for external image URLs.
+
+``Room.image_url``, ``RoomImage.image_url`` and ``MenuItem.image_url`` point
+at third-party hosts. Templates run those URLs through the ``cached_image``
+filter, which rewrites them to ``core.views.cached_image``; that view mirrors
+the remote file into MEDIA_ROOT once and serves the local copy from then on.
+
+Settings (all optional):
+    IMAGE_CACHE_MAX_BYTES       total size of the cache before LRU eviction
+    IMAGE_CACHE_MAX_FILE_BYTES  largest single image we are willing to mirror
+    IMAGE_CACHE_TTL             seconds before a copy is revalidated upstream
+    IMAGE_CACHE_TIMEOUT         upstream connect/read timeout in seconds
+"""
+import hashlib
+import mimetypes
+import urllib.error
+import urllib.request
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import CachedImage
+
+import logging
+logger = logging.getLogger(__name__)
+
+SIGNING_SALT = "core.image_cache"
+USER_AGENT = "hotelgrand-image-cache/1.0"
+
+# Don't write last_accessed on every hit; LRU order only needs to be roughly right.
+ACCESS_WRITE_INTERVAL = timedelta(minutes=5)
+
+
+class ImageCacheError(Exception):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def max_bytes():
+    return _setting("IMAGE_CACHE_MAX_BYTES", 200 * 1024 * 1024)
+
+
+def max_file_bytes():
+    return _setting("IMAGE_CACHE_MAX_FILE_BYTES", 5 * 1024 * 1024)
+
+
+def ttl():
+    return timedelta(seconds=_setting("IMAGE_CACHE_TTL", 24 * 60 * 60))
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def is_external(url):
+    return bool(url) and url.startswith(("http://", "https://"))
+
+
+# -------------------------------
+# 🔗 Template-facing URLs
+# -------------------------------
+def proxy_url(url):
+    """Return the local URL that serves ``url`` from the cache.
+
+    The remote URL is signed so the proxy view can't be used to fetch
+    arbitrary hosts. The signature carries no timestamp, so a given URL
+    always maps to the same proxy URL and browsers can reuse their copy.
+    """
+    if not is_external(url):
+        return url
+    token = signing.Signer(salt=SIGNING_SALT).sign_object(url, compress=True)
+    return reverse("cached_image", args=[token])
+
+
+def url_from_token(token):
+    try:
+        return signing.Signer(salt=SIGNING_SALT).unsign_object(token)
+    except signing.BadSignature:
+        return None
+
+
+# -------------------------------
+# 🌐 Upstream fetch
+# -------------------------------
+def _fetch(url, etag="", last_modified=""):
+    """Fetch ``url``; return ``None`` for 304 Not Modified, else a dict."""
+    headers = {"User-Agent": USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    request = urllib.request.Request(url, headers=headers)
+    limit = max_file_bytes()
+    try:
+        with urllib.request.urlopen(request, timeout=_setting("IMAGE_CACHE_TIMEOUT", 5)) as response:
+            content_type = response.headers.get_content_type()
+            if not content_type.startswith("image/"):
+                raise ImageCacheError(f"{url} is not an image ({content_type})")
+            length = response.headers.get("Content-Length")
+            if length and int(length) > limit:
+                raise ImageCacheError(f"{url} is larger than {limit} bytes")
+            data = response.read(limit + 1)
+            if len(data) > limit:
+                raise ImageCacheError(f"{url} is larger than {limit} bytes")
+            return {
+                "data": data,
+                "content_type": content_type,
+                "etag": response.headers.get("ETag", ""),
+                "last_modified": response.headers.get("Last-Modified", ""),
+            }
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None
+        raise ImageCacheError(f"{url} returned HTTP {e.code}") from e
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        raise ImageCacheError(f"could not fetch {url}: {e}") from e
+
+
+def _file_name(url, content_type):
+    ext = mimetypes.guess_extension(content_type) or ""
+    return f"{url_hash(url)}{ext}"
+
+
+def _store(entry, url, fetched):
+    now = timezone.now()
+    if entry is None:
+        entry = CachedImage(url=url, url_hash=url_hash(url))
+    # The replaced file is released by core.media once this row is saved.
+    entry.content_type = fetched["content_type"]
+    entry.size = len(fetched["data"])
+    entry.etag = fetched["etag"]
+    entry.last_modified = fetched["last_modified"]
+    entry.fetched_at = now
+    entry.last_accessed = now
+    entry.file.save(_file_name(url, entry.content_type), ContentFile(fetched["data"]), save=False)
+    entry.save()
+    return entry
+
+
+# -------------------------------
+# 📦 Cache lookup
+# -------------------------------
+def get_cached(url):
+    """Return a fresh ``CachedImage`` for ``url``, fetching or revalidating as needed.
+
+    A stale copy is served if the upstream host is unreachable. Raises
+    ``ImageCacheError`` only when there is no local copy at all.
+    """
+    entry = CachedImage.objects.filter(url_hash=url_hash(url)).first()
+    now = timezone.now()
+
+    if entry is not None and entry.file and entry.file.storage.exists(entry.file.name):
+        if now - entry.fetched_at < ttl():
+            if now - entry.last_accessed > ACCESS_WRITE_INTERVAL:
+                entry.last_accessed = now
+                entry.save(update_fields=["last_accessed"])
+            return entry
+        try:
+            fetched = _fetch(url, entry.etag, entry.last_modified)
+        except ImageCacheError as e:
+            logger.warning("Serving stale cached image: %s", e)
+            return entry
+        if fetched is None:
+            entry.fetched_at = now
+            entry.last_accessed = now
+            entry.save(update_fields=["fetched_at", "last_accessed"])
+            return entry
+    else:
+        # Missing row or a file that was removed from disk: fetch from scratch.
+        fetched = _fetch(url)
+        if fetched is None:
+            raise ImageCacheError(f"{url} returned 304 without a local copy")
+
+    if entry is None:
+        try:
+            with transaction.atomic():
+                entry = _store(None, url, fetched)
+        except IntegrityError:
+            # A concurrent first request mirrored the same URL; serve its copy.
+            return CachedImage.objects.get(url_hash=url_hash(url))
+    else:
+        entry = _store(entry, url, fetched)
+    evict()
+    return entry
+
+
+def evict(limit=None):
+    """Drop least recently used copies until the cache fits in ``limit`` bytes."""
+    limit = max_bytes() if limit is None else limit
+    total = CachedImage.objects.aggregate(total=Sum("size"))["total"] or 0
+    if total <= limit:
+        return 0
+
+    removed = 0
+    for entry in CachedImage.objects.order_by("last_accessed").iterator():
+        if total <= limit:
+            break
+        total -= entry.size
+        entry.delete()  # core.media removes the file once nothing references it
+        removed += 1
+    return removed
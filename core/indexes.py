@@ -0,0 +1,44 @@
+"""
+Partial indexes that queries can actually use, and that degrade sensibly on MySQL.
+
+``PartialIndex(fields=[...], condition=IS_LIVE)`` indexes only the rows in
+the condition (live bookings, open orders) on SQLite and PostgreSQL.
+Queries that filter on the same condition read a small index instead of
+the whole history.
+
+A planner only picks a partial index when it can see that the query's
+WHERE implies the index condition. It can't see that through bound
+parameters: SQLite never does, and PostgreSQL doesn't once it switches to a
+generic plan. So the condition uses ``literal_in``, an ``__in`` lookup that
+writes its integer values into the SQL. Share the same ``Q`` between the
+index and its queries (see ``IS_LIVE`` in booking/models.py) and the
+condition appears verbatim in both.
+
+MySQL has no partial indexes, and Django would quietly build a full index
+on ``fields`` alone. Instead the condition's field is put first
+(``(status, *fields)``). With small-integer statuses the active rows are
+then one or two short, contiguous ranges of the index. The condition must
+be a single lookup.
+"""
+from django.db import models
+from django.db.models.lookups import In
+
+
+@models.IntegerField.register_lookup
+class LiteralIn(In):
+    lookup_name = "literal_in"
+
+    def process_rhs(self, compiler, connection):
+        # int() both checks the values and makes them safe to inline.
+        values = sorted({int(value) for value in self.rhs})
+        return "(" + ", ".join(str(value) for value in values) + ")", []
+
+
+class PartialIndex(models.Index):
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.features.supports_partial_indexes:
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        (lookup, _), = self.condition.children
+        leading = lookup.split("__")[0]
+        fallback = models.Index(fields=[leading, *self.fields], name=self.name, db_tablespace=self.db_tablespace)
+        return fallback.create_sql(model, schema_editor, using=using, **kwargs)
@@ -0,0 +1,143 @@
+"""
+Per-request SQL instrumentation.
+
+``SQLInstrumentationMiddleware`` installs a ``QueryRecorder`` on every
+database connection with ``connection.execute_wrapper`` and, when the
+response is ready, reports per view:
+
+* number of queries and total SQL time,
+* query "fingerprints" (SQL with literals and IN-lists collapsed) that ran
+  at least ``QUERY_REPEAT_THRESHOLD`` times -- the usual N+1 signature,
+* whether the view went over its query budget (``QUERY_BUDGETS[view]`` or
+  ``QUERY_BUDGET``).
+
+Each request is logged as one JSON line on the ``hotelgrand.sql`` logger
+(WARNING when flagged, DEBUG otherwise) and folded into process-local
+counters that ``core.views.metrics`` exposes in Prometheus text format.
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+import logging
+logger = logging.getLogger("hotelgrand.sql")
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*%s\s*,?)+\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def budget_for(view):
+    return getattr(settings, "QUERY_BUDGETS", {}).get(view, getattr(settings, "QUERY_BUDGET", 30))
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def repeated(self):
+        threshold = getattr(settings, "QUERY_REPEAT_THRESHOLD", 5)
+        return {sql: n for sql, n in self.fingerprints.most_common() if n >= threshold}
+
+
+class MetricsRegistry:
+    """Process-local counters per view, read by the /metrics endpoint."""
+    COUNTERS = ("requests", "queries", "sql_seconds", "over_budget", "repeated_queries")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(lambda: dict.fromkeys(self.COUNTERS, 0))
+
+    def observe(self, view, recorder, over_budget, repeated):
+        with self._lock:
+            stats = self._views[view]
+            stats["requests"] += 1
+            stats["queries"] += recorder.count
+            stats["sql_seconds"] += recorder.duration
+            stats["over_budget"] += int(over_budget)
+            stats["repeated_queries"] += int(bool(repeated))
+
+    def snapshot(self):
+        with self._lock:
+            return {view: dict(stats) for view, stats in self._views.items()}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
+
+
+def report(view, path, recorder):
+    budget = budget_for(view)
+    over_budget = recorder.count > budget
+    repeated = recorder.repeated()
+    registry.observe(view, recorder, over_budget, repeated)
+
+    payload = {
+        "event": "sql_stats",
+        "view": view,
+        "path": path,
+        "queries": recorder.count,
+        "sql_ms": round(recorder.duration * 1000, 2),
+        "budget": budget,
+        "over_budget": over_budget,
+        "repeated": repeated,
+    }
+    level = logging.WARNING if over_budget or repeated else logging.DEBUG
+    logger.log(level, json.dumps(payload), extra={"sql_stats": payload})
+    return payload
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    from accounts import throttle
+
+    metrics = [
+        ("hotelgrand_view_requests_total", "counter", "Requests handled per view.", "requests"),
+        ("hotelgrand_view_queries_total", "counter", "SQL queries executed per view.", "queries"),
+        ("hotelgrand_view_sql_seconds_total", "counter", "Time spent in SQL per view.", "sql_seconds"),
+        ("hotelgrand_view_over_budget_total", "counter", "Requests over the view's query budget.", "over_budget"),
+        ("hotelgrand_view_repeated_queries_total", "counter", "Requests with an N+1 query pattern.", "repeated_queries"),
+    ]
+    snapshot = registry.snapshot()
+    lines = []
+    for name, kind, help_text, key in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for view in sorted(snapshot):
+            lines.append(f'{name}{{view="{_label(view)}"}} {snapshot[view][key]}')
+
+    lines.append("# HELP hotelgrand_throttle_attempts_total Login/registration attempts seen by the throttle.")
+    lines.append("# TYPE hotelgrand_throttle_attempts_total counter")
+    for scope, outcomes in sorted(throttle.metrics().items()):
+        for outcome, value in sorted(outcomes.items()):
+            lines.append(f'hotelgrand_throttle_attempts_total{{scope="{scope}",outcome="{outcome}"}} {value}')
+    return "\n".join(lines) + "\n"
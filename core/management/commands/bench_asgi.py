@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+
+DEFAULT_PATHS = ["/menu/", "/rooms/", "/book/check/"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the public read endpoints through the sync WSGI "
+        "handler (N threads) and the ASGI handler (N concurrent tasks)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=400, help="Requests per handler.")
+        parser.add_argument(
+            "--path", action="append", dest="paths",
+            help=f"URL to request (repeatable). Default: {' '.join(DEFAULT_PATHS)}",
+        )
+
+    def handle(self, *args, workers=8, requests=400, paths=None, **options):
+        paths = paths or DEFAULT_PATHS
+        schedule = [paths[i % len(paths)] for i in range(requests)]
+        shares = [schedule[i::workers] for i in range(workers)]
+
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            results = [
+                ("WSGI (sync)", self.run_wsgi(shares)),
+                ("ASGI (async)", asyncio.run(self.run_asgi(shares))),
+            ]
+
+        self.stdout.write(f"{requests} requests, {workers} workers, paths: {', '.join(paths)}")
+        for label, (elapsed, latencies, errors) in results:
+            self.stdout.write(
+                f"{label:<13} {len(latencies) / elapsed:8.1f} req/s   "
+                f"p50 {percentile(latencies, 50) * 1000:7.1f} ms   "
+                f"p95 {percentile(latencies, 95) * 1000:7.1f} ms   "
+                f"errors {errors}"
+            )
+
+    def run_wsgi(self, shares):
+        lock = threading.Lock()
+        latencies, errors = [], [0]
+
+        def worker(share):
+            client = Client()
+            try:
+                for path in share:
+                    start = time.perf_counter()
+                    response = client.get(path)
+                    took = time.perf_counter() - start
+                    with lock:
+                        latencies.append(took)
+                        errors[0] += response.status_code >= 400
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(shares)) as pool:
+            list(pool.map(worker, shares))
+        return time.perf_counter() - start, latencies, errors[0]
+
+    async def run_asgi(self, shares):
+        latencies, errors = [], 0
+
+        async def worker(share):
+            nonlocal errors
+            client = AsyncClient()
+            for path in share:
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code >= 400
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(share) for share in shares))
+        return time.perf_counter() - start, latencies, errors
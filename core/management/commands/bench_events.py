@@ -0,0 +1,55 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import events
+from core.models import Event
+
+STATUSES = ["confirmed", "checked_in", "completed", "cancelled"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Append a large event log to a throwaway test database through the buffered "
+        "writer, then time replaying one booking's history over a window."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=1_000_000, dest="count")
+        parser.add_argument("--bookings", type=int, default=100_000)
+        parser.add_argument("--days", type=int, default=365)
+
+    def handle(self, *args, count=1_000_000, bookings=100_000, days=365, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            rng = random.Random(42)
+            start = timezone.now() - timedelta(days=days)
+            step = timedelta(days=days) / count
+
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                with events.buffered():
+                    for i in range(count):
+                        previous, status = rng.sample(STATUSES, 2)
+                        events.record([Event(
+                            occurred_at=start + step * i, entity="booking", entity_id=rng.randrange(1, bookings + 1),
+                            kind="status", from_status=previous, to_status=status, source="bench",
+                        )])
+                elapsed = time.perf_counter() - started
+            self.stdout.write(f"appended {count} events in {elapsed:.1f}s ({count / elapsed:,.0f}/s), {len(ctx)} queries")
+
+            booking_id = rng.randrange(1, bookings + 1)
+            window = (start + timedelta(days=days // 4), start + timedelta(days=3 * days // 4))
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                rows = list(events.history("booking", booking_id, *window))
+                elapsed = time.perf_counter() - started
+            self.stdout.write(f"history: {len(rows)} events in {elapsed * 1000:.2f} ms, {len(ctx)} queries")
+            self.stdout.write(events.history("booking", booking_id, *window).explain())
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+DEFAULT_PATHS = ["/", "/about/", "/book/booking/success/"]
+
+
+class Command(BaseCommand):
+    help = "Report DB round trips per request (total and django_session) for each session backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=30, help="Requests per backend.")
+        parser.add_argument("--path", action="append", dest="paths")
+
+    def handle(self, *args, requests=30, paths=None, **options):
+        paths = paths or DEFAULT_PATHS
+        self.stdout.write(f"{'backend':<16}{'queries/req':>12}{'session q/req':>15}")
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=["*"]):
+            user = User.objects.create_user("bench_sessions_user")
+            for name, engine in settings.SESSION_ENGINES.items():
+                cache.clear()
+                with override_settings(SESSION_ENGINE=engine):
+                    total, session = self.measure(user, paths, requests)
+                self.stdout.write(f"{name:<16}{total / requests:>12.2f}{session / requests:>15.2f}")
+            transaction.set_rollback(True)
+
+    def measure(self, user, paths, requests):
+        client = Client()
+        client.force_login(user)
+        # Warm up so one-off work (session creation, profile lookups) isn't counted.
+        client.get(paths[0])
+
+        total = session = 0
+        for i in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                client.get(paths[i % len(paths)])
+            total += len(queries)
+            session += sum("django_session" in q["sql"] for q in queries.captured_queries)
+        return total, session
@@ -0,0 +1,147 @@
+import json
+import logging
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+
+from booking.models import Booking, BookingStatus, Room
+from core.seed import seed
+
+# Routes that can't be exercised with a plain GET against local data.
+SKIP_ROUTES = {"logout", "cached_image"}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def iter_routes(patterns=None, prefix=""):
+    """Yield ``(name, route)`` for every URL pattern, descending into includes."""
+    for pattern in patterns if patterns is not None else get_resolver().url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == "admin":
+                continue
+            yield from iter_routes(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif isinstance(pattern, URLPattern):
+            yield pattern.name, prefix + str(pattern.pattern)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database, request every URL in hotelgrand/urls.py "
+        "through the test client and write latency percentiles and query counts "
+        "as JSON. Meant for SQLite (--settings=hotelgrand.settings.bench)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--rooms", type=int, default=50)
+        parser.add_argument("--bookings", type=int, default=2000)
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+        parser.add_argument("--compare", help="Earlier JSON report to print p50/query deltas against.")
+
+    def handle(self, *args, iterations=20, rooms=50, bookings=2000, output=None, compare=None, **options):
+        if connection.vendor != "sqlite":
+            self.stderr.write(self.style.WARNING(
+                f"Benchmarking on {connection.vendor}; reports are only comparable on SQLite."
+            ))
+        # Errors are part of the report; don't also dump tracebacks to stderr.
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+        logging.getLogger("hotelgrand.sql").setLevel(logging.CRITICAL)
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(ALLOWED_HOSTS=["*"], THROTTLE_ENABLED=False):
+                seed_counts = seed(rooms=rooms, bookings=bookings, users=max(20, bookings // 10))
+                report = {
+                    "meta": self.meta(seed_counts, iterations),
+                    "routes": self.run(iterations),
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        text = json.dumps(report, indent=2, sort_keys=True)
+        if output:
+            with open(output, "w") as f:
+                f.write(text + "\n")
+        else:
+            self.stdout.write(text)
+        if compare:
+            self.compare(report, compare)
+
+    def meta(self, seed_counts, iterations):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except OSError:
+            commit = ""
+        return {
+            "commit": commit,
+            "created": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "iterations": iterations,
+            "dataset": seed_counts,
+        }
+
+    def run(self, iterations):
+        room = Room.objects.order_by("id").first()
+        guest = Booking.objects.filter(status=BookingStatus.CHECKED_IN).order_by("id").first()
+        user = User.objects.get(username=guest.guest_name) if guest else User.objects.order_by("id").first()
+        params = {"room_id": room.id if room else 1}
+
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+
+        results = {}
+        for name, route in iter_routes():
+            if name in SKIP_ROUTES:
+                continue
+            path = "/" + route
+            for key, value in params.items():
+                path = path.replace(f"<int:{key}>", str(value))
+            if "<" in path:
+                continue
+
+            latencies, queries, statuses = [], [], {}
+            client.get(path)  # warm caches, compile templates
+            for _ in range(iterations):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get(path)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                queries.append(len(captured))
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            results[path] = {
+                "name": name,
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p90_ms": round(percentile(latencies, 90), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+                "queries": round(sum(queries) / len(queries), 2),
+                "status": {str(code): n for code, n in sorted(statuses.items())},
+            }
+        return results
+
+    def compare(self, report, path):
+        with open(path) as f:
+            before = json.load(f)
+        self.stderr.write(f"Compared with {before['meta'].get('commit') or path}:")
+        for url, now in sorted(report["routes"].items()):
+            then = before["routes"].get(url)
+            if not then:
+                self.stderr.write(f"  {url:<40} new")
+                continue
+            self.stderr.write(
+                f"  {url:<40} p50 {then['p50_ms']:8.2f} -> {now['p50_ms']:8.2f} ms   "
+                f"queries {then['queries']:6.1f} -> {now['queries']:6.1f}"
+            )
@@ -0,0 +1,74 @@
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.media import recount_references, tracked_fields
+from core.storage import CAS_PREFIX, ContentAddressedStorage, content_name, hash_file
+
+
+class Command(BaseCommand):
+    help = "Move existing media into content-addressed storage, merging identical files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Hash files and report the savings without changing anything.",
+        )
+
+    def handle(self, *args, dry_run=False, **options):
+        storage = default_storage
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError("STORAGES['default'] must be core.storage.ContentAddressedStorage.")
+
+        renamed = {}        # legacy name -> content-addressed name
+        blob_sizes = {}     # content-addressed name -> size
+        bytes_before = 0
+        missing = 0
+
+        for model, field in tracked_fields():
+            names = (
+                model.objects.exclude(**{field: ""})
+                .exclude(**{f"{field}__isnull": True})
+                .values_list(field, flat=True)
+                .distinct()
+            )
+            field_names = []
+            for name in names.iterator():
+                if name.startswith(f"{CAS_PREFIX}/"):
+                    continue
+                if name in renamed:
+                    field_names.append(name)
+                    continue
+                if not storage.exists(name):
+                    missing += 1
+                    self.stderr.write(f"Missing file: {name}")
+                    continue
+
+                with storage.open(name, "rb") as fh:
+                    digest, size = hash_file(File(fh))
+                    new_name = content_name(digest, name)
+                    if not dry_run and new_name not in blob_sizes:
+                        new_name = storage.save(name, File(fh))
+                renamed[name] = new_name
+                field_names.append(name)
+                blob_sizes[new_name] = size
+                bytes_before += size
+
+            if dry_run:
+                continue
+            for old in field_names:
+                model.objects.filter(**{field: old}).update(**{field: renamed[old]})
+
+        bytes_after = sum(blob_sizes.values())
+        if not dry_run:
+            recount_references()
+            for old in renamed:
+                storage.delete(old)
+
+        self.stdout.write(
+            f"{'Would rehash' if dry_run else 'Rehashed'} {len(renamed)} file(s) "
+            f"({bytes_before} bytes) into {len(blob_sizes)} blob(s) ({bytes_after} bytes); "
+            f"saved {bytes_before - bytes_after} bytes."
+        )
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{missing} referenced file(s) were missing on disk."))
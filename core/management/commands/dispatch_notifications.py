@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver due notifications from the outbox in batches over one email "
+        "connection, with retries and backoff. Exits when the queue is drained "
+        "unless --forever is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Default: OUTBOX_BATCH_SIZE.")
+        parser.add_argument("--forever", action="store_true", help="Keep polling for new notifications.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --forever.")
+
+    def handle(self, *args, batch_size=None, forever=False, interval=5.0, **options):
+        while True:
+            counts = outbox.dispatch(batch_size=batch_size)
+            if counts["batches"] or not forever:
+                self.stdout.write(", ".join(f"{key} {value}" for key, value in counts.items()))
+            if not forever:
+                return
+            time.sleep(interval)
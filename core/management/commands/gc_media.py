@@ -0,0 +1,107 @@
+import hashlib
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.media import file_fields, iter_media_files
+from core.models import MediaBlob
+
+
+def fingerprint(name):
+    # 8-byte digests keep the reference set small; a collision only means an
+    # orphan survives until the next run, never that a live file is removed.
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class Command(BaseCommand):
+    help = "Delete or quarantine files in MEDIA_ROOT that no FileField/ImageField references."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report orphaned files.")
+        parser.add_argument(
+            "--quarantine", metavar="DIR",
+            help="Move orphans into DIR (keeping their relative paths) instead of deleting them.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--min-age", type=int, default=3600,
+            help="Ignore files modified in the last N seconds (uploads still being saved).",
+        )
+
+    def handle(self, *args, dry_run=False, quarantine=None, batch_size=500, min_age=3600, **options):
+        root = settings.MEDIA_ROOT
+        if not os.path.isdir(root):
+            raise CommandError(f"MEDIA_ROOT {root} does not exist.")
+        if quarantine:
+            quarantine = os.path.abspath(quarantine)
+
+        referenced = self.referenced_fingerprints()
+        cutoff = time.time() - min_age
+
+        scanned = orphaned = freed = 0
+        batch = []
+        for name, entry in iter_media_files(root, skip=[quarantine] if quarantine else []):
+            scanned += 1
+            if fingerprint(name) in referenced:
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                continue
+            batch.append((name, entry.path, stat.st_size))
+            if len(batch) >= batch_size:
+                removed, size = self.flush(batch, dry_run, quarantine)
+                orphaned, freed, batch = orphaned + removed, freed + size, []
+        removed, size = self.flush(batch, dry_run, quarantine)
+        orphaned, freed = orphaned + removed, freed + size
+
+        verb = "Would remove" if dry_run else "Quarantined" if quarantine else "Deleted"
+        self.stdout.write(f"Scanned {scanned} file(s); {verb} {orphaned} orphan(s), {freed} bytes.")
+
+    def referenced_fingerprints(self):
+        referenced = set()
+        for model, field in file_fields():
+            names = (
+                model.objects.exclude(**{field: ""})
+                .exclude(**{f"{field}__isnull": True})
+                .values_list(field, flat=True)
+            )
+            referenced.update(fingerprint(name) for name in names.iterator(chunk_size=5000))
+        return referenced
+
+    def still_referenced(self, names):
+        """Names in ``names`` that a row or a counted blob uses right now.
+
+        The snapshot from ``referenced_fingerprints`` is taken before the walk,
+        and content-addressed storage reuses an existing file without touching
+        its mtime, so an orphan re-uploaded since then looks old and unused.
+        """
+        used = set(MediaBlob.objects.filter(name__in=names, ref_count__gt=0).values_list("name", flat=True))
+        for model, field in file_fields():
+            used.update(model.objects.filter(**{f"{field}__in": names}).values_list(field, flat=True))
+        return used
+
+    def flush(self, batch, dry_run, quarantine):
+        """Remove the batch's files that are still unused; returns ``(count, bytes)``."""
+        if not batch:
+            return 0, 0
+        used = self.still_referenced([name for name, _, _ in batch])
+        batch = [item for item in batch if item[0] not in used]
+        for name, path, _ in batch:
+            if dry_run:
+                self.stdout.write(f"orphan: {name}")
+                continue
+            try:
+                if quarantine:
+                    target = os.path.join(quarantine, name)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.move(path, target)
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+        if not dry_run:
+            MediaBlob.objects.filter(name__in=[name for name, _, _ in batch], ref_count__lte=0).delete()
+        return len(batch), sum(size for _, _, size in batch)
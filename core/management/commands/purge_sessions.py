@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+DB_ENGINES = {
+    "django.contrib.sessions.backends.db",
+    "django.contrib.sessions.backends.cached_db",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired database sessions in small batches, so the cleanup never "
+        "holds a long lock on django_session the way clearsessions' single DELETE can."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--sleep", type=float, default=0.0,
+            help="Seconds to pause between batches to leave room for live traffic.",
+        )
+
+    def handle(self, *args, batch_size=1000, sleep=0.0, **options):
+        if settings.SESSION_ENGINE not in DB_ENGINES:
+            # Cache entries expire on their own and signed cookies live in the browser.
+            self.stdout.write(f"{settings.SESSION_ENGINE} needs no cleanup.")
+            return
+
+        now = timezone.now()
+        deleted = batches = 0
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list("session_key", flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            batches += 1
+            if sleep:
+                time.sleep(sleep)
+
+        self.stdout.write(f"Deleted {deleted} expired session(s) in {batches} batch(es).")
@@ -0,0 +1,176 @@
+"""
+Reference counting for files in MEDIA_ROOT.
+
+Every file field listed in ``TRACKED_FIELDS`` bumps ``MediaBlob.ref_count``
+when it starts pointing at a file and drops it when it stops (field changed
+or row deleted). When the count reaches zero the file is removed from
+storage. Files uploaded before counting started have no blob row; they are
+never removed here (``gc_media`` finds them once nothing uses them), and the
+first new reference to one counts every row already using it.
+
+Queryset ``update()``/``bulk_create()`` bypass signals, so anything that
+writes file names in bulk should finish with ``recount_references()``.
+"""
+import os
+from collections import Counter
+
+from django.apps import apps
+from django.db import models
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+
+from core.models import MediaBlob
+
+TRACKED_FIELDS = [
+    ("booking.Room", "image"),
+    ("booking.RoomImage", "image"),
+    ("menu.MenuItem", "image"),
+    ("accounts.UserProfile", "profile_image"),
+    ("core.CachedImage", "file"),
+]
+
+SNAPSHOT_ATTR = "_media_snapshot"
+
+
+def tracked_fields():
+    """Yield ``(model, field_name)`` for every tracked file field."""
+    for label, field_name in TRACKED_FIELDS:
+        yield apps.get_model(label), field_name
+
+
+def _fields_for(model):
+    return [name for label, name in TRACKED_FIELDS if model._meta.label == label]
+
+
+def references(name):
+    """How many rows across the tracked fields point at ``name``."""
+    return sum(model.objects.filter(**{field: name}).count() for model, field in tracked_fields())
+
+
+def incref(name):
+    if not name:
+        return
+    if not MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1):
+        # Files saved before this storage existed have no blob row yet, and
+        # other rows may already use them; count them all (this row included).
+        MediaBlob.objects.get_or_create(name=name, defaults={"ref_count": references(name)})
+
+
+def decref(name, storage):
+    if not name:
+        return
+    MediaBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+
+    def _release():
+        # No blob row means the file predates counting; leave it to gc_media.
+        if MediaBlob.objects.filter(name=name, ref_count=0).exists():
+            storage.delete(name)
+
+    transaction.on_commit(_release)
+
+
+def _current_name(instance, field):
+    # Read the raw attribute so deferred fields don't trigger a query.
+    if field not in instance.__dict__:
+        return None
+    value = instance.__dict__[field]
+    return getattr(value, "name", value) or ""
+
+
+def _snapshot(sender, instance, **kwargs):
+    setattr(instance, SNAPSHOT_ATTR, {
+        field: _current_name(instance, field) for field in _fields_for(sender)
+    })
+
+
+def _on_save(sender, instance, **kwargs):
+    before = getattr(instance, SNAPSHOT_ATTR, {})
+    for field in _fields_for(sender):
+        new = _current_name(instance, field)
+        old = "" if kwargs.get("created") else before.get(field)
+        if new is None or old is None:
+            # Deferred when loaded, so we can't tell what it used to be.
+            continue
+        if old != new:
+            incref(new)
+            decref(old, getattr(instance, field).storage)
+    _snapshot(sender, instance)
+
+
+def _on_delete(sender, instance, **kwargs):
+    for field in _fields_for(sender):
+        name = _current_name(instance, field)
+        if name:
+            decref(name, getattr(instance, field).storage)
+
+
+def connect_signals():
+    for model, _ in tracked_fields():
+        uid = f"core.media.{model._meta.label}"
+        post_init.connect(_snapshot, sender=model, dispatch_uid=uid)
+        post_save.connect(_on_save, sender=model, dispatch_uid=uid)
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=uid)
+
+
+def file_fields():
+    """Yield ``(model, field_name)`` for every FileField/ImageField in the project."""
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField):
+                yield model, field.name
+
+
+def iter_media_files(root, skip=()):
+    """Yield ``(relative_name, DirEntry)`` for every file under ``root``.
+
+    Walks depth-first with ``os.scandir`` so only one directory listing is held
+    in memory at a time. Directories in ``skip`` (absolute paths) are pruned.
+    """
+    skip = {os.path.abspath(path) for path in skip}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if os.path.abspath(entry.path) not in skip:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        name = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                        yield name, entry
+        except FileNotFoundError:
+            continue
+
+
+def referenced_names():
+    """Count how many rows point at each file name across all tracked fields."""
+    counts = Counter()
+    for model, field in tracked_fields():
+        names = (
+            model.objects.exclude(**{field: ""})
+            .exclude(**{f"{field}__isnull": True})
+            .values_list(field, flat=True)
+        )
+        counts.update(names.iterator())
+    return counts
+
+
+@transaction.atomic
+def recount_references():
+    """Rebuild ``MediaBlob.ref_count`` from the tracked fields."""
+    counts = referenced_names()
+    remaining = dict(counts)
+    stale = []
+    for blob in MediaBlob.objects.iterator(chunk_size=2000):
+        count = remaining.pop(blob.name, 0)
+        if blob.ref_count != count:
+            blob.ref_count = count
+            stale.append(blob)
+    MediaBlob.objects.bulk_update(stale, ["ref_count"], batch_size=500)
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, ref_count=count) for name, count in remaining.items()],
+        batch_size=500,
+    )
+    return counts
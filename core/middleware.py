@@ -0,0 +1,226 @@
+import mimetypes
+import os
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from core import instrumentation
+from core.db_router import replica_alias
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def accepted_encodings(request):
+    accepted = set()
+    for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class AsyncCapableMiddleware:
+    """Base for middleware that runs natively in both modes.
+
+    Under ASGI a sync-only middleware makes Django run everything below it in
+    a thread, and the async views are then called through ``async_to_sync``.
+    Subclasses implement ``__call__`` for WSGI and ``__acall__`` for ASGI;
+    ``get_response`` matches whichever mode the chain is in.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+@sync_and_async_middleware
+class PrecompressedStaticMiddleware(AsyncCapableMiddleware):
+    """Serve STATIC_ROOT directly, preferring the ``.br``/``.gz`` files written
+    by ``CompressedManifestStaticFilesStorage``.
+
+    Hashed names from the manifest are cached forever (``immutable``); anything
+    else gets STATIC_MAX_AGE and Last-Modified revalidation.
+    """
+    encodings = [("br", ".br"), ("gzip", ".gz")]
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.prefix = settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        self.max_age = getattr(settings, "STATIC_MAX_AGE", 60)
+        self._immutable = None
+
+    @property
+    def immutable(self):
+        if self._immutable is None:
+            self._immutable = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+        return self._immutable
+
+    def static_name(self, request):
+        if self.root and request.method in ("GET", "HEAD") and request.path.startswith(self.prefix):
+            return request.path[len(self.prefix):]
+        return None
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        name = self.static_name(request)
+        response = self.serve(request, name) if name is not None else None
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        name = self.static_name(request)
+        response = None
+        if name is not None:
+            # stat() and open() hit the disk; keep them off the event loop.
+            response = await sync_to_async(self.serve, thread_sensitive=False)(request, name)
+        return response if response is not None else await self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+            return HttpResponseNotModified()
+
+        content_type, _ = mimetypes.guess_type(path)
+        accepted = accepted_encodings(request)
+        encoding, serve_path = None, path
+        for coding, suffix in self.encodings:
+            if coding in accepted and os.path.isfile(path + suffix):
+                encoding, serve_path = coding, path + suffix
+                break
+
+        response = FileResponse(open(serve_path, "rb"), content_type=content_type or "application/octet-stream")
+        if encoding:
+            response["Content-Encoding"] = encoding
+        response["Vary"] = "Accept-Encoding"
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        if name in self.immutable:
+            response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response["Cache-Control"] = f"public, max-age={self.max_age}"
+        return response
+
+
+class LazySessionWriteMiddleware(SessionMiddleware):
+    """SessionMiddleware that skips the save when the session data didn't change.
+
+    ``request.session.modified`` is set by any assignment, even one that writes
+    back the same value, and every save is a DB/cache round trip. This records
+    a fingerprint of the data when the session is loaded and clears
+    ``modified`` at response time if the data and key are unchanged.
+    """
+    def process_request(self, request):
+        super().process_request(request)
+        session = request.session
+        load = session.load
+
+        def load_and_fingerprint():
+            data = load()
+            session._loaded_fingerprint = (session.session_key, self.fingerprint(session, data))
+            return data
+
+        session.load = load_and_fingerprint
+
+    @staticmethod
+    def fingerprint(session, data):
+        return session.serializer().dumps(data)
+
+    def process_response(self, request, response):
+        session = getattr(request, "session", None)
+        if (
+            session is not None
+            and session.modified
+            and not settings.SESSION_SAVE_EVERY_REQUEST
+            and getattr(session, "_loaded_fingerprint", None)
+            == (session.session_key, self.fingerprint(session, session._session))
+        ):
+            session.modified = False
+        return super().process_response(request, response)
+
+
+@sync_and_async_middleware
+class SQLInstrumentationMiddleware(AsyncCapableMiddleware):
+    """Count and time every query a request runs; see core/instrumentation.py.
+
+    Connections are per thread, and under ASGI the async ORM runs a
+    request's queries in its thread-sensitive thread, so the wrappers are
+    installed and removed there.
+    """
+    @staticmethod
+    def recording(recorder):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        return stack
+
+    @staticmethod
+    def report(request, recorder):
+        match = getattr(request, "resolver_match", None)
+        view = match._func_path if match else "unresolved"
+        instrumentation.report(view, request.path, recorder)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, "SQL_INSTRUMENTATION_ENABLED", True):
+            return self.get_response(request)
+
+        recorder = instrumentation.QueryRecorder()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        self.report(request, recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, "SQL_INSTRUMENTATION_ENABLED", True):
+            return await self.get_response(request)
+
+        recorder = instrumentation.QueryRecorder()
+        stack = await sync_to_async(self.recording)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.report(request, recorder)
+        return response
+
+
+@sync_and_async_middleware
+class ReplicaPinMiddleware(AsyncCapableMiddleware):
+    """After a write request, read from the primary for REPLICA_PIN_SECONDS; see core/db_router.py."""
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.cookie = getattr(settings, "REPLICA_PIN_COOKIE", "pin_primary")
+        self.seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+    def pin(self, request, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE") and replica_alias():
+            response.set_cookie(self.cookie, "1", max_age=self.seconds, httponly=True, samesite="Lax")
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
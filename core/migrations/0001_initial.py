@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=2000)),
+                ('url_hash', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(upload_to='image_cache/')),
+                ('content_type', models.CharField(max_length=100)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('fetched_at', models.DateTimeField()),
+                ('last_accessed', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('entity', models.CharField(choices=[('booking', 'Booking'), ('order', 'Order')], max_length=10)),
+                ('entity_id', models.PositiveBigIntegerField()),
+                ('kind', models.CharField(max_length=20)),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(blank=True, max_length=20)),
+                ('actor_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('source', models.CharField(blank=True, max_length=40)),
+                ('data', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['entity', 'entity_id', 'occurred_at'], name='event_entity_time'), models.Index(fields=['occurred_at'], name='event_time')],
+            },
+        ),
+    ]
@@ -1,3 +1,106 @@
+from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class CachedImage(models.Model):
+    """A local copy of an external ``image_url`` asset (see core/image_cache.py)."""
+    url = models.URLField(max_length=2000)
+    url_hash = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='image_cache/')
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveIntegerField(default=0)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    fetched_at = models.DateTimeField()
+    last_accessed = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.url
+
+
+class MediaBlob(models.Model):
+    """One stored file in MEDIA_ROOT and the number of model fields pointing at it."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class Notification(models.Model):
+    """A guest notification, written in the same transaction as its booking/order (see core/outbox.py)."""
+    KIND_CHOICES = [
+        ('booking_confirmed', 'Booking confirmed'),
+        ('booking_extended', 'Booking extended'),
+        ('waitlist_promoted', 'Waitlist promoted'),
+        ('order_placed', 'Order placed'),
+        ('order_updated', 'Order updated'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped (no email address)'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    email = models.EmailField(blank=True)
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The dispatcher's due queue, and a guest's notification list
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due"),
+            models.Index(fields=["user", "-created_at"], name="notification_user_recent"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.user.username} ({self.status})"
+
+
+class Event(models.Model):
+    """One state transition of a booking or order; append-only (see core/events.py)."""
+    ENTITY_CHOICES = [
+        ('booking', 'Booking'),
+        ('order', 'Order'),
+    ]
+
+    occurred_at = models.DateTimeField(default=timezone.now)
+    entity = models.CharField(max_length=10, choices=ENTITY_CHOICES)
+    # Plain ids rather than foreign keys: no constraint checks on insert, and the log outlives deletes.
+    entity_id = models.PositiveBigIntegerField()
+    kind = models.CharField(max_length=20)
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20, blank=True)
+    actor_id = models.PositiveBigIntegerField(null=True, blank=True)
+    source = models.CharField(max_length=40, blank=True)
+    data = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            # Replaying one booking/order over a time range, and scanning everything in a window
+            models.Index(fields=["entity", "entity_id", "occurred_at"], name="event_entity_time"),
+            models.Index(fields=["occurred_at"], name="event_time"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Events are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Events are append-only.")
+
+    def __str__(self):
+        return f"{self.entity} {self.entity_id} {self.kind} {self.from_status}->{self.to_status}"
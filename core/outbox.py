@@ -0,0 +1,160 @@
+"""
+Transactional notification outbox.
+
+Views don't send email. They call ``notify(...)`` (or one of the helpers
+below) inside the transaction that writes the booking or order, so the
+notification exists exactly when the change it describes does. It also
+shows up at once on the guest's notifications page. ``dispatch()`` (the
+``dispatch_notifications`` command) delivers the due rows later, in batches
+of ``OUTBOX_BATCH_SIZE``, over one reused email-backend connection.
+
+A batch is claimed before it is sent: its ``next_attempt_at`` is pushed out
+by ``OUTBOX_LEASE_SECONDS``, with ``skip_locked`` where the database
+supports it. Two dispatchers therefore never send the same row, and a
+dispatcher that dies mid-batch only delays its rows. A failed send is
+retried after ``OUTBOX_BACKOFF_SECONDS * 2**(attempts - 1)`` (capped at
+``OUTBOX_BACKOFF_MAX_SECONDS``). After ``OUTBOX_MAX_ATTEMPTS`` it is marked
+failed. A dropped SMTP connection is reopened for the rest of the batch.
+Delivery is at least once: a crash between the send and the status write
+resends that message.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Notification
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def notify(user, kind, subject, body):
+    """Queue a notification for ``user``; call it inside the transaction that made the change."""
+    return Notification.objects.create(
+        user=user, kind=kind, email=user.email, subject=subject, body=body,
+        status="pending" if user.email else "skipped",
+    )
+
+
+def booking_confirmed(user, booking):
+    return notify(user, "booking_confirmed", f"Booking confirmed: {booking.room.name}", (
+        f"Your stay in {booking.room.name} is confirmed from {booking.check_in:%d %b %Y %H:%M} "
+        f"to {booking.check_out:%d %b %Y %H:%M}."
+    ))
+
+
+def booking_extended(user, booking):
+    return notify(user, "booking_extended", f"Stay extended: {booking.room.name}", (
+        f"Your stay in {booking.room.name} now ends {booking.check_out:%d %b %Y %H:%M}."
+    ))
+
+
+def waitlist_promoted(user, booking):
+    return notify(user, "waitlist_promoted", f"Off the waitlist: {booking.room.name}", (
+        f"{booking.room.name} freed up. You are booked from {booking.check_in:%d %b %Y %H:%M} "
+        f"to {booking.check_out:%d %b %Y %H:%M}."
+    ))
+
+
+def order_placed(order):
+    return notify(order.user, "order_placed", f"Order received: {order.item.name}", (
+        f"We received your order of {order.quantity} x {order.item.name}."
+    ))
+
+
+def order_updated(order):
+    status = order.get_status_display().lower()
+    return notify(order.user, "order_updated", f"Order {status}: {order.item.name}", (
+        f"Your order of {order.quantity} x {order.item.name} is now {status}."
+    ))
+
+
+def backoff(attempts):
+    base = _setting("OUTBOX_BACKOFF_SECONDS", 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), _setting("OUTBOX_BACKOFF_MAX_SECONDS", 3600)))
+
+
+@transaction.atomic
+def claim(batch_size, now):
+    """Lease the next due rows to this dispatcher."""
+    due = Notification.objects.filter(status="pending", next_attempt_at__lte=now).order_by("next_attempt_at", "id")
+    if db_connection.features.has_select_for_update_skip_locked:
+        due = due.select_for_update(skip_locked=True)
+    batch = list(due[:batch_size])
+    if batch:
+        Notification.objects.filter(pk__in=[n.pk for n in batch]).update(
+            next_attempt_at=now + timedelta(seconds=_setting("OUTBOX_LEASE_SECONDS", 300))
+        )
+    return batch
+
+
+def send_batch(batch, mail, now):
+    """Send each message over ``mail``; returns (sent, retried, failed).
+
+    If the connection can't be reopened, the outcomes so far are saved and
+    the error is raised; the rest of the batch waits out its lease.
+    """
+    sent = retried = failed = 0
+    done = []
+    for notification in batch:
+        message = EmailMessage(
+            notification.subject, notification.body, to=[notification.email], connection=mail,
+        )
+        notification.attempts += 1
+        try:
+            mail.send_messages([message])
+        except Exception as e:
+            notification.last_error = f"{type(e).__name__}: {e}"
+            if notification.attempts >= _setting("OUTBOX_MAX_ATTEMPTS", 5):
+                notification.status = "failed"
+                failed += 1
+            else:
+                notification.next_attempt_at = now + backoff(notification.attempts)
+                retried += 1
+            logger.warning("Notification %s attempt %s failed: %s", notification.pk, notification.attempts, e)
+            done.append(notification)
+            # The connection may be the problem; start the rest of the batch on a fresh one.
+            try:
+                mail.close()
+                mail.open()
+            except Exception:
+                Notification.objects.bulk_update(done, FIELDS)
+                raise
+        else:
+            notification.status, notification.sent_at, notification.last_error = "sent", now, ""
+            sent += 1
+            done.append(notification)
+    Notification.objects.bulk_update(done, FIELDS)
+    return sent, retried, failed
+
+
+def dispatch(batch_size=None, max_batches=None, now=None):
+    """Deliver every due notification; returns counts."""
+    batch_size = batch_size or _setting("OUTBOX_BATCH_SIZE", 100)
+    counts = {"sent": 0, "retried": 0, "failed": 0, "batches": 0}
+    mail = get_connection()
+    mail.open()
+    try:
+        while max_batches is None or counts["batches"] < max_batches:
+            started = now or timezone.now()
+            batch = claim(batch_size, started)
+            if not batch:
+                break
+            sent, retried, failed = send_batch(batch, mail, started)
+            counts["sent"] += sent
+            counts["retried"] += retried
+            counts["failed"] += failed
+            counts["batches"] += 1
+    finally:
+        mail.close()
+    return counts
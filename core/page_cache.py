@@ -0,0 +1,279 @@
+"""
+Full-page cache for anonymous GETs of the public pages.
+
+``@cache_anonymous_page("rooms")`` caches the rendered response per path and
+query string for ``PAGE_CACHE_TTL`` seconds. A request counts as anonymous
+when it carries no session or flash-message cookie, so hits never touch the
+session store or the database. Responses that set cookies are not cached.
+The navbar's login/register forms carry a CSRF token; it is stored as a
+placeholder and filled in with a fresh token for each visitor.
+
+Invalidation uses surrogate keys. Each key has a version number in the cache,
+and every entry records the versions it was built under. Saving or deleting
+a model listed in ``SURROGATE_KEYS`` bumps its keys, which retires only the
+pages that depend on them. The bump happens immediately and again on commit,
+so a page rebuilt mid-transaction is not kept. Queryset ``update()`` and
+``bulk_create()`` bypass signals; call ``purge(...)`` after them.
+
+Stampedes: when an entry is missing or out of date, ``cache.add`` elects one
+request to rebuild it. Until it finishes, the others serve the old copy if
+there is one. Otherwise they wait up to ``PAGE_CACHE_LOCK_WAIT`` seconds for
+the new copy before rendering the page themselves.
+"""
+import asyncio
+import hashlib
+import re
+import time
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+SURROGATE_KEYS = {
+    "booking.Room": ["rooms"],
+    "booking.RoomImage": ["rooms"],
+    "menu.MenuItem": ["menu"],
+    "menu.Category": ["menu"],
+    "menu.Rating": ["menu"],
+}
+
+POLL_INTERVAL = 0.05
+
+_CSRF_INPUT = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b"__page_cache_csrf_token__"
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def is_cacheable(request):
+    return (
+        _setting("PAGE_CACHE_ENABLED", True)
+        and request.method in ("GET", "HEAD")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and "messages" not in request.COOKIES
+    )
+
+
+def page_key(request):
+    digest = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+    return f"page:{digest}"
+
+
+def _version_key(name):
+    return f"page:key:{name}"
+
+
+def _versions(keys, found):
+    """Current version of each surrogate key (``found`` holds those already read), creating missing ones."""
+    current = {}
+    for name in keys:
+        value = found.get(_version_key(name))
+        if value is None:
+            # Seeded from the clock, so an evicted key can't come back at a version old entries carry.
+            cache.add(_version_key(name), time.time_ns(), None)
+            value = cache.get(_version_key(name))
+        current[name] = value
+    return current
+
+
+async def _aversions(keys, found):
+    current = {}
+    for name in keys:
+        value = found.get(_version_key(name))
+        if value is None:
+            await cache.aadd(_version_key(name), time.time_ns(), None)
+            value = await cache.aget(_version_key(name))
+        current[name] = value
+    return current
+
+
+def purge(*keys):
+    for name in keys:
+        try:
+            cache.incr(_version_key(name))
+        except ValueError:
+            cache.set(_version_key(name), time.time_ns(), None)
+
+
+def _entry(response, current):
+    return {
+        "versions": current,
+        "expires": time.time() + _setting("PAGE_CACHE_TTL", 300),
+        "status": response.status_code,
+        "content_type": response["Content-Type"],
+        "content": _CSRF_INPUT.sub(rb"\1" + CSRF_PLACEHOLDER + rb"\2", response.content),
+    }
+
+
+def _entry_timeout():
+    return _setting("PAGE_CACHE_TTL", 300) + _setting("PAGE_CACHE_STALE", 60)
+
+
+def _response(request, entry, state):
+    content = entry["content"]
+    if CSRF_PLACEHOLDER in content:
+        # Any masked form of the visitor's secret is valid; CsrfViewMiddleware sets the cookie.
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+    response = HttpResponse(content, status=entry["status"], content_type=entry["content_type"])
+    response["X-Page-Cache"] = state
+    return response
+
+
+def _storable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+    )
+
+
+class _Lookup:
+    """What the cache says about one request before the view runs.
+
+    Each step has an ``a``-prefixed twin for async views, so the event loop
+    never blocks on a cache round trip. The entry and the key versions are
+    read together in one ``get_many``.
+    """
+
+    def __init__(self, request, keys):
+        self.keys = keys
+        self.key = page_key(request)
+        self.lock = f"{self.key}:lock"
+        self.current = self.entry = None
+
+    def _names(self):
+        return [self.key] + [_version_key(name) for name in self.keys]
+
+    def load(self):
+        found = cache.get_many(self._names())
+        self.entry, self.current = found.get(self.key), _versions(self.keys, found)
+        return self
+
+    async def aload(self):
+        found = await cache.aget_many(self._names())
+        self.entry, self.current = found.get(self.key), await _aversions(self.keys, found)
+        return self
+
+    @property
+    def fresh(self):
+        return (
+            self.entry is not None
+            and self.entry["versions"] == self.current
+            and self.entry["expires"] > time.time()
+        )
+
+    def _lock_timeout(self):
+        return _setting("PAGE_CACHE_LOCK_TIMEOUT", 10)
+
+    def elect(self):
+        return cache.add(self.lock, 1, self._lock_timeout())
+
+    async def aelect(self):
+        return await cache.aadd(self.lock, 1, self._lock_timeout())
+
+    def _current_or_none(self, entry):
+        return entry if entry is not None and entry["versions"] == self.current else None
+
+    def poll(self):
+        return self._current_or_none(cache.get(self.key))
+
+    async def apoll(self):
+        return self._current_or_none(await cache.aget(self.key))
+
+    def finish(self, response, elected):
+        if elected:
+            if _storable(response):
+                cache.set(self.key, _entry(response, self.current), _entry_timeout())
+            cache.delete(self.lock)
+        response["X-Page-Cache"] = "miss"
+        return response
+
+    async def afinish(self, response, elected):
+        if elected:
+            if _storable(response):
+                await cache.aset(self.key, _entry(response, self.current), _entry_timeout())
+            await cache.adelete(self.lock)
+        response["X-Page-Cache"] = "miss"
+        return response
+
+
+def _lock_deadline():
+    return time.monotonic() + _setting("PAGE_CACHE_LOCK_WAIT", 2)
+
+
+def cache_anonymous_page(*keys):
+    """Cache a view's anonymous GET responses; ``keys`` are the surrogate keys it depends on."""
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if not is_cacheable(request):
+                    return await view(request, *args, **kwargs)
+                lookup = await _Lookup(request, keys).aload()
+                if lookup.fresh:
+                    return _response(request, lookup.entry, "hit")
+                elected = await lookup.aelect()
+                if not elected:
+                    if lookup.entry is not None:
+                        return _response(request, lookup.entry, "stale")
+                    deadline = _lock_deadline()
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(POLL_INTERVAL)
+                        entry = await lookup.apoll()
+                        if entry is not None:
+                            return _response(request, entry, "hit")
+                try:
+                    response = await view(request, *args, **kwargs)
+                except BaseException:
+                    if elected:
+                        await cache.adelete(lookup.lock)
+                    raise
+                return await lookup.afinish(response, elected)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if not is_cacheable(request):
+                    return view(request, *args, **kwargs)
+                lookup = _Lookup(request, keys).load()
+                if lookup.fresh:
+                    return _response(request, lookup.entry, "hit")
+                elected = lookup.elect()
+                if not elected:
+                    if lookup.entry is not None:
+                        return _response(request, lookup.entry, "stale")
+                    deadline = _lock_deadline()
+                    while time.monotonic() < deadline:
+                        time.sleep(POLL_INTERVAL)
+                        entry = lookup.poll()
+                        if entry is not None:
+                            return _response(request, entry, "hit")
+                try:
+                    response = view(request, *args, **kwargs)
+                except BaseException:
+                    if elected:
+                        cache.delete(lookup.lock)
+                    raise
+                return lookup.finish(response, elected)
+        return wrapper
+    return decorator
+
+
+def _purge_for(sender, **kwargs):
+    keys = SURROGATE_KEYS.get(sender._meta.label, ())
+    purge(*keys)
+    transaction.on_commit(lambda: purge(*keys))
+
+
+def connect_signals():
+    for label in SURROGATE_KEYS:
+        model = apps.get_model(label)
+        post_save.connect(_purge_for, sender=model, dispatch_uid=f"page_cache_save_{label}")
+        post_delete.connect(_purge_for, sender=model, dispatch_uid=f"page_cache_delete_{label}")
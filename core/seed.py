@@ -0,0 +1,167 @@
+"""
+Deterministic synthetic dataset for benchmarks and load tests.
+
+``seed(...)`` fills every app's tables with ``bulk_create`` from a seeded
+``random.Random``, so the same arguments always produce the same rows.
+Bookings never overlap within a room; their status follows the clock
+(completed in the past, checked_in now, confirmed in the future) with a few
+cancellations sprinkled in. Meant for an empty database: usernames and
+category names would collide on a second run.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import NormalizedEmail, UserProfile
+from booking.models import Booking, BookingStatus, Review, Room, RoomImage
+from menu.models import Category, MenuItem, Order, OrderStatus, Rating
+
+SEED_PASSWORD = "seed-password"
+BATCH_SIZE = 1000
+
+ROOM_TYPES = ["Standard", "Deluxe", "Suite", "Family", "Penthouse"]
+CATEGORIES = ["Breakfast", "Mains", "Desserts", "Drinks", "Snacks"]
+
+
+def _bulk(model, rows):
+    return model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+@transaction.atomic
+def seed(rooms=50, bookings=2000, users=200, menu_items=40, ratings=1000, orders=1000,
+         years=3, images_per_room=3, seed=42, now=None):
+    rng = random.Random(seed)
+    now = now or timezone.now().replace(minute=0, second=0, microsecond=0)
+    counts = {}
+
+    # 👤 Users (one password hash shared by all; hashing is the slow part)
+    password = make_password(SEED_PASSWORD)
+    user_rows = _bulk(User, [
+        User(username=f"guest{i:05d}", email=f"guest{i:05d}@example.com", password=password)
+        for i in range(users)
+    ])
+    user_rows = list(User.objects.filter(username__in=[u.username for u in user_rows]).order_by("id"))
+    _bulk(NormalizedEmail, [NormalizedEmail(user=u, email=u.email) for u in user_rows])
+    _bulk(UserProfile, [
+        UserProfile(user=u, role="worker" if i % 25 == 0 else "customer", phone=f"98{i:08d}")
+        for i, u in enumerate(user_rows)
+    ])
+    counts["users"] = len(user_rows)
+
+    # 🏨 Rooms and images
+    _bulk(Room, [
+        Room(
+            name=f"{ROOM_TYPES[i % len(ROOM_TYPES)]} {100 + i}",
+            room_type=ROOM_TYPES[i % len(ROOM_TYPES)],
+            description="Synthetic room",
+            price=Decimal(rng.randrange(3000, 30000, 500)),
+            capacity=rng.randint(1, 6),
+            amenities="WiFi, TV, AC",
+            bedrooms=rng.randint(1, 3),
+            bathrooms=rng.randint(1, 2),
+            size=rng.randrange(250, 1500, 50),
+            security_level=rng.choice(["Standard", "High"]),
+        )
+        for i in range(rooms)
+    ])
+    room_rows = list(Room.objects.filter(description="Synthetic room").order_by("id"))
+    _bulk(RoomImage, [
+        RoomImage(room=room, image_url=f"https://images.example.com/rooms/{room.id}/{j}.jpg", caption=f"View {j}")
+        for room in room_rows for j in range(images_per_room)
+    ])
+    counts["rooms"] = len(room_rows)
+
+    # 📅 Bookings: walk each room's calendar from `years` ago to a year ahead
+    start = now - timedelta(days=365 * years)
+    end = now + timedelta(days=365)
+    per_room = max(1, bookings // max(1, len(room_rows)))
+    span_hours = (end - start).total_seconds() / 3600
+    booking_rows = []
+    # Lead times get their own stream so adding them didn't reshuffle the rest of the dataset.
+    lead_rng = random.Random(seed + 1)
+    for room in room_rows:
+        cursor = start
+        # Stays average four nights; spread the idle time so the walk reaches `end`.
+        mean_gap = max(0.0, span_hours / per_room - 4 * 24)
+        for _ in range(per_room):
+            cursor += timedelta(hours=rng.uniform(0, mean_gap * 2))
+            nights = rng.randint(1, 7)
+            check_in = cursor.replace(hour=14)
+            check_out = check_in + timedelta(days=nights, hours=-3)
+            if check_out > end:
+                break
+            cursor = check_out
+            if rng.random() < 0.05:
+                status = BookingStatus.CANCELLED
+            elif check_out < now:
+                status = BookingStatus.COMPLETED
+            elif check_in <= now:
+                status = BookingStatus.CHECKED_IN
+            else:
+                status = BookingStatus.CONFIRMED
+            booking_rows.append(Booking(
+                room=room,
+                guest_name=rng.choice(user_rows).username,
+                check_in=check_in,
+                check_out=check_out,
+                status=status,
+                total_price=room.price * nights,
+                created_at=min(now, check_in - timedelta(hours=lead_rng.expovariate(1 / (21 * 24)))),
+            ))
+    _bulk(Booking, booking_rows)
+    # Re-read rather than trust bulk_create to set pks (MySQL doesn't).
+    booking_rows = list(Booking.objects.filter(room__in=room_rows).select_related("room").order_by("id"))
+    counts["bookings"] = len(booking_rows)
+
+    users_by_name = {u.username: u for u in user_rows}
+    completed = [b for b in booking_rows if b.status == BookingStatus.COMPLETED]
+    _bulk(Review, [
+        Review(room=b.room, user=users_by_name[b.guest_name], text="Synthetic review", rating=rng.randint(1, 5))
+        for b in rng.sample(completed, min(len(completed), bookings // 10))
+    ])
+
+    # 🍽️ Menu, ratings and orders
+    _bulk(Category, [Category(name=name) for name in CATEGORIES])
+    category_rows = list(Category.objects.filter(name__in=CATEGORIES).order_by("id"))
+    _bulk(MenuItem, [
+        MenuItem(
+            name=f"Dish {i}",
+            category=category_rows[i % len(category_rows)],
+            description="Synthetic dish",
+            price=Decimal(rng.randrange(200, 3000, 50)),
+            estimated_time=rng.randint(5, 45),
+            loyalty_points=rng.randint(0, 50),
+            image_url=f"https://images.example.com/menu/{i}.jpg",
+        )
+        for i in range(menu_items)
+    ])
+    item_rows = list(MenuItem.objects.filter(description="Synthetic dish").order_by("id"))
+    counts["menu_items"] = len(item_rows)
+
+    if item_rows:
+        _bulk(Rating, [
+            Rating(menu_item=rng.choice(item_rows), user=rng.choice(user_rows), value=rng.randint(1, 5))
+            for _ in range(ratings)
+        ])
+        counts["ratings"] = ratings
+
+    stays = [b for b in booking_rows if b.status in (BookingStatus.CHECKED_IN, BookingStatus.COMPLETED)]
+    if stays and item_rows:
+        _bulk(Order, [
+            Order(
+                user=users_by_name[b.guest_name],
+                booking=b,
+                item=rng.choice(item_rows),
+                quantity=rng.randint(1, 3),
+                status=OrderStatus.DELIVERED if b.status == BookingStatus.COMPLETED else rng.choice(OrderStatus.values),
+            )
+            for b in (rng.choice(stays) for _ in range(orders))
+        ])
+        counts["orders"] = orders
+
+    return counts
@@ -0,0 +1,38 @@
+"""
+Status state machines for bookings and orders.
+
+Statuses are stored as small-integer ``IntegerChoices`` (``BookingStatus``,
+``OrderStatus``), exposed on the model as ``Status``. A model lists its
+allowed moves in ``TRANSITIONS`` (``{from: {to, ...}}``). ``save()`` calls
+``check``, and bulk ``update()`` paths use ``sources(model, to)`` to narrow
+their queryset to the rows that may move.
+
+``name`` gives the stable lowercase name (``"checked_in"``). Anything
+outside the database uses it: the event log (core/events.py), templates
+and CSS classes.
+"""
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def name(status_class, code):
+    """``"checked_in"`` for ``BookingStatus.CHECKED_IN`` (or its code)."""
+    return status_class(code).name.lower()
+
+
+def allowed(model, current, new):
+    return current == new or new in model.TRANSITIONS.get(current, ())
+
+
+def check(model, current, new):
+    if not allowed(model, current, new):
+        raise InvalidTransition(
+            f"{model.__name__} can't go from {name(model.Status, current)} to {name(model.Status, new)}."
+        )
+
+
+def sources(model, new):
+    """Statuses a row may be in to move to ``new``."""
+    return [current for current, targets in model.TRANSITIONS.items() if new in targets]
@@ -0,0 +1,68 @@
+"""
+Static files storage with precompressed siblings.
+
+``collectstatic`` hashes file names like ``ManifestStaticFilesStorage`` and
+then writes ``.gz`` (and, when ``brotli`` is installed, ``.br``) copies of
+the text assets next to them.
+``core.middleware.PrecompressedStaticMiddleware`` serves those copies to
+clients that accept the encoding.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # optional; gzip siblings are always written
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".txt", ".json", ".map", ".html", ".xml"}
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashed static file names plus precompressed ``.gz``/``.br`` siblings.
+
+    ``collectstatic`` is the build step; ``core.middleware.PrecompressedStaticMiddleware``
+    serves the result.
+    """
+    # Fall back to hashing on the fly instead of raising when a file is missing
+    # from the manifest (e.g. in tests that never ran collectstatic).
+    manifest_strict = False
+
+    def stored_name(self, name):
+        # Templates reference a few files that were never added (e.g.
+        # images/default-avatar.png). Render their plain URL like the default
+        # storage does instead of failing the whole page.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in sorted(names):
+            self.compress(name)
+
+    def compress(self, name):
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return
+        path = self.path(name)
+        if not os.path.isfile(path):
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+
+        variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(data)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(data):
+                with open(path + suffix, "wb") as f:
+                    f.write(compressed)
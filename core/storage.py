@@ -0,0 +1,56 @@
+"""
+Content-addressed media storage.
+
+Uploads are stored under ``cas/<aa>/<sha256><ext>`` instead of the field's
+``upload_to`` path, so identical files uploaded to any ImageField share one
+copy on disk. ``core.media`` keeps ``MediaBlob.ref_count`` in step with the
+model fields that point at each file, and ``delete()`` only removes a file
+once nothing references it any more.
+"""
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+CAS_PREFIX = "cas"
+
+
+def content_name(digest, original_name):
+    ext = os.path.splitext(original_name)[1].lower()
+    return f"{CAS_PREFIX}/{digest[:2]}/{digest}{ext}"
+
+
+def hash_file(content):
+    """Return ``(sha256 hexdigest, size)`` of a Django File, rewinding it afterwards."""
+    sha = hashlib.sha256()
+    size = 0
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks():
+        sha.update(chunk)
+        size += len(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    return sha.hexdigest(), size
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def _save(self, name, content):
+        from core.models import MediaBlob
+
+        digest, size = hash_file(content)
+        name = content_name(digest, name)
+        if not self.exists(name):
+            # A concurrent upload of the same bytes can still win the race;
+            # FileSystemStorage then falls back to a suffixed name.
+            name = super()._save(name, content)
+        MediaBlob.objects.get_or_create(name=name, defaults={"size": size})
+        return name
+
+    def delete(self, name):
+        from core.models import MediaBlob
+
+        if MediaBlob.objects.filter(name=name, ref_count__gt=0).exists():
+            return
+        super().delete(name)
+        MediaBlob.objects.filter(name=name).delete()
@@ -0,0 +1,15 @@
+from django import template
+
+from core.image_cache import proxy_url
+
+register = template.Library()
+
+
+@register.filter
+def cached_image(url):
+    """Rewrite an external image URL to its locally cached copy.
+
+    Local media URLs are returned unchanged, so this is safe to apply to
+    ``RoomImage.get_image_source`` as well as raw ``image_url`` fields.
+    """
+    return proxy_url(url)
@@ -1,3 +1,860 @@
-from django.test import TestCase
+import io
+import logging
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from booking.models import Booking, BookingStatus, Room
+from booking.views import expire_old_bookings
+from core import events, image_cache, instrumentation, outbox
+from core.db_router import PrimaryReplicaRouter, _replica_reads
+from core.models import CachedImage, Event, MediaBlob, Notification
+from menu.models import MenuItem, Order
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        if self.path.startswith("/missing"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.path.startswith("/page"):
+            body, content_type = b"<html></html>", "text/html"
+        else:
+            body, content_type = PNG, "image/png"
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        _ImageHandler.hits = []
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media, IMAGE_CACHE_TTL=3600)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_fetches_once_then_serves_local_copy(self):
+        url = f"{self.base}/room.png"
+        first = image_cache.get_cached(url)
+        second = image_cache.get_cached(url)
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(len(_ImageHandler.hits), 1)
+        with second.file.open("rb") as f:
+            self.assertEqual(f.read(), PNG)
+
+    def test_stale_copy_is_revalidated_with_etag(self):
+        url = f"{self.base}/room.png"
+        entry = image_cache.get_cached(url)
+        CachedImage.objects.filter(pk=entry.pk).update(fetched_at=timezone.now() - timedelta(days=2))
+
+        image_cache.get_cached(url)
+
+        self.assertEqual(len(_ImageHandler.hits), 2)
+        entry.refresh_from_db()
+        self.assertGreater(entry.fetched_at, timezone.now() - timedelta(minutes=1))
+
+    def test_rejects_non_images_and_errors(self):
+        with self.assertRaises(image_cache.ImageCacheError):
+            image_cache.get_cached(f"{self.base}/page.html")
+        with self.assertRaises(image_cache.ImageCacheError):
+            image_cache.get_cached(f"{self.base}/missing.png")
+        self.assertFalse(CachedImage.objects.exists())
+
+    @override_settings(IMAGE_CACHE_MAX_FILE_BYTES=10)
+    def test_rejects_oversized_images(self):
+        with self.assertRaises(image_cache.ImageCacheError):
+            image_cache.get_cached(f"{self.base}/room.png")
+
+    def test_lru_eviction(self):
+        old = image_cache.get_cached(f"{self.base}/a.png")
+        CachedImage.objects.filter(pk=old.pk).update(last_accessed=timezone.now() - timedelta(days=1))
+        image_cache.get_cached(f"{self.base}/b.png")
+
+        image_cache.evict(limit=len(PNG))
+
+        self.assertEqual(
+            list(CachedImage.objects.values_list("url", flat=True)),
+            [f"{self.base}/b.png"],
+        )
+
+    def test_proxy_view(self):
+        url = f"{self.base}/menu.png"
+        response = self.client.get(image_cache.proxy_url(url))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertIn("max-age=3600", response["Cache-Control"])
+        self.assertEqual(b"".join(response.streaming_content), PNG)
+
+    def test_proxy_url_is_stable(self):
+        url = f"{self.base}/menu.png"
+        first = image_cache.proxy_url(url)
+        with mock.patch("time.time", return_value=time.time() + 60):
+            self.assertEqual(image_cache.proxy_url(url), first)
+
+    def test_concurrent_first_fetch_serves_the_winners_copy(self):
+        url = f"{self.base}/room.png"
+        winner = image_cache.get_cached(url)
+        # The other request looked before the winner's row existed.
+        missed = mock.Mock(**{"first.return_value": None})
+        with mock.patch.object(CachedImage.objects, "filter", return_value=missed):
+            loser = image_cache.get_cached(url)
+        self.assertEqual(loser.pk, winner.pk)
+        self.assertEqual(CachedImage.objects.count(), 1)
+
+    def test_proxy_view_rejects_unsigned_urls(self):
+        response = self.client.get("/img/not-a-token/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_local_urls_are_not_proxied(self):
+        self.assertEqual(image_cache.proxy_url("/media/room_images/a.png"), "/media/room_images/a.png")
+        self.assertEqual(image_cache.proxy_url(None), None)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_item(self, name, data=PNG, filename="stove.png"):
+        return MenuItem.objects.create(
+            name=name, price=5, estimated_time=10,
+            image=SimpleUploadedFile(filename, data, content_type="image/png"),
+        )
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.make_item("Stove")
+        second = self.make_item("Stove again", filename="el_stove_copy.png")
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith("cas/"))
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 2)
+
+    def test_file_is_deleted_with_its_last_reference(self):
+        first = self.make_item("Stove")
+        second = self.make_item("Stove again")
+        name = first.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(default_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.image = SimpleUploadedFile("other.png", PNG + b"!", content_type="image/png")
+            second.save()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+
+    def test_legacy_files_are_kept_while_rows_use_them(self):
+        legacy = "menu_images/el_stove.png"
+        with open(self._legacy_path(legacy), "wb") as f:
+            f.write(PNG)
+        items = [MenuItem.objects.create(name=f"Stove {i}", price=5, estimated_time=10) for i in range(3)]
+        MenuItem.objects.filter(pk__in=[item.pk for item in items]).update(image=legacy)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.get(pk=items[0].pk).delete()
+        self.assertTrue(default_storage.exists(legacy))
+
+        # A new reference starts counting from every row already using the file.
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.create(name="Stove copy", price=5, estimated_time=10, image=legacy)
+        self.assertEqual(MediaBlob.objects.get(name=legacy).ref_count, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.get(pk=items[1].pk).delete()
+        self.assertTrue(default_storage.exists(legacy))
+
+    def test_dedupe_media_moves_legacy_files(self):
+        for legacy in ["menu_images/el_stove.png", "menu_images/el_stove_cZzMJBS.png"]:
+            with open(self._legacy_path(legacy), "wb") as f:
+                f.write(PNG)
+            item = MenuItem.objects.create(name=legacy, price=5, estimated_time=10)
+            MenuItem.objects.filter(pk=item.pk).update(image=legacy)
+
+        out = io.StringIO()
+        call_command("dedupe_media", stdout=out)
+
+        names = set(MenuItem.objects.values_list("image", flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names.pop().startswith("cas/"))
+        self.assertFalse(default_storage.exists("menu_images/el_stove.png"))
+        self.assertIn(f"saved {len(PNG)} bytes", out.getvalue())
+
+    def _legacy_path(self, name):
+        path = os.path.join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+
+class GarbageCollectMediaTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.kept = MenuItem.objects.create(
+            name="Stove", price=5, estimated_time=10,
+            image=SimpleUploadedFile("stove.png", PNG, content_type="image/png"),
+        )
+        self.orphan = os.path.join(self.media, "room_images", "old.png")
+        os.makedirs(os.path.dirname(self.orphan))
+        with open(self.orphan, "wb") as f:
+            f.write(PNG)
+
+    def gc(self, *args):
+        out = io.StringIO()
+        call_command("gc_media", "--min-age=0", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_keeps_everything(self):
+        output = self.gc("--dry-run")
+        self.assertIn("orphan: room_images/old.png", output)
+        self.assertTrue(os.path.exists(self.orphan))
+
+    def test_deletes_only_unreferenced_files(self):
+        output = self.gc("--batch-size=1")
+        self.assertIn("Deleted 1 orphan(s)", output)
+        self.assertFalse(os.path.exists(self.orphan))
+        self.assertTrue(default_storage.exists(self.kept.image.name))
+
+    def test_files_referenced_during_the_walk_are_kept(self):
+        from core.management.commands.gc_media import Command
+        snapshot = Command.referenced_fingerprints
+
+        def then_reupload(command):
+            referenced = snapshot(command)
+            # Same bytes uploaded again: storage reuses the old file and its mtime.
+            item = MenuItem.objects.create(name="Old again", price=5, estimated_time=10)
+            MenuItem.objects.filter(pk=item.pk).update(image="room_images/old.png")
+            MediaBlob.objects.create(name="room_images/old.png", ref_count=1)
+            return referenced
+
+        with mock.patch.object(Command, "referenced_fingerprints", then_reupload):
+            output = self.gc()
+        self.assertIn("Deleted 0 orphan(s)", output)
+        self.assertTrue(os.path.exists(self.orphan))
+        self.assertEqual(MediaBlob.objects.get(name="room_images/old.png").ref_count, 1)
+
+    def test_quarantine(self):
+        quarantine = os.path.join(self.media, "quarantine")
+        self.gc(f"--quarantine={quarantine}")
+        self.assertTrue(os.path.exists(os.path.join(quarantine, "room_images", "old.png")))
+        # The quarantine directory itself is never scanned.
+        self.assertIn("Quarantined 0", self.gc(f"--quarantine={quarantine}"))
+
+
+class PrecompressedStaticTests(TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        for path in (self.source, self.root):
+            self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        os.makedirs(os.path.join(self.source, "css"))
+        with open(os.path.join(self.source, "css", "site.css"), "w") as f:
+            f.write("body { color: #333; }\n" * 100)
+
+        override = override_settings(STATICFILES_DIRS=[self.source], STATIC_ROOT=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        self.hashed = staticfiles_storage.stored_name("css/site.css")
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertNotEqual(self.hashed, "css/site.css")
+        self.assertTrue(os.path.exists(os.path.join(self.root, self.hashed + ".gz")))
+
+    def test_hashed_name_is_immutable_and_precompressed(self):
+        response = self.client.get(f"/static/{self.hashed}", HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_unhashed_name_without_gzip(self):
+        response = self.client.get("/static/css/site.css", HTTP_ACCEPT_ENCODING="gzip;q=0")
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+    def test_missing_files_fall_through(self):
+        self.assertEqual(self.client.get("/static/css/nope.css").status_code, 404)
+        self.assertEqual(self.client.get("/static/../manage.py").status_code, 404)
+
+
+class AsyncPublicPageTests(TestCase):
+    def setUp(self):
+        from booking.models import Room
+        from menu.models import Category
+        category = Category.objects.create(name="Mains")
+        for i in range(5):
+            MenuItem.objects.create(name=f"Dish {i}", category=category, price=5, estimated_time=10)
+            Room.objects.create(name=f"Room {i}", description="", price=100, capacity=2, amenities="")
+
+    async def test_public_menu_paginates(self):
+        response = await self.async_client.get("/menu/", {"page": 2})
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context["page_obj"]
+        self.assertEqual(page_obj.number, 2)
+        self.assertEqual([item.name for item in page_obj], ["Dish 3", "Dish 4"])
+        self.assertEqual(len(response.context["categories"]), 1)
+
+    async def test_public_booking(self):
+        response = await self.async_client.get("/rooms/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["page_obj"].paginator.count, 5)
+
+    @override_settings(DEBUG=True)  # Django only logs adaptations in debug mode
+    def test_asgi_middleware_chain_is_not_adapted_to_sync(self):
+        from django.core.handlers.asgi import ASGIHandler
+        with self.assertLogs("django.request", "DEBUG") as logs:
+            ASGIHandler()
+            logging.getLogger("django.request").debug("loaded")
+        self.assertEqual([line for line in logs.output if "adapted" in line], [])
+
+    async def test_async_requests_are_instrumented(self):
+        instrumentation.registry.reset()
+        await self.async_client.get("/menu/")
+        self.assertGreater(instrumentation.registry.snapshot()["core.views.public_menu"]["queries"], 0)
+
+
+class LazySessionWriteMiddlewareTests(TestCase):
+    def run_middleware(self, session_key, view):
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from core.middleware import LazySessionWriteMiddleware
+
+        def get_response(request):
+            view(request.session)
+            return HttpResponse()
+
+        request = RequestFactory().get("/")
+        request.COOKIES["sessionid"] = session_key
+        middleware = LazySessionWriteMiddleware(get_response)
+        with mock.patch.object(middleware.SessionStore, "save", autospec=True) as save:
+            response = middleware(request)
+        return save, response
+
+    def make_session(self, **data):
+        from django.contrib.sessions.backends.db import SessionStore
+        session = SessionStore()
+        session.update(data)
+        session.create()
+        return session.session_key
+
+    def test_rewriting_the_same_value_does_not_save(self):
+        key = self.make_session(cart="a")
+
+        def view(session):
+            session["cart"] = "a"
+
+        save, response = self.run_middleware(key, view)
+        save.assert_not_called()
+        self.assertNotIn("sessionid", response.cookies)
+
+    def test_real_changes_are_saved(self):
+        key = self.make_session(cart="a")
+
+        def view(session):
+            session["cart"] = "b"
+
+        save, _ = self.run_middleware(key, view)
+        save.assert_called_once()
+
+    def test_purge_sessions_in_batches(self):
+        from django.contrib.sessions.models import Session
+        expired = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create(
+            Session(session_key=f"k{i:038d}", session_data="", expire_date=expired) for i in range(5)
+        )
+        out = io.StringIO()
+        call_command("purge_sessions", "--batch-size=2", stdout=out)
+        self.assertIn("Deleted 5 expired session(s) in 3 batch(es).", out.getvalue())
+        self.assertFalse(Session.objects.exists())
+
+
+class SQLInstrumentationTests(TestCase):
+    def setUp(self):
+        from menu.models import Category
+        instrumentation.registry.reset()
+        category = Category.objects.create(name="Mains")
+        for i in range(3):
+            MenuItem.objects.create(name=f"Dish {i}", category=category, price=5, estimated_time=10)
+
+    def test_fingerprint_collapses_literals(self):
+        self.assertEqual(
+            instrumentation.fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND x = 'a' LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (...) AND x = ? LIMIT ?",
+        )
+
+    @override_settings(QUERY_REPEAT_THRESHOLD=3, QUERY_BUDGETS={"core.views.public_menu": 2})
+    def test_flags_repeated_queries_and_budget(self):
+        with self.assertLogs("hotelgrand.sql", "WARNING") as logs:
+            self.client.get("/menu/")
+
+        stats = logs.records[0].sql_stats
+        self.assertEqual(stats["view"], "core.views.public_menu")
+        self.assertTrue(stats["over_budget"])
+        self.assertTrue(any('"menu_category"' in sql for sql in stats["repeated"]))
+
+        snapshot = instrumentation.registry.snapshot()["core.views.public_menu"]
+        self.assertEqual(snapshot["requests"], 1)
+        self.assertEqual(snapshot["queries"], stats["queries"])
+
+    def test_metrics_endpoint(self):
+        self.client.get("/about/")
+        response = self.client.get("/metrics")
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        self.assertIn('hotelgrand_view_requests_total{view="core.views.about"} 1', response.content.decode())
+
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="203.0.113.9").status_code, 404)
+
+
+class SeedTests(TestCase):
+    def seed(self, now):
+        from core.seed import seed
+        return seed(rooms=5, bookings=200, users=20, menu_items=5, ratings=50, orders=30, years=1, now=now)
+
+    def bookings(self):
+        from booking.models import Booking
+        return list(Booking.objects.order_by("room__name", "check_in").values_list(
+            "room__name", "guest_name", "check_in", "check_out", "status"
+        ))
+
+    def test_seed_is_deterministic_and_bookings_do_not_overlap(self):
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        with transaction.atomic():
+            counts = self.seed(now)
+            first = self.bookings()
+            transaction.set_rollback(True)
+
+        self.assertEqual(counts["rooms"], 5)
+        self.assertGreater(counts["bookings"], 100)
+        previous = {}
+        for room_name, _, check_in, check_out, _ in first:
+            self.assertGreaterEqual(check_in, previous.get(room_name, check_in))
+            previous[room_name] = check_out
+
+        self.seed(now)
+        self.assertEqual(self.bookings(), first)
+
+
+class PerformanceCheckTests(TestCase):
+    def issue_ids(self):
+        from core.checks import check_performance_settings
+        return {issue.id for issue in check_performance_settings(None)}
+
+    def test_flags_connection_per_request_and_unhealthchecked_reuse(self):
+        from django.db import connections
+
+        with mock.patch.dict(connections.settings["default"], ENGINE="django.db.backends.mysql", CONN_MAX_AGE=0):
+            self.assertIn("core.W001", self.issue_ids())
+        with mock.patch.dict(connections.settings["default"], ENGINE="django.db.backends.mysql",
+                             CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=False):
+            self.assertIn("core.W002", self.issue_ids())
+        with mock.patch.dict(connections.settings["default"], ENGINE="django.db.backends.mysql",
+                             CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True):
+            self.assertFalse({"core.W001", "core.W002"} & self.issue_ids())
+
+    def test_flags_uncached_templates_and_per_process_cache(self):
+        from django.conf import settings
+
+        uncached = [{**settings.TEMPLATES[0], "APP_DIRS": False, "OPTIONS": {
+            **settings.TEMPLATES[0]["OPTIONS"], "loaders": ["django.template.loaders.filesystem.Loader"],
+        }}]
+        with override_settings(TEMPLATES=uncached):
+            self.assertIn("core.W003", self.issue_ids())
+        self.assertNotIn("core.W003", self.issue_ids())
+
+        self.assertIn("core.W004", self.issue_ids())
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}):
+            self.assertNotIn("core.W004", self.issue_ids())
+
+    def test_startup_report_logs_effective_settings(self):
+        from core.checks import startup_report
+
+        with self.assertLogs("hotelgrand.startup", "INFO") as logs:
+            startup_report()
+        self.assertIn('"templates_cached": true', logs.output[0])
+
+
+@skipUnless("replica" in settings.DATABASES, "needs a replica alias, e.g. --settings=hotelgrand.settings.test")
+@override_settings(REPLICA_DATABASE="replica")
+class ReplicaRoutingTests(TestCase):
+    databases = {"default", "replica"} & set(settings.DATABASES)
+
+    def setUp(self):
+        room = dict(description="A room", price=100, capacity=2, amenities="WiFi")
+        Room.objects.create(name="Primary suite", **room)
+        Room.objects.using("replica").create(name="Replica suite", **room)
+
+    def test_public_pages_read_from_the_replica(self):
+        response = self.client.get("/rooms/")
+        self.assertContains(response, "Replica suite")
+        self.assertNotContains(response, "Primary suite")
+
+    def test_a_write_pins_the_browser_to_the_primary(self):
+        response = self.client.post("/login/", {"username": "nobody", "password": "wrong"})
+        self.assertIn("pin_primary", response.cookies)
+
+        response = self.client.get("/rooms/")
+        self.assertContains(response, "Primary suite")
+        self.assertNotContains(response, "Replica suite")
+
+    def test_writes_sessions_and_users_stay_on_the_primary(self):
+        router = PrimaryReplicaRouter()
+        token = _replica_reads.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Room), "replica")
+            self.assertIsNone(router.db_for_read(User))
+            self.assertEqual(router.db_for_write(Room), "default")
+        finally:
+            _replica_reads.reset(token)
+        self.assertIsNone(router.db_for_read(Room))
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, PAGE_CACHE_LOCK_WAIT=0.1)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.room = Room.objects.create(name="Garden", description="A room", price=100, capacity=2, amenities="WiFi")
+
+    def test_anonymous_pages_are_served_from_cache_without_queries(self):
+        self.assertEqual(self.client.get("/rooms/")["X-Page-Cache"], "miss")
+        with self.assertNumQueries(0):
+            response = self.client.get("/rooms/")
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertContains(response, "Garden")
+        # The navbar's forms get a live CSRF token, not the stored placeholder.
+        self.assertNotContains(response, "__page_cache_csrf_token__")
+        self.assertContains(response, 'name="csrfmiddlewaretoken" value="')
+        # The query string is part of the key.
+        self.assertEqual(self.client.get("/rooms/?page=2")["X-Page-Cache"], "miss")
+
+    def test_token_from_a_cached_page_passes_csrf(self):
+        import re
+        from django.test import Client
+
+        self.client.get("/about/")
+        client = Client(enforce_csrf_checks=True)
+        response = client.get("/about/")
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+        response = client.post("/login/", {"username": "nobody", "password": "x", "csrfmiddlewaretoken": token})
+        self.assertNotEqual(response.status_code, 403)
+
+    def test_logged_in_users_bypass_the_cache(self):
+        self.client.force_login(User.objects.create_user("guest", password="pw"))
+        self.client.get("/rooms/")
+        self.assertNotIn("X-Page-Cache", self.client.get("/rooms/"))
+
+    def test_saving_a_model_purges_only_its_pages(self):
+        self.client.get("/rooms/")
+        self.client.get("/menu/")
+
+        self.room.name = "Orchard"
+        self.room.save()
+
+        response = self.client.get("/rooms/")
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "Orchard")
+        self.assertEqual(self.client.get("/menu/")["X-Page-Cache"], "hit")
+
+    async def test_async_views_use_the_async_cache_api(self):
+        from django.core.cache import cache
+        allowed = {"aget", "aget_many", "aadd", "aset", "adelete"}
+
+        class AsyncOnly:
+            def __getattr__(self, name):
+                if name not in allowed:
+                    raise AssertionError(f"blocking cache.{name}() on the event loop")
+                return getattr(cache, name)
+
+        with mock.patch("core.page_cache.cache", AsyncOnly()):
+            self.assertEqual((await self.async_client.get("/rooms/"))["X-Page-Cache"], "miss")
+            self.assertEqual((await self.async_client.get("/rooms/"))["X-Page-Cache"], "hit")
+
+    def test_rebuild_in_progress_serves_the_old_copy_or_waits(self):
+        from django.core.cache import cache
+        from django.test import RequestFactory
+        from core import page_cache
+
+        key = page_cache.page_key(RequestFactory().get("/rooms/"))
+        self.client.get("/rooms/")
+        page_cache.purge("rooms")
+        cache.add(f"{key}:lock", 1)
+
+        response = self.client.get("/rooms/")
+        self.assertEqual(response["X-Page-Cache"], "stale")
+        self.assertContains(response, "Garden")
+
+        # No old copy and the rebuild never lands: render after PAGE_CACHE_LOCK_WAIT, don't store.
+        cache.delete(key)
+        self.assertEqual(self.client.get("/rooms/")["X-Page-Cache"], "miss")
+        self.assertIsNone(cache.get(key))
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: one session per connection, every message accepted."""
+    connections = 0
+    messages = []
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        type(self).connections += 1
+        self.reply("220 stand-in")
+        while line := self.rfile.readline():
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 stand-in")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                data = b"".join(iter(lambda: self.rfile.readline(), b".\r\n"))
+                self.messages.append(data)
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class _BouncingBackend(LocmemEmailBackend):
+    def send_messages(self, messages):
+        if any("bounce" in address for message in messages for address in message.to):
+            raise ConnectionError("mailbox unavailable")
+        return super().send_messages(messages)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.guest = User.objects.create_user("guest", email="guest@example.com", password="pw")
+        self.room = Room.objects.create(name="Deluxe", description="A room", price=100, capacity=2, amenities="WiFi")
+
+    def queue(self, count, domain="example.com"):
+        username = f"user{User.objects.count()}"
+        user = User.objects.create_user(username, email=f"{username}@{domain}")
+        return [outbox.notify(user, "booking_confirmed", f"Subject {i}", "Body") for i in range(count)]
+
+    def test_booking_and_notification_commit_together(self):
+        self.client.force_login(self.guest)
+        check_in = timezone.localtime() + timedelta(days=3)
+        with self.assertRaises(RuntimeError), mock.patch.object(outbox, "notify", side_effect=RuntimeError):
+            self.client.post("/book/book/private/", {
+                "room_id": self.room.pk,
+                "check_in": check_in.strftime("%Y-%m-%dT%H:%M"),
+                "check_out": (check_in + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M"),
+            })
+        self.assertFalse(Booking.objects.exists())
+
+        self.client.post("/book/book/private/", {
+            "room_id": self.room.pk,
+            "check_in": check_in.strftime("%Y-%m-%dT%H:%M"),
+            "check_out": (check_in + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M"),
+        })
+        notification = Notification.objects.get()
+        self.assertEqual((notification.kind, notification.status), ("booking_confirmed", "pending"))
+        self.assertEqual(mail.outbox, [])
+        self.assertContains(self.client.get("/notifications/"), "Booking confirmed: Deluxe")
+
+    def test_dispatch_sends_in_batches_over_one_connection(self):
+        self.queue(5)
+        with mock.patch.object(outbox, "get_connection", wraps=outbox.get_connection) as get_connection:
+            counts = outbox.dispatch(batch_size=2)
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual((counts["sent"], counts["batches"]), (5, 3))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(Notification.objects.exclude(status="sent").exists())
+        self.assertEqual(outbox.dispatch()["sent"], 0)
+
+    @override_settings(EMAIL_BACKEND="core.tests._BouncingBackend", OUTBOX_MAX_ATTEMPTS=2, OUTBOX_BACKOFF_SECONDS=60)
+    def test_failures_back_off_then_give_up(self):
+        bouncing, = self.queue(1, domain="bounce.example.com")
+        self.queue(1)
+        now = timezone.now()
+        self.assertEqual(outbox.dispatch(now=now), {"sent": 1, "retried": 1, "failed": 0, "batches": 1})
+        bouncing.refresh_from_db()
+        self.assertEqual((bouncing.attempts, bouncing.next_attempt_at), (1, now + timedelta(seconds=60)))
+        self.assertIn("mailbox unavailable", bouncing.last_error)
+
+        self.assertEqual(outbox.dispatch(now=now + timedelta(seconds=30))["batches"], 0)
+        self.assertEqual(outbox.dispatch(now=now + timedelta(seconds=61))["failed"], 1)
+        bouncing.refresh_from_db()
+        self.assertEqual(bouncing.status, "failed")
+
+    def test_guests_without_email_are_not_queued_for_delivery(self):
+        nobody = User.objects.create_user("nobody")
+        self.assertEqual(outbox.notify(nobody, "order_placed", "Hi", "Body").status, "skipped")
+        self.assertEqual(outbox.dispatch()["batches"], 0)
+
+    def test_smtp_delivery_reuses_one_connection(self):
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        _SMTPHandler.connections, _SMTPHandler.messages = 0, []
+        self.queue(4)
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1", EMAIL_PORT=server.server_address[1], EMAIL_USE_TLS=False,
+        ):
+            counts = outbox.dispatch(batch_size=3)
+        self.assertEqual(counts["sent"], 4)
+        self.assertEqual(_SMTPHandler.connections, 1)
+        self.assertEqual(len(_SMTPHandler.messages), 4)
+
+
+class EventLogTests(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name="Deluxe", description="A room", price=100, capacity=2, amenities="WiFi")
+        self.admin = User.objects.create_superuser("boss", password="pw")
+
+    def book(self, days_ahead=3, status=BookingStatus.CONFIRMED):
+        check_in = timezone.now() + timedelta(days=days_ahead)
+        return Booking.objects.create(
+            room=self.room, guest_name="guest", check_in=check_in, check_out=check_in + timedelta(days=2), status=status,
+        )
+
+    def test_saves_log_creation_transitions_and_moves(self):
+        booking = self.book()
+        booking.status = BookingStatus.CHECKED_IN
+        booking.save()
+        booking.save()  # No change, no event.
+        booking.check_out += timedelta(days=1)
+        booking.save()
+        kinds = [(e.kind, e.from_status, e.to_status) for e in events.history("booking", booking.pk)]
+        self.assertEqual(kinds, [
+            ("created", "", "confirmed"), ("status", "confirmed", "checked_in"), ("rescheduled", "", ""),
+        ])
+        self.assertEqual(events.history("booking", booking.pk).last().data["to"]["check_out"],
+                         booking.check_out.isoformat())
+
+        fresh = Booking.objects.get(pk=booking.pk)
+        fresh.status = BookingStatus.COMPLETED
+        fresh.save()
+        self.assertEqual(events.status_at("booking", booking.pk, timezone.now() + timedelta(seconds=1)), "completed")
+
+    def test_admin_bulk_action_logs_one_event_per_row_with_actor(self):
+        bookings = [self.book(days_ahead=i) for i in range(1, 4)]
+        already = self.book(days_ahead=5, status=BookingStatus.CHECKED_IN)
+        self.client.force_login(self.admin)
+        self.client.post("/admin/booking/booking/", {
+            "action": "mark_as_checked_in",
+            "_selected_action": [b.pk for b in bookings] + [already.pk],
+        })
+        logged = Event.objects.filter(kind="status")
+        self.assertEqual(sorted(logged.values_list("entity_id", flat=True)), [b.pk for b in bookings])
+        self.assertEqual(set(logged.values_list("actor_id", "source", "from_status", "to_status")), {
+            (self.admin.pk, "admin.mark_as_checked_in", "confirmed", "checked_in"),
+        })
+
+    def test_order_status_changes_are_logged(self):
+        guest = User.objects.create_user("guest")
+        item = MenuItem.objects.create(name="Tea", description="Hot", price=3, estimated_time=5)
+        order = Order.objects.create(user=guest, booking=self.book(), item=item, quantity=2)
+        self.client.force_login(self.admin)
+        self.client.post("/admin/menu/order/", {"action": "mark_delivered", "_selected_action": [order.pk]})
+        self.assertEqual(list(events.history("order", order.pk).values_list("kind", "to_status", "actor_id")), [
+            ("created", "pending", guest.pk), ("status", "delivered", self.admin.pk),
+        ])
+
+    def test_expiry_sweep_logs_completions(self):
+        booking = self.book(days_ahead=-5)
+        expire_old_bookings()
+        event = Event.objects.get(kind="status")
+        self.assertEqual((event.entity_id, event.to_status, event.source), (booking.pk, "completed", "expiry_sweep"))
+        with self.assertNumQueries(1):
+            expire_old_bookings()  # Nothing due: a single SELECT, no lock, no insert.
+
+    def test_buffered_writes_are_one_insert(self):
+        with self.assertNumQueries(1), events.buffered():
+            for pk in range(1, 51):
+                events.record_transitions("booking", [(pk, BookingStatus.CONFIRMED)], BookingStatus.CANCELLED, source="test")
+        self.assertEqual(Event.objects.count(), 50)
+
+    def test_buffered_writes_roll_back_with_the_change(self):
+        with self.assertRaises(RuntimeError), transaction.atomic(), events.buffered():
+            self.book()
+            raise RuntimeError
+        self.assertFalse(Event.objects.exists())
+
+    def test_events_are_append_only(self):
+        event = Event.objects.create(entity="booking", entity_id=1, kind="created", to_status="confirmed")
+        event.to_status = "cancelled"
+        with self.assertRaises(ValueError):
+            event.save()
+        with self.assertRaises(ValueError):
+            event.delete()
+
+    def test_history_is_time_ranged_and_indexed(self):
+        start = timezone.now()
+        events.record([
+            Event(occurred_at=start + timedelta(hours=h), entity="booking", entity_id=7, kind="status", to_status=s)
+            for h, s in [(0, "confirmed"), (1, "checked_in"), (2, "completed")]
+        ])
+        window = events.history("booking", 7, start + timedelta(minutes=30), start + timedelta(hours=2))
+        self.assertEqual([e.to_status for e in window], ["checked_in"])
+        self.assertEqual(events.status_at("booking", 7, start + timedelta(minutes=90)), "checked_in")
+        self.assertIsNone(events.status_at("booking", 7, start))
+        if connection.vendor == "sqlite":
+            self.assertIn("event_entity_time", window.explain())
@@ -1,44 +1,65 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from menu.models import MenuItem, Category
 from booking.models import Room
+from core.db_router import read_from_replica
+from core.page_cache import cache_anonymous_page
 
+@cache_anonymous_page()
 def home(request):
     return render(request, 'public/home.html')
 
+@cache_anonymous_page()
 def about(request):
     return render(request, 'public/about.html')
 
-def public_booking(request):
-    return render(request, 'public/public_booking.html')
-
 from django.core.paginator import Paginator
 
-def public_menu(request):
-    items = MenuItem.objects.all()
-    paginator = Paginator(items, 3)  # Show 9 items per page
-    page_number = request.GET.get('page')
+
+async def apaginate(queryset, per_page, page_number):
+    """Async counterpart of ``Paginator(queryset, per_page).get_page(page_number)``.
+
+    The count and the page slice are fetched through the async ORM, so the
+    returned page's ``object_list`` is already a list.
+    """
+    paginator = Paginator(queryset, per_page)
+    paginator.count = await queryset.acount()
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = [obj async for obj in page_obj.object_list]
+    return page_obj
+
 
-    categories = Category.objects.prefetch_related('items').all()
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+@cache_anonymous_page("menu")
+@read_from_replica
+async def public_menu(request):
+    page_obj, categories = await asyncio.gather(
+        apaginate(MenuItem.objects.order_by('id'), 3, request.GET.get('page')),
+        alist(Category.objects.prefetch_related('items').all()),
+    )
 
     context = {
         'page_obj': page_obj,
         'categories': categories
     }
-    return render(request, 'public/public_menu.html', context)
+    return await sync_to_async(render)(request, 'public/public_menu.html', context)
 
 
-def public_booking(request):
-    rooms = Room.objects.all()
-    print("Rooms in DB:", rooms.count())
-    paginator = Paginator(rooms, 9)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+@cache_anonymous_page("rooms")
+@read_from_replica
+async def public_booking(request):
+    page_obj = await apaginate(Room.objects.order_by('id'), 9, request.GET.get('page'))
 
     context = {
         'page_obj': page_obj
     }
-    return render(request, 'public/public_booking.html', context)
+    return await sync_to_async(render)(request, 'public/public_booking.html', context)
 
 
 from django.contrib.auth.forms import UserCreationForm
@@ -46,3 +67,39 @@ from django.shortcuts import render, redirect
 
 
 
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from core import image_cache, instrumentation
+
+def cached_image(request, token):
+    url = image_cache.url_from_token(token)
+    if url is None:
+        raise Http404("Unknown image")
+
+    try:
+        entry = image_cache.get_cached(url)
+    except image_cache.ImageCacheError as e:
+        # Nothing cached yet and the origin is misbehaving: let the browser try it directly.
+        image_cache.logger.warning("Image cache miss fell through: %s", e)
+        return redirect(url)
+
+    response = FileResponse(entry.file.open("rb"), content_type=entry.content_type)
+    response["Cache-Control"] = f"public, max-age={int(image_cache.ttl().total_seconds())}"
+    return response
+
+
+
+def metrics(request):
+    # Scraped by Prometheus from inside the network only.
+    if request.META.get("REMOTE_ADDR") not in getattr(settings, "METRICS_ALLOWED_IPS", ["127.0.0.1", "::1"]):
+        raise Http404()
+    return HttpResponse(instrumentation.prometheus_text(), content_type="text/plain; version=0.0.4")
+
+
+@login_required
+def notifications(request):
+    # The outbox doubles as the in-site feed; the email may still be on its way.
+    return render(request, 'shared/notifications.html', {
+        'notifications': request.user.notifications.order_by('-created_at')[:50],
+    })
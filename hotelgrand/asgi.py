@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hotelgrand.settings')
 
 application = get_asgi_application()
+
+from core.checks import startup_report  # noqa: E402 -- needs the app registry loaded above
+
+startup_report()
@@ -0,0 +1,22 @@
+"""
+Settings layers: base (shared), dev, prod, bench and test.
+
+DJANGO_SETTINGS_MODULE=hotelgrand.settings picks a layer from HOTELGRAND_ENV
+(dev by default); a layer can also be named directly, e.g.
+--settings=hotelgrand.settings.bench or hotelgrand.settings.test.
+"""
+import os
+
+_env = os.environ.get('HOTELGRAND_ENV', 'dev')
+
+if _env == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif _env == 'bench':
+    from .bench import *  # noqa: F401,F403
+elif _env == 'test':
+    from .test import *  # noqa: F401,F403
+elif _env == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured(f"HOTELGRAND_ENV must be dev, prod, bench or test, not {_env!r}.")
@@ -0,0 +1,311 @@
+"""
+Django settings for hotelgrand project: the layer shared by dev, prod and bench.
+
+Generated by 'django-admin startproject' using Django 5.2.4.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.2/ref/settings/
+"""
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def env_bool(name, default=False):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_list(name, default=''):
+    return [item.strip() for item in os.environ.get(name, default).split(',') if item.strip()]
+
+
+def with_cached_loader(templates):
+    """Copy of TEMPLATES with the filesystem/app loaders wrapped in the cached loader."""
+    options = dict(templates[0]['OPTIONS'])
+    options['loaders'] = [('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ])]
+    return [{**templates[0], 'APP_DIRS': False, 'OPTIONS': options}] + templates[1:]
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'django-insecure-7n80f!if*hc3&g+4bcos5=zaow+zgy@of_#9(d4^zp)nl$2!42')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = env_bool('DJANGO_DEBUG', False)
+
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS')
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'menu',
+    'core',
+    'booking',
+    'accounts',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.PrecompressedStaticMiddleware',
+    'core.middleware.SQLInstrumentationMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
+    'core.middleware.LazySessionWriteMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'hotelgrand.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',    
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+
+WSGI_APPLICATION = 'hotelgrand.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+
+# Credentials come from the environment; the defaults are the local dev database
+DATABASES = {
+    'default': {
+        'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.mysql'),
+        'NAME': os.environ.get('DB_NAME', 'hotelgrand_db'),
+        'USER': os.environ.get('DB_USER', 'django_user'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'secure_password'),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '3306'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': env_bool('DB_CONN_HEALTH_CHECKS', False),
+    }
+}
+
+# Read replica for the public pages (core/db_router.py), enabled by DB_REPLICA_HOST
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+REPLICA_READ_APPS = ['booking', 'menu']
+# Seconds a browser keeps reading the primary after it POSTs; cover the replication lag
+REPLICA_PIN_SECONDS = 5
+# MySQL has no partial indexes; core/indexes.py builds status-leading ones there instead of dropping the condition
+SILENCED_SYSTEM_CHECKS = ['models.W037']
+
+
+# Cache
+# Pick the backend with CACHE_BACKEND=locmem|redis|memcached|file|db, CACHE_LOCATION as it needs
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')],
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+    }
+}
+
+
+# Sessions
+# Pick the backend with SESSION_BACKEND=db|cache|cached_db|signed_cookies
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_BACKEND', 'db')]
+
+
+# Loads User + UserProfile in one query and caches the pair briefly (accounts/backends.py);
+# ModelBackend stays so sessions logged in under it keep resolving
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_TIMEOUT = 60
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# Unhashed static names; hashed ones from the manifest are served as immutable
+STATIC_MAX_AGE = 60
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Uploads are stored by content hash so identical files share one copy (core/storage.py);
+# static files are hashed and precompressed at collectstatic time (core/static_storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'core.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.static_storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Local mirror of external image_url assets (core/image_cache.py)
+IMAGE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+IMAGE_CACHE_MAX_FILE_BYTES = 5 * 1024 * 1024
+IMAGE_CACHE_TTL = 24 * 60 * 60
+IMAGE_CACHE_TIMEOUT = 5
+
+# Per-request SQL instrumentation (core/instrumentation.py); /metrics serves Prometheus text
+SQL_INSTRUMENTATION_ENABLED = True
+QUERY_BUDGET = 30
+QUERY_BUDGETS = {
+    # 'booking.views.private_booking': 15,
+}
+QUERY_REPEAT_THRESHOLD = 5
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Anonymous full-page cache for the public pages (core/page_cache.py)
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_TTL = 300
+# How long past the TTL an entry may still be served while one request rebuilds it
+PAGE_CACHE_STALE = 60
+PAGE_CACHE_LOCK_TIMEOUT = 10
+PAGE_CACHE_LOCK_WAIT = 2
+
+# Turnover cleaning queue (booking/housekeeping.py); shift start is a local hour
+HOUSEKEEPING_TASK_MINUTES = 45
+HOUSEKEEPING_LOOKAHEAD_DAYS = 7
+HOUSEKEEPING_SHIFT_START = 9
+
+# Longest stay a guest can waitlist; bounds the promotion query (booking/waitlist.py)
+WAITLIST_MAX_NIGHTS = 30
+
+# Availability/rate feed for channel managers (booking/feed.py); empty token = workers only
+CHANNEL_FEED_TOKEN = os.environ.get("CHANNEL_FEED_TOKEN", "")
+CHANNEL_FEED_DAYS = 365
+CHANNEL_FEED_MAX_DAYS = 730
+
+# Nightly occupancy forecast and rate suggestions (booking/pricing.py)
+PRICING_HISTORY_DAYS = 3 * 365
+PRICING_HORIZON_DAYS = 90
+PRICING_TARGET_OCCUPANCY = 0.7
+PRICING_SENSITIVITY = 1.0
+PRICING_MIN_FACTOR = 0.7
+PRICING_MAX_FACTOR = 1.5
+
+# Email goes out through the notification outbox (core/outbox.py, manage.py dispatch_notifications)
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = env_bool('EMAIL_USE_TLS', False)
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Hotel Grand <no-reply@hotelgrand.local>')
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_BACKOFF_SECONDS = 60
+OUTBOX_BACKOFF_MAX_SECONDS = 3600
+# A claimed batch is invisible to other dispatchers this long
+OUTBOX_LEASE_SECONDS = 300
+
+# Events buffered per bulk insert into the append-only log (core/events.py)
+EVENT_BATCH_SIZE = 1000
+
+# Completed stays older than this move to the archive tables, one chunk per transaction (booking/archive.py)
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_CHUNK_SIZE = 1000
+
+# Attempts allowed per window before login/register answer 429 (accounts/throttle.py)
+THROTTLE_ENABLED = True
+THROTTLE_RATES = {
+    'login_ip': (20, 60),
+    'login_username': (5, 300),
+    'register_ip': (10, 3600),
+}
+# Reverse proxies in front of the app; the throttle's client IP comes from X-Forwarded-For when > 0
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 0))
+
+LOGIN_REDIRECT_URL = '/'
+LOGOUT_REDIRECT_URL = '/login/'
\ No newline at end of file
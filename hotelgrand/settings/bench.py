@@ -0,0 +1,24 @@
+"""
+Benchmarks: the prod performance settings on a local SQLite file.
+
+bench_views and loadtest_bookings build their own throwaway databases from
+this; seed_data fills BENCH_DB for manual runs.
+"""
+from .base import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_DB', os.path.join(BASE_DIR, 'bench.sqlite3')),
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+TEMPLATES = with_cached_loader(TEMPLATES)
+
+# Benchmarks log in far more often than any real visitor
+THROTTLE_ENABLED = False
@@ -0,0 +1,4 @@
+"""Local development: debug on, a fresh DB connection per request, local MySQL."""
+from .base import *  # noqa: F401,F403
+
+DEBUG = env_bool('DJANGO_DEBUG', True)
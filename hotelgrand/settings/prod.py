@@ -0,0 +1,39 @@
+"""
+Production: everything sensitive comes from the environment.
+
+Connections are kept open between requests (DB_CONN_MAX_AGE, default 60s)
+and health-checked before reuse, templates are compiled once per process,
+and the cache backend is chosen with CACHE_BACKEND/CACHE_LOCATION.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+
+for _name in ('DJANGO_SECRET_KEY', 'DJANGO_ALLOWED_HOSTS', 'DB_PASSWORD'):
+    if not os.environ.get(_name):
+        raise ImproperlyConfigured(f"{_name} must be set for the prod settings.")
+
+DEBUG = False
+
+DATABASES = {
+    alias: {
+        **config,
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': env_bool('DB_CONN_HEALTH_CHECKS', True),
+    }
+    for alias, config in DATABASES.items()
+}
+
+TEMPLATES = with_cached_loader(TEMPLATES)
+
+# Request-level logs (hotelgrand.sql, the startup report) go to stderr
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'hotelgrand': {'handlers': ['console'], 'level': os.environ.get('LOG_LEVEL', 'INFO')},
+    },
+}
@@ -0,0 +1,29 @@
+"""
+Test runs: two SQLite files stand in for the MySQL primary and its replica.
+
+They are separate databases, not mirrors, so tests can tell which alias a
+read went to.
+"""
+import tempfile
+
+from .base import *  # noqa: F401,F403
+
+_TMP = tempfile.gettempdir()
+
+DATABASES = {
+    alias: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(_TMP, f'hotelgrand-{alias}.sqlite3'),
+        'TEST': {'NAME': os.path.join(_TMP, f'test-hotelgrand-{alias}.sqlite3')},
+    }
+    for alias in ('default', 'replica')
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Routing is off unless a test turns it on (core.tests.ReplicaRoutingTests): data
+# other tests create on the primary never reaches this replica.
+REPLICA_DATABASE = None
+
+# Pages cached by one test would leak into the next; core.tests.PageCacheTests turns it on
+PAGE_CACHE_ENABLED = False
@@ -20,6 +20,7 @@ from core import views  # 👈 import your views
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
+from accounts.throttle import throttled
 
 
 urlpatterns = [
@@ -28,7 +29,10 @@ urlpatterns = [
     path('about/', views.about, name='about'),
     path('rooms/', views.public_booking, name='public_booking'),
     path('menu/', views.public_menu, name='public_menu'),
-    path('login/', auth_views.LoginView.as_view(template_name='shared/login.html'), name='login'),
+    path('img/<str:token>/', views.cached_image, name='cached_image'),
+    path('metrics', views.metrics, name='metrics'),
+    path('notifications/', views.notifications, name='notifications'),
+    path('login/', throttled('login')(auth_views.LoginView.as_view(template_name='shared/login.html')), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
     path("book/", include("booking.urls")),
     path('accounts/', include('accounts.urls')),
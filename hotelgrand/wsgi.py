@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hotelgrand.settings')
 
 application = get_wsgi_application()
+
+from core.checks import startup_report  # noqa: E402 -- needs the app registry loaded above
+
+startup_report()
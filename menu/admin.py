@@ -1,8 +1,63 @@
 from django.contrib import admin
-from .models import MenuItem, Rating
+from django.db import transaction
+from django.utils import timezone
+
+from core import events, outbox, states
+from .models import ArchivedOrder, MenuItem, Order, OrderStatus, Rating
 
 class MenuItemAdmin(admin.ModelAdmin):
     readonly_fields = ['average_rating']  
     
 admin.site.register(MenuItem, MenuItemAdmin)
-admin.site.register(Rating)
\ No newline at end of file
+admin.site.register(Rating)
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ["user", "item", "quantity", "booking", "status", "ordered_at"]
+    list_filter = ["status"]
+    list_select_related = ["user", "item", "booking"]
+    raw_id_fields = ["user", "booking"]
+    actions = ["mark_preparing", "mark_delivered"]
+
+    def _set_status(self, request, queryset, status):
+        with transaction.atomic():
+            orders = list(queryset.select_for_update().filter(
+                status__in=states.sources(Order, status)
+            ).select_related("user", "item"))
+            rows = [(order.pk, order.status) for order in orders]
+            for order in orders:
+                order.status = status
+                outbox.order_updated(order)
+            now = timezone.now()
+            queryset.filter(pk__in=[pk for pk, _ in rows]).update(status=status, updated_at=now)
+            events.record_transitions("order", rows, status, source=f"admin.mark_{status.name.lower()}",
+                                      actor=request.user, when=now)
+        self.message_user(request, f"{len(orders)} order(s) marked {status.label.lower()}; guests notified.")
+
+    def mark_preparing(self, request, queryset):
+        self._set_status(request, queryset, OrderStatus.PREPARING)
+    mark_preparing.short_description = "🍳 Mark selected orders as preparing"
+
+    def mark_delivered(self, request, queryset):
+        self._set_status(request, queryset, OrderStatus.DELIVERED)
+    mark_delivered.short_description = "✅ Mark selected orders as delivered"
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    # Orders moved out with their booking by booking/archive.py.
+    list_display = ["id", "user", "item", "quantity", "booking", "status", "ordered_at", "archived_at"]
+    list_filter = ["status"]
+    list_select_related = ["user", "item", "booking"]
+    search_fields = ["user__username", "=booking__id"]
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
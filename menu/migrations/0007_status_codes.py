@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:38
+
+import core.indexes
+from django.db import migrations, models
+
+# Frozen copy of menu.models.OrderStatus; anything unrecognised becomes pending.
+CODES = {'pending': 0, 'preparing': 1, 'delivered': 2}
+
+
+def names_to_codes(apps, schema_editor):
+    # Still a CharField here: write the codes as text and let AlterField cast the column.
+    Order = apps.get_model('menu', 'Order')
+    for name, code in CODES.items():
+        Order.objects.filter(status=name).update(status=str(code))
+    Order.objects.exclude(status__in=[str(code) for code in CODES.values()]).update(status='0')
+
+
+def codes_to_names(apps, schema_editor):
+    Order = apps.get_model('menu', 'Order')
+    for name, code in CODES.items():
+        Order.objects.filter(status=str(code)).update(status=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0006_order_updated_at_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_status_ordered_at',
+        ),
+        migrations.RunPython(names_to_codes, codes_to_names),
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Pending'), (1, 'Preparing'), (2, 'Delivered')], default=0),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=core.indexes.PartialIndex(condition=models.Q(('status__literal_in', (0, 1))), fields=['ordered_at'], name='order_open'),
+        ),
+    ]
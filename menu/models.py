@@ -40,16 +40,82 @@ class Rating(models.Model):
     
 from django.db import models
 from django.contrib.auth.models import User
-from booking.models import Room, Booking
+from booking.models import ArchivedBooking, Room, Booking
 from menu.models import MenuItem  # assuming this exists
+from core import states
+from core.indexes import PartialIndex
+
+
+class OrderStatus(models.IntegerChoices):
+    PENDING = 0, "Pending"
+    PREPARING = 1, "Preparing"
+    DELIVERED = 2, "Delivered"
+
+
+# Orders the kitchen still has to deal with
+OPEN_ORDER_STATUSES = (OrderStatus.PENDING, OrderStatus.PREPARING)
+# Matches the order_open index word for word (core/indexes.py)
+IS_OPEN = models.Q(status__literal_in=OPEN_ORDER_STATUSES)
+
 
 class Order(models.Model):
+    Status = OrderStatus
+    # Allowed status changes, enforced on save (core/states.py)
+    TRANSITIONS = {
+        Status.PENDING: {Status.PREPARING, Status.DELIVERED},
+        Status.PREPARING: {Status.DELIVERED},
+        Status.DELIVERED: set(),
+    }
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE)
     item = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
     ordered_at = models.DateTimeField(auto_now_add=True)
-    status = models.CharField(max_length=20, default="pending")  # pending, preparing, delivered
+    status = models.PositiveSmallIntegerField(choices=Status.choices, default=Status.PENDING)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        # Open orders only; delivered ones pile up forever (core/indexes.py)
+        indexes = [PartialIndex(fields=["ordered_at"], name="order_open", condition=IS_OPEN)]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status as loaded, so a save can check and log the transition (core/states.py, core/events.py)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    @property
+    def status_name(self):
+        return states.name(OrderStatus, self.status)
+
+    def save(self, *args, **kwargs):
+        previous = getattr(self, "_loaded_status", None)
+        if previous is not None:
+            states.check(Order, previous, self.status)
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
 
     def __str__(self):
         return f"{self.user.username} ordered {self.item.name}"
+
+
+class ArchivedOrder(models.Model):
+    """A delivered order moved out of ``Order`` with its booking (booking/archive.py); same id and columns."""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    booking = models.ForeignKey(ArchivedBooking, on_delete=models.CASCADE, related_name="orders")
+    item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name="+")
+    quantity = models.PositiveIntegerField(default=1)
+    ordered_at = models.DateTimeField()
+    status = models.PositiveSmallIntegerField(choices=OrderStatus.choices)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    @property
+    def status_name(self):
+        return states.name(OrderStatus, self.status)
+
+    def __str__(self):
+        return f"{self.user.username} ordered {self.item.name} (archived)"
@@ -1,14 +1,17 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from booking.models import Booking
+from booking.models import Booking, BookingStatus
 from menu.models import MenuItem, Order
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
+
+from core import outbox
 
 @login_required
 def private_menu(request):
     booking = Booking.objects.filter(
         guest_name=request.user.username,
-        status="checked_in"
+        status=BookingStatus.CHECKED_IN
     ).order_by("-check_in").first()
 
     if not booking:
@@ -28,7 +31,7 @@ def place_order(request):
         quantity = int(request.POST.get("quantity", 1))
         booking = Booking.objects.filter(
             guest_name=request.user.username,
-            status="checked_in"
+            status=BookingStatus.CHECKED_IN
         ).order_by("-check_in").first()
 
         if not booking:
@@ -36,6 +39,8 @@ def place_order(request):
             return redirect("private_menu")
 
         item = get_object_or_404(MenuItem, id=item_id)
-        Order.objects.create(user=request.user, booking=booking, item=item, quantity=quantity)
+        with transaction.atomic():
+            order = Order.objects.create(user=request.user, booking=booking, item=item, quantity=quantity)
+            outbox.order_placed(order)
         messages.success(request, f"✅ Ordered {item.name} successfully!")
         return redirect("private_menu")
\ No newline at end of file